@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark of the parsing of console commands.
+
+Parses N lines of each kind with HBNBCommand.precmd and parseline, and
+with the split based precmd and the Cmd.parseline they replaced. Then
+executes N / 20 updates of 3 attributes given as a dictionary with each,
+in a transaction as a batch does, so that they are saved once, and prints
+the lines per second.
+
+Usage: python3 -m benchmarks.bench_console [N] (default: 200000)
+"""
+import io
+import os
+import sys
+import tempfile
+from cmd import Cmd
+from contextlib import redirect_stdout
+import models
+from console import HBNBCommand
+from models.user import User
+from benchmarks.common import timed
+
+ID = "2a1c1bd1-8d55-4f56-8a4b-bf8e5f2b1a3d"
+LINES = {
+    "plain": f"show User {ID}",
+    "all": "User.all(limit=10)",
+    "show": f'User.show("{ID}")',
+    "update": f'User.update("{ID}", "first_name", "Betty")',
+}
+DICTIONARY = '{"first_name": "Betty", "age": 89, "height": 1.72}'
+
+
+def split_precmd(console, line):
+    """The split based precmd."""
+    args = line.split("(")
+    if len(args) == 2:
+        cls_name, command = args[0].split(".")
+        cm_args = args[1][:-1]
+        if command not in ["all", "count", "show", "destroy", "update"]:
+            return line
+        if len(cm_args) > 0:
+            if ", {" in cm_args:
+                obj_id, cm_args = cm_args.split(", {")
+                cm_args = cm_args[:-1].split(", ")
+                with models.storage.transaction():
+                    for cm_arg in cm_args:
+                        key, value = cm_arg.split(": ")
+                        console.do_update(f"{cls_name} {obj_id[1:-1]} "
+                                          f"{key[1:-1]} {value}")
+                return ""
+            elif ", " in cm_args:
+                obj_id, attr, value = cm_args.split(", ")
+                return f"update {cls_name} {obj_id[1:-1]} {attr[1:-1]} " \
+                    f"{value}"
+            if command == "all":
+                return f"all {cls_name} {cm_args.replace(',', ' ')}"
+            return f"{command} {cls_name} {cm_args[1:-1]}"
+        return f"{command} {cls_name}"
+    return line
+
+
+def split_parse(console, line, n):
+    """Parses line n times as the split based precmd and onecmd did."""
+    for _ in range(n):
+        Cmd.parseline(console, split_precmd(console, line))
+
+
+def parse(console, line, n):
+    """Parses line n times with precmd and parseline."""
+    for _ in range(n):
+        console.parseline(console.precmd(line))
+
+
+def split_update(console, line, n):
+    """Executes the dictionary update of line n times, split based."""
+    with models.storage.transaction():
+        for _ in range(n):
+            split_precmd(console, line)
+
+
+def update(console, line, n):
+    """Executes the dictionary update of line n times."""
+    with models.storage.transaction():
+        for _ in range(n):
+            console.onecmd(console.precmd(line))
+
+
+def main(n):
+    """Runs the benchmark on n lines of each kind."""
+    console = HBNBCommand()
+    print(f"lines parsed per second ({n} lines of each kind)")
+    print(f"  {'kind':<12}{'split':>12}{'precmd':>12}")
+    for kind, line in LINES.items():
+        old = n / timed(split_parse, console, line, n)
+        new = n / timed(parse, console, line, n)
+        print(f"  {kind:<12}{old:>12.0f}{new:>12.0f}")
+
+    storage = models.storage
+    storage.all().clear()
+    user = User()
+    line = f'User.update("{user.id}", {DICTIONARY})'
+    n = max(1, n // 20)
+    with tempfile.TemporaryDirectory() as tmp, \
+            redirect_stdout(io.StringIO()):
+        storage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        storage.fsync = "never"
+        old = n / timed(split_update, console, line, n)
+        new = n / timed(update, console, line, n)
+    print(f"dictionary updates executed per second ({n} updates)")
+    print(f"  {'dictionary':<12}{old:>12.0f}{new:>12.0f}")
+    storage.all().clear()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
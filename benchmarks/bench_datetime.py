@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmark of the datetime codec used by BaseModel and FileStorage.
+
+Compares datetime.strptime/strftime with parse_datetime/format_datetime on
+N timestamps, then times FileStorage.reload() of N records with each codec.
+
+Usage: python3 -m benchmarks.bench_datetime [N] (default: 1000000)
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from uuid import uuid4
+from unittest.mock import patch
+import models
+from models import base_model
+from models.base_model import DATE_FORMAT, format_datetime, parse_datetime
+from benchmarks.common import timed
+
+
+def strptime(text):
+    """The parser used before parse_datetime."""
+    return datetime.strptime(text, DATE_FORMAT)
+
+
+def write_records(path, n):
+    """Writes a FileStorage file of n User records."""
+    start = datetime(2023, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i in range(n):
+            date = format_datetime(
+                start + timedelta(seconds=i, microseconds=i))
+            obj_id = str(uuid4())
+            record = {"id": obj_id, "created_at": date, "updated_at": date,
+                      "__class__": "User", "email": f"user{i}@hbnb.io"}
+            f.write(f'{"," if i else ""}"User.{obj_id}": {json.dumps(record)}')
+        f.write("}")
+
+
+def reload(storage):
+    """Reloads storage from scratch."""
+    storage.all().clear()
+    storage.reload()
+
+
+def main(n):
+    """Runs the benchmark on n timestamps/records."""
+    texts = [format_datetime(datetime(2023, 1, 1) + timedelta(seconds=i))
+             for i in range(n)]
+    values = [parse_datetime(text) for text in texts]
+
+    print(f"{n} timestamps")
+    for name, func, data in (
+            ("parse  strptime       ", strptime, texts),
+            ("parse  parse_datetime ", parse_datetime, texts),
+            ("format strftime       ", lambda d: d.strftime(DATE_FORMAT),
+             values),
+            ("format format_datetime", format_datetime, values)):
+        print(f"  {name} {timed(lambda: [func(x) for x in data]):8.3f}s")
+
+    storage = models.storage
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        write_records(path, n)
+        storage._FileStorage__file_path = path
+
+        print(f"FileStorage.reload() of {n} records")
+        with patch.object(base_model, "parse_datetime", strptime):
+            print(f"  strptime       {timed(reload, storage):8.3f}s")
+        print(f"  parse_datetime {timed(reload, storage):8.3f}s")
+        storage.all().clear()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""
+Benchmark of the file formats of FileStorage.
+
+Saves N mixed User/Place/Review objects in every format, then reloads them
+from scratch, and reports the size of the file, the time of the save (every
+object serialized) and the time of the reload.
+
+Usage: python3 -m benchmarks.bench_formats [N] (default: 1000000)
+"""
+import os
+import sys
+import tempfile
+import models
+from models.place import Place
+from models.review import Review
+from models.user import User
+from benchmarks.common import timed
+
+FORMATS = ("json", "compact", "jsonl", "binary", "json+gzip",
+           "jsonl+gzip", "binary+zlib", "binary+gzip", "binary+lzma")
+
+
+def make_objects(n):
+    """Creates n objects: 1/4 users, 1/4 places and 1/2 reviews."""
+    users = []
+    for i in range(n):
+        if i % 4 == 0:
+            obj = User()
+            obj.email, obj.first_name = f"user{i}@hbnb.io", "Betty"
+            users.append(obj)
+        elif i % 4 == 1:
+            obj = Place()
+            obj.user_id, obj.name = users[-1].id, f"Place {i}"
+            obj.number_rooms, obj.price_by_night = i % 7, 100 + i % 50
+            obj.latitude, obj.longitude = 48 + i % 1000 / 1e3, 2.35
+            obj.amenity_ids = ["wifi", "pool"]
+        else:
+            obj = Review()
+            obj.user_id, obj.text = users[-1].id, "Great stay " * (i % 5)
+        models.storage.new(obj)
+
+
+def save(storage, fmt):
+    """Saves every object again in format fmt."""
+    storage.format = fmt
+    storage._FileStorage__encoding = None  # serialize every object
+    storage.save()
+
+
+def reload(storage):
+    """Reloads storage from scratch."""
+    storage.all().clear()
+    storage.reload()
+
+
+def main(n):
+    """Runs the benchmark on n objects."""
+    storage = models.storage
+    storage.all().clear()
+    make_objects(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        storage._FileStorage__file_path = path
+        storage.fsync = "never"
+
+        print(f"{n} objects      size (MB)   save (s)   load (s)")
+        for fmt in FORMATS:
+            saved = timed(save, storage, fmt)
+            size = os.path.getsize(path) / 1e6
+            loaded = timed(reload, storage)
+            print(f"  {fmt:12} {size:10.1f} {saved:10.3f} {loaded:10.3f}")
+        storage.all().clear()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
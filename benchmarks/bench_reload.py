@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Scaling benchmark of the parallel reload of FileStorage.
+
+Saves N mixed User/Place/Review objects, then times FileStorage.reload()
+with 1, 2, 4... worker processes (up to the number of CPUs), for the
+default JSON format and for JSON Lines.
+
+Usage: python3 -m benchmarks.bench_reload [N] (default: 1000000)
+"""
+import os
+import sys
+import tempfile
+import models
+from benchmarks.bench_formats import make_objects
+from benchmarks.common import timed
+
+
+def reload(storage, workers):
+    """Reloads storage from scratch with workers processes."""
+    storage.all().clear()
+    storage.workers = workers
+    storage.reload()
+
+
+def main(n):
+    """Runs the benchmark on n objects."""
+    storage = models.storage
+    storage.all().clear()
+    make_objects(n)
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        storage.fsync = "never"
+        for fmt in ("json", "jsonl"):
+            storage.format = fmt
+            storage.save()
+            print(f"FileStorage.reload() of {n} objects ({fmt})")
+            serial = None
+            for workers in counts:
+                seconds = timed(reload, storage, workers)
+                serial = serial or seconds
+                print(f"  {workers:3} workers {seconds:8.3f}s "
+                      f"(x{serial / seconds:.2f})")
+        storage.all().clear()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
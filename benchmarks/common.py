@@ -0,0 +1,12 @@
+#!/usr/bin/python3
+"""
+Helpers shared by the benchmarks.
+"""
+from time import perf_counter
+
+
+def timed(func, *args):
+    """Returns the time taken by func(*args) in seconds."""
+    start = perf_counter()
+    func(*args)
+    return perf_counter() - start
@@ -4,10 +4,90 @@ The `Console` Module that Defines HBNB command interpreter.
 """
 
 from models.engine.file_storage import FileStorage
-from models.base_model import BaseModel
+from models.base_model import BaseModel, format_datetime
+from models.engine import query
 from models.user import User
 from models import storage
 from cmd import Cmd
+from datetime import datetime
+from itertools import islice
+from time import perf_counter
+from uuid import uuid4
+import json
+import re
+import sys
+
+# a double or single quoted string, escapes included
+STRING = r""""([^"\\]*(?:\\.[^"\\]*)*)"|'([^'\\]*(?:\\.[^'\\]*)*)'"""
+# an argument: a quoted string or a word
+ARGUMENT = re.compile(rf"""{STRING}|([^\s,"'{{}}()]+)""")
+# <class name>.<command>(<arguments>[, <dictionary>])
+COMMAND = re.compile(
+    rf"\s*(\w+)\.(\w+)\(\s*"
+    rf"((?:(?:{ARGUMENT.pattern})"
+    rf"(?:\s*,\s*(?:{ARGUMENT.pattern}))*)?)"
+    r"(?:\s*,\s*(?P<dict>\{.*\}))?\s*\)\s*")
+# an item of a dictionary: a quoted or bare key, ":", a value
+ITEM = re.compile(rf"""(?:{STRING}|(\w+))\s*:\s*"""
+                  rf"""(?:{STRING}|([^\s,"'{{}}]+))""")
+ITEMS = re.compile(rf"\{{\s*(?:(?:{ITEM.pattern})"
+                   rf"(?:\s*,\s*(?:{ITEM.pattern}))*\s*,?)?\s*\}}")
+ESCAPE = re.compile(r"\\(.)")
+# the separator of arguments quoted with each quote, e.g. '", "'
+SEPARATORS = {'"': '", "', "'": "', '"}
+# the value of the update command: a quoted string or a word
+VALUE = re.compile(rf"{STRING}|(\S+)")
+
+
+def unescape(groups, quoted):
+    """Returns groups, the escapes removed from those at indexes quoted."""
+    return tuple(ESCAPE.sub(r"\1", group) if i in quoted else group
+                 for i, group in enumerate(groups))
+
+
+def to_value(double, single, word):
+    """
+    Returns the value of a string matched by QUOTED or of a word, a float
+    if it has a "." and else an int, as the update command reads them.
+
+    Raises:
+        ValueError: the word is not a number.
+    """
+    if not word:
+        return double or single
+    return float(word) if "." in word else int(word)
+
+
+def parse_command(line):
+    """
+    Returns the command line of a line written
+    <class name>.<command>(<arguments>), e.g. "show User <id>", or None if
+    it is not written so.
+
+    The line is checked by a single compiled pattern, then its arguments
+    are read by another: quoted strings (which may hold dots, commas and
+    parentheses) or words, and for update a last dictionary of the
+    attributes to set. The arguments are passed unquoted, but for the
+    value and the dictionary of update, which do_update reads.
+    """
+    match = COMMAND.fullmatch(line)
+    if match is None:
+        return None
+    cls_name, name, text, dictionary = match.group(1, 2, 3, "dict")
+    matches = list(ARGUMENT.finditer(text))
+    tokens = [token.groups("") for token in matches]
+    if "\\" in text:
+        tokens = [unescape(token, (0, 1)) for token in tokens]
+    args = [word or double or single for double, single, word in tokens]
+
+    if dictionary is not None:
+        if name != "update" or not tokens or \
+                not ITEMS.fullmatch(dictionary):
+            return None
+        args = args[:1] + [dictionary]
+    elif name == "update" and len(tokens) > 2:
+        args[2:] = [match.group(0) for match in matches[2:3]]
+    return " ".join((name, cls_name, *args))
 
 
 class HBNBCommand(Cmd):
@@ -26,31 +106,55 @@ class HBNBCommand(Cmd):
 
     def do_all(self, arg):
         """Prints string representation of objs based or not on class name."""
-        if arg and arg not in self.classes:
+        args = arg.split()
+        cls_name = args.pop(0) if args and "=" not in args[0] else None
+        if cls_name and cls_name not in self.classes:
             print("** class doesn't exist **")
             return
 
-        data = []
-
-        for key, value in storage.all().items():
-            if key.split(".")[0] == arg or not arg:
-                data.append(str(value))
+        options = {"limit": None, "offset": "0", "cursor": None,
+                   "format": "list"}
+        for token in args:
+            name, equal, value = token.partition("=")
+            if not equal or name not in options:
+                print(f"** invalid option: {token} **")
+                return
+            options[name] = value
+        if options["format"] not in ("list", "lines"):
+            print("** invalid format **")
+            return
+        try:
+            limit = options["limit"]
+            limit = None if limit is None else int(limit)
+            offset = int(options["offset"])
+        except ValueError:
+            print("** invalid number **")
+            return
 
-        print(data)
+        if cls_name:
+            objects = storage.select(cls_name)
+        else:
+            objects = iter(storage.all().values())
+        cursor = options["cursor"]
+        if cursor is not None:
+            for obj in objects:
+                if f"{obj.__class__.__name__}.{obj.id}" == cursor:
+                    break
+
+        stop = None if limit is None else offset + limit
+        last = self.print_objects(islice(objects, offset, stop),
+                                  options["format"] == "lines")
+        if limit is not None and last is not None and \
+                next(objects, None) is not None:
+            print(f"** cursor={last} **")
 
     def do_count(self, arg):
         """Counts the number of instances of a specific class."""
-        objects = []
-
         if not arg:
             print("** class name missing **")
             return
 
-        for obj in storage.all().values():
-            if obj.to_dict()["__class__"] == arg:
-                objects.append(obj)
-
-        print(len(objects))
+        print(storage.count(arg))
 
     def do_create(self, arg):
         """Creates a new instance of BaseModel, saves it and prints the id."""
@@ -62,13 +166,10 @@ class HBNBCommand(Cmd):
     def do_destroy(self, arg):
         """Deletes an instance based on the class name and id."""
         if self.is_valid(arg, "destroy"):
-            obj_key = arg.replace(" ", ".")
-            objects = storage.all()
-            obj_data = objects.get(obj_key)
+            obj_data = storage.get(*arg.split()[:2])
 
             if obj_data:
-                del objects[obj_key]
-                storage.__objects = objects
+                storage.delete(obj_data)
                 storage.save()
             else:
                 print("** no instance found **")
@@ -77,6 +178,108 @@ class HBNBCommand(Cmd):
         """EOF detected to exit from the program"""
         return True
 
+    def do_import(self, arg):
+        """Creates instances of a class from a JSON Lines file."""
+        args = arg.split()
+
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in self.classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) == 1:
+            print("** file name missing **")
+            return
+
+        start = perf_counter()
+        try:
+            with open(args[1], "r", encoding="utf-8") as f:
+                count = storage.bulk_new(self.read_records(args[0], f))
+        except OSError:
+            print("** file doesn't exist **")
+            return
+        storage.save()
+
+        elapsed = perf_counter() - start
+        print(f"{count} imported in {elapsed:.2f}s "
+              f"({count / max(elapsed, 1e-9):.0f}/s)")
+
+    def do_near(self, arg):
+        """Prints the objs of a class closest to a point (lat lon km [k])."""
+        args = arg.split()
+
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in self.classes:
+            print("** class doesn't exist **")
+            return
+        if args[0] not in storage.spatial:
+            print("** class has no location **")
+            return
+        if len(args) < 3:
+            print("** coordinates missing **")
+            return
+        if len(args) == 3:
+            print("** radius missing **")
+            return
+
+        try:
+            lat, lon, radius = (float(value) for value in args[1:4])
+            k = int(args[4]) if len(args) > 4 else None
+        except ValueError:
+            print("** invalid number **")
+            return
+
+        found = storage.nearby(args[0], lat, lon, radius, k)
+        print([str(obj) for _, obj in found])
+
+    def do_query(self, arg):
+        """Prints the objs of a class matching conditions (e.g. price<100)."""
+        args = query.split(arg)
+
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in self.classes:
+            print("** class doesn't exist **")
+            return
+
+        conditions = []
+        options = {"order_by": None, "limit": None, "offset": "0",
+                   "fields": None}
+        for token in args[1:]:
+            name, equal, value = token.partition("=")
+            if equal and name in options:
+                options[name] = value
+                continue
+            try:
+                conditions.append(query.parse(token))
+            except ValueError:
+                print(f"** invalid condition: {token} **")
+                return
+
+        try:
+            limit = options["limit"]
+            limit = None if limit is None else int(limit)
+            offset = int(options["offset"])
+        except ValueError:
+            print("** invalid number **")
+            return
+
+        order_by, fields = options["order_by"], options["fields"]
+        found = storage.select(
+            args[0], *conditions,
+            order_by=order_by and order_by.lstrip("-"),
+            reverse=bool(order_by and order_by.startswith("-")),
+            limit=limit, offset=offset,
+            fields=fields and fields.split(","))
+        if fields:
+            print(list(found))
+        else:
+            self.print_objects(found)
+
     def do_quit(self, arg):
         """Quit command to exit from the program"""
         return True
@@ -84,8 +287,7 @@ class HBNBCommand(Cmd):
     def do_show(self, arg):
         """Prints the representation of an obj based on class name and id."""
         if self.is_valid(arg, "show"):
-            obj_key = arg.replace(" ", ".")
-            obj_data = storage.all().get(obj_key)
+            obj_data = storage.get(*arg.split()[:2])
 
             if obj_data:
                 print(obj_data)
@@ -95,9 +297,9 @@ class HBNBCommand(Cmd):
     def do_update(self, arg):
         """Updates an instance data based on the class name and id."""
         if self.is_valid(arg, "update"):
-            args = arg.split()
+            args = arg.split(None, 2)
             cls_name, obj_id = args[:2]
-            obj = storage.all().get(f"{cls_name}.{obj_id}")
+            obj = storage.get(cls_name, obj_id)
 
             if not obj:
                 print("** no instance found **")
@@ -105,22 +307,26 @@ class HBNBCommand(Cmd):
             if len(args) == 2:
                 print("** attribute name missing **")
                 return False
-            elif len(args) == 3:
-                print("** value missing **")
-                return False
-
-            attr, value = args[2:4]
 
-            if value[0] in ['"', "'"]:
-                value = value[1:-1]
-            elif "." in value:
-                value = float(value)
+            if args[2][0] == "{":
+                if not ITEMS.fullmatch(args[2]):
+                    print("** invalid value **")
+                    return False
+                items = ITEM.findall(args[2])
+                if "\\" in args[2]:
+                    items = [unescape(item, (0, 1, 3, 4)) for item in items]
+                attributes = {key or double or single: value
+                              for double, single, key, *value in items}
             else:
-                value = int(value)
-
-            print("updated")
-            setattr(obj, attr, value)
-            storage.save()
+                args = args[2].split(None, 1)
+                if len(args) == 1:
+                    print("** value missing **")
+                    return False
+                value = VALUE.match(args[1]).groups("")
+                if "\\" in args[1]:
+                    value = unescape(value, (0, 1))
+                attributes = {args[0]: value}
+            self.set_attributes(obj, attributes)
 
     # ==================== Overwrite Built-in Functionns ====================
 
@@ -129,38 +335,59 @@ class HBNBCommand(Cmd):
         pass
 
     def precmd(self, line):
-        """Overwrite built-in precmd to handle a specific pattern of input."""
-        commands = ["all", "count", "show", "destroy", "update"]
-        args = line.split("(")
-
-        if len(args) == 2:
-            cls_name, command = args[0].split(".")
-            cm_args = args[1][:-1]
-
-            if command not in commands:
-                return line
-
-            if len(cm_args) > 0:
-                if ", {" in cm_args:
-                    obj_id, cm_args = cm_args.split(", {")
-                    cm_args = cm_args[:-1].split(", ")
-                    for i, cm_arg in enumerate(cm_args):
-                        key, value = cm_args[i].split(": ")
-                        query = f"{cls_name} {obj_id} {key[1:-1]} {value}"
-                        if i == len(cm_args) - 1:
-                            return "update " + query
-                        self.do_update(query)
-                elif ", " in cm_args:
-                    obj_id, attr, value = cm_args.split(", ")
-                    obj_id, attr = obj_id[1:-1], attr[1:-1]
-                    query = f"update {cls_name} {obj_id} {attr} {value}"
-                    return query
-                query = f"{command} {cls_name} {cm_args[1:-1]}"
-                return query
-            else:
-                return f"{command} {cls_name}"
-
-        return line
+        """
+        Overwrite built-in precmd to turn lines written
+        <class name>.<command>(<arguments>) into command lines, e.g.
+        User.show("<id>") into show User <id>; other lines are returned
+        unchanged.
+
+        The common arguments, words or strings all quoted alike and
+        separated by ", ", are split without a pattern; the others (e.g.
+        escapes, or a dictionary) are read by parse_command().
+        """
+        head, paren, text = line.partition("(")
+        if not paren:
+            return line
+        cls_name, dot, name = head.partition(".")
+        if name not in self.dotted or text[-1:] != ")":
+            return line
+
+        quote = text[:1]
+        if quote in SEPARATORS:
+            # every quote must open or close one of the arguments
+            args = text[1:-2].split(SEPARATORS[quote])
+            if text[-2] != quote or text.count(quote) != 2 * len(args) or \
+                    "\\" in text:
+                return parse_command(line) or line
+            if len(args) == 1:
+                return f"{name} {cls_name} {args[0]}"
+            if name == "update" and len(args) > 2:
+                return f"update {cls_name} {args[0]} {args[1]} " \
+                    f"{quote}{args[2]}{quote}"
+            return " ".join((name, cls_name, *args))
+
+        text = text[:-1]
+        if not text:
+            return f"{name} {cls_name}"
+        if '"' in text or "'" in text or "{" in text or "\\" in text:
+            return parse_command(line) or line
+        text = text.replace(", ", " ").replace(",", " ")
+        return f"{name} {cls_name} {text}"
+
+    def parseline(self, line):
+        """
+        Overwrite built-in parseline to split the command name off at the
+        first space, rather than by testing its characters one by one;
+        lines it can't split so are parsed by Cmd.parseline().
+        """
+        line = line.strip()
+        name, _, arg = line.partition(" ")
+        if not name.isidentifier() or not name.isascii():
+            return super().parseline(line)
+        return name, arg.strip(), line
+
+    # commands that can be written <class name>.<command>(<arguments>)
+    dotted = frozenset(("all", "count", "destroy", "show", "update"))
 
     # ====================== Helper Functions =======================
 
@@ -180,6 +407,179 @@ class HBNBCommand(Cmd):
 
         return True
 
+    @staticmethod
+    def set_attributes(obj, attributes):
+        """
+        Sets attributes on obj at once: with one save, and none of them if
+        one of their values is invalid.
+
+        Args:
+            obj (BaseModel): the instance to update.
+            attributes (dict): the values to set by attribute name, as the
+            (double, single, word) groups they were read in (see
+            to_value()).
+        """
+        if not attributes:
+            print("** attribute name missing **")
+            return
+        try:
+            attributes = {name: to_value(*value)
+                          for name, value in attributes.items()}
+        except ValueError:
+            print("** invalid value **")
+            return
+
+        print("updated")
+        with storage.transaction():
+            for name, value in attributes.items():
+                setattr(obj, name, value)
+            storage.save()
+
+    @staticmethod
+    def print_objects(objects, lines=False):
+        """
+        Prints the str() of every object of an iterable as print() prints
+        a list of them, or one per line, without building the list.
+
+        Returns the key of the last object printed (None if there is none).
+        """
+        last = None
+        separator = "["
+        for obj in objects:
+            if lines:
+                print(obj)
+            else:
+                print(separator, repr(str(obj)), sep="", end="")
+                separator = ", "
+            last = f"{obj.__class__.__name__}.{obj.id}"
+        if not lines:
+            print("[]" if last is None else "]")
+        return last
+
+    def run_batch(self, lines, every=None):
+        """
+        Executes the commands of a script without prompts, saving once.
+
+        The saves the commands make are coalesced into one at the end of
+        the script, or one every `every` commands. A command that raises
+        an error has its changes rolled back and is reported; the script
+        goes on. Blank lines and lines starting with # are skipped, quit
+        and EOF stop the script.
+
+        A report of the number of commands, the throughput and the latency
+        of each command is printed to stderr at the end.
+
+        Args:
+            lines (iterable): lines of the script, e.g. an open file.
+            every (int): number of commands between two saves (None: only
+            at the end).
+
+        Returns:
+            int: the number of commands that raised an error.
+        """
+        commands = ((number, line.strip()) for number, line in
+                    enumerate(lines, 1)
+                    if line.strip() and not line.lstrip().startswith("#"))
+        latencies = {}
+        errors = 0
+        stop = False
+        start = perf_counter()
+
+        while not stop:
+            executed = 0
+            with storage.transaction():
+                for number, line in islice(commands, every):
+                    executed += 1
+                    name = line.split()[0].split("(")[0].split(".")[-1]
+                    begin = perf_counter()
+                    try:
+                        with storage.transaction():
+                            line = self.precmd(line)
+                            stop = self.postcmd(self.onecmd(line), line)
+                    except Exception as e:
+                        errors += 1
+                        print(f"** line {number}: {e!r} **")
+                    latencies.setdefault(name, []).append(
+                        perf_counter() - begin)
+                    if stop:
+                        break
+            if not executed:
+                break
+
+        self.report(latencies, perf_counter() - start, errors)
+        return errors
+
+    @staticmethod
+    def report(latencies, elapsed, errors=0):
+        """
+        Prints the throughput and latencies of a batch to stderr.
+
+        Args:
+            latencies (dict): seconds taken by each execution, by command.
+            elapsed (float): seconds taken by the batch, saves included.
+            errors (int): number of commands that raised an error.
+        """
+        count = sum(map(len, latencies.values()))
+        print(f"{count} commands in {elapsed:.2f}s "
+              f"({count / max(elapsed, 1e-9):.0f}/s), {errors} errors",
+              file=sys.stderr)
+        if not latencies:
+            return
+        print(f"{'command':<10}{'count':>8}{'mean ms':>10}{'p50 ms':>10}"
+              f"{'p99 ms':>10}{'max ms':>10}", file=sys.stderr)
+        for name, times in sorted(latencies.items()):
+            times = sorted(times)
+            p50 = times[len(times) // 2]
+            p99 = times[min(len(times) - 1, len(times) * 99 // 100)]
+            print(f"{name:<10}{len(times):>8}"
+                  f"{sum(times) / len(times) * 1000:>10.3f}"
+                  f"{p50 * 1000:>10.3f}{p99 * 1000:>10.3f}"
+                  f"{times[-1] * 1000:>10.3f}", file=sys.stderr)
+
+    def read_records(self, cls_name, f):
+        """
+        Yields the instances of cls_name read from a JSON Lines file.
+
+        Each line is the dictionary of an instance (as from to_dict()); a
+        missing id, created_at or updated_at is generated. Invalid lines are
+        reported and skipped.
+        """
+        cls = self.classes[cls_name]
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if data.get("__class__", cls_name) != cls_name:
+                    raise ValueError(f"not a {cls_name}")
+                if "id" not in data:
+                    data["id"] = str(uuid4())
+                if "created_at" not in data or "updated_at" not in data:
+                    now = format_datetime(datetime.now())
+                    data.setdefault("created_at", now)
+                    data.setdefault("updated_at", now)
+                obj = cls(**data)
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"** line {number}: invalid record ({e}) **")
+                continue
+            yield obj
+
 
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    args = sys.argv[1:]
+    if not args:
+        HBNBCommand().cmdloop()
+        sys.exit()
+
+    if len(args) not in (2, 4) or args[0] != "--batch" or \
+            len(args) == 4 and (args[2] != "--save-every" or
+                                not args[3].isdigit() or args[3] == "0"):
+        sys.exit("Usage: ./console.py [--batch SCRIPT [--save-every N]]\n"
+                 "SCRIPT: file of commands, - for the standard input")
+    every = int(args[3]) if len(args) == 4 else None
+    if args[1] == "-":
+        failed = HBNBCommand().run_batch(sys.stdin, every)
+    else:
+        with open(args[1], "r", encoding="utf-8") as f:
+            failed = HBNBCommand().run_batch(f, every)
+    sys.exit(1 if failed else 0)
@@ -1,9 +1,50 @@
 """Initialize the models Package"""
+from os import getenv
 
-from models.engine.file_storage import FileStorage
+# Select the storage engine (HBNB_TYPE_STORAGE: "file", "journal", "sqlite",
+# "sharded": one file per class, hash-partitioned in HBNB_PARTITIONS files,
+# "snapshot": objects served from a memory-mapped snapshot file)
+storage_type = getenv("HBNB_TYPE_STORAGE", "file")
 
-# Create an instance of FileStorage
-storage = FileStorage()
+if storage_type == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+elif storage_type == "sharded":
+    from models.engine.sharded_storage import ShardedStorage
+    storage = ShardedStorage()
+    storage.partitions = int(getenv("HBNB_PARTITIONS", "1"))
+elif storage_type == "snapshot":
+    from models.engine.snapshot_storage import SnapshotStorage
+    storage = SnapshotStorage()
+elif storage_type == "journal":
+    from models.engine.journal_storage import JournalStorage
+    storage = JournalStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
+
+# Build the objects on first access (HBNB_LAZY_RELOAD=1)
+storage.lazy = getenv("HBNB_LAZY_RELOAD") == "1"
+
+# Build loaded objects from slotted classes (HBNB_COMPACT_MODELS=1)
+storage.compact = getenv("HBNB_COMPACT_MODELS") == "1"
+
+# Write the JSON file from a background thread (HBNB_WRITE_BEHIND=1), at
+# most HBNB_FLUSH_INTERVAL seconds after each save
+storage.write_behind = getenv("HBNB_WRITE_BEHIND") == "1"
+storage.flush_interval = float(getenv("HBNB_FLUSH_INTERVAL", "0.5"))
+
+# Fsync the JSON file on each save (HBNB_FSYNC: "always", "interval",
+# "never"), at most every HBNB_FSYNC_INTERVAL seconds for "interval"
+storage.fsync = getenv("HBNB_FSYNC", "always")
+storage.fsync_interval = float(getenv("HBNB_FSYNC_INTERVAL", "1.0"))
+
+# Write the file in another format (HBNB_FORMAT, e.g. "jsonl+gzip"); by
+# default the format the file was read in is kept
+storage.format = getenv("HBNB_FORMAT") or None
+
+# Decode the file with HBNB_RELOAD_WORKERS processes on reload
+storage.workers = int(getenv("HBNB_RELOAD_WORKERS", "1"))
 
 # Reload the storage to load any existing data
 storage.reload()
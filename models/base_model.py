@@ -6,6 +6,30 @@ from datetime import datetime
 from uuid import uuid4
 import models
 
+# format of created_at/updated_at in dictionaries and files (ISO 8601)
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# old value passed to storage.touch() for an attribute not set on an instance
+MISSING = object()
+
+
+def parse_datetime(text):
+    """
+    Return the datetime of a string in DATE_FORMAT.
+
+    datetime.fromisoformat parses this exact format and is much faster than
+    datetime.strptime, which is kept for strings it does not accept.
+    """
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return datetime.strptime(text, DATE_FORMAT)
+
+
+def format_datetime(value):
+    """Return the string of a datetime in DATE_FORMAT."""
+    return value.isoformat(timespec="microseconds")
+
 
 class BaseModel:
     """
@@ -19,12 +43,19 @@ class BaseModel:
         - created_at (datetime): the datetime when an instance is created
         - updated_at (datetime): the last datetime when an instance is updated
 
+    Private instance attributes:
+        - __cache (dict): str() and to_dict() of the instance as last
+        computed, by name; dropped whenever an attribute is set or deleted.
+        It is a slot, so it does not show in __dict__. An attribute value
+        changed in place (e.g. a list appended to) is not noticed.
+
     Public instance methods:
         - save(self): updates the public instance attribute updated_at with
         the current datetime
         - to_dict(self): returns a dictionary containing all keys/values of
         __dict__ of the instance
     """
+    __slots__ = ("__dict__", "__weakref__", "__cache")
 
     def __init__(self, *args, **kwargs):
         """Create a new instance of BaseModel and define its attributes."""
@@ -37,14 +68,53 @@ class BaseModel:
         else:
             if kwargs.get("__class__"):
                 del kwargs["__class__"]
-            self.__dict__.update(kwargs)
-            date_format = "%Y-%m-%dT%H:%M:%S.%f"
-            self.created_at = datetime.strptime(self.created_at, date_format)
-            self.updated_at = datetime.strptime(self.updated_at, date_format)
+            # not stored yet, so no need to go through __setattr__
+            attributes = self.__dict__
+            attributes.update(kwargs)
+            attributes["created_at"] = parse_datetime(self.created_at)
+            attributes["updated_at"] = parse_datetime(self.updated_at)
+
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        old = self._attribute(name)
+        super().__setattr__(name, value)
+        BaseModel.__cache.__set__(self, None)
+        models.storage.touch(self, name, old)
+
+    def __delattr__(self, name):
+        """Delete an attribute and flag the instance as changed in storage."""
+        old = self._attribute(name)
+        super().__delattr__(name)
+        BaseModel.__cache.__set__(self, None)
+        models.storage.touch(self, name, old)
+
+    def _attribute(self, name):
+        """Return the attribute name set on the instance, or MISSING."""
+        return self.__dict__.get(name, MISSING)
+
+    def _attributes(self):
+        """Return the attributes set on the instance."""
+        return self.__dict__
+
+    def _cached(self):
+        """Return the cache of the representations of the instance."""
+        try:
+            cache = self.__cache
+        except AttributeError:
+            cache = None
+        if cache is None:
+            cache = {}
+            BaseModel.__cache.__set__(self, cache)
+        return cache
 
     def __str__(self):
         """Return the string representation of a BaseModel instance."""
-        return f"[{type(self).__name__}] ({self.id}) {self.__dict__}"
+        cache = self._cached()
+        text = cache.get("str")
+        if text is None:
+            text = cache["str"] = \
+                f"[{type(self).__name__}] ({self.id}) {self._attributes()}"
+        return text
 
     def save(self):
         """Update the updated_at attribute with the current datetime."""
@@ -53,9 +123,11 @@ class BaseModel:
 
     def to_dict(self):
         """Create a dictionary representation of a BaseModel instance."""
-        instance_dict = self.__dict__.copy()
-        instance_dict["__class__"] = type(self).__name__
-        date_format = "%Y-%m-%dT%H:%M:%S.%f"
-        instance_dict["created_at"] = self.created_at.strftime(date_format)
-        instance_dict["updated_at"] = self.updated_at.strftime(date_format)
-        return instance_dict
+        cache = self._cached()
+        instance_dict = cache.get("dict")
+        if instance_dict is None:
+            instance_dict = cache["dict"] = dict(self._attributes())
+            instance_dict["__class__"] = type(self).__name__
+            instance_dict["created_at"] = format_datetime(self.created_at)
+            instance_dict["updated_at"] = format_datetime(self.updated_at)
+        return instance_dict.copy()
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""
+The `compact` module.
+
+Slotted variants of the model classes, used by FileStorage when it is asked
+for a compact in-memory representation of the objects it loads.
+"""
+from models.base_model import MISSING, parse_datetime
+
+_classes = {}
+
+
+class CompactModel:
+    """
+    Mixin keeping the declared attributes of a model in __slots__.
+
+    The id, the dates and the public class attributes of the model (e.g.
+    Place.number_rooms) are stored in slots; any other attribute (set with
+    the console's update command for instance) goes to the instance
+    __dict__, which is only allocated by then. Being subclasses of the
+    models, the variants keep the __dict__, __weakref__ and __cache slots of
+    BaseModel, three pointers per instance. A slot that was never set
+    reads as the model's class attribute, like a regular instance, and only
+    the attributes that were set appear in __str__ and to_dict().
+
+    Private class attributes (set by compact_class):
+        _fields (frozenset): names of the slotted attributes.
+        _slots (tuple): (name, slot descriptor) of the slotted attributes.
+        _defaults (dict): class attribute of the model by slot name.
+    """
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        """Create a new instance, from a dictionary when kwargs is given."""
+        object.__setattr__(self, "_overflow", False)
+        if not kwargs:
+            super().__init__(*args)
+            return
+
+        kwargs.pop("__class__", None)
+        fields = self._fields
+        for name, value in kwargs.items():
+            if name not in fields:
+                object.__setattr__(self, "_overflow", True)
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "created_at", parse_datetime(self.created_at))
+        object.__setattr__(self, "updated_at", parse_datetime(self.updated_at))
+
+    def __getattr__(self, name):
+        """Return the class attribute of the model for an unset slot."""
+        try:
+            return self._defaults[name]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            ) from None
+
+    def __setattr__(self, name, value):
+        """Set an attribute, in a slot or in the overflow __dict__."""
+        if name not in self._fields:
+            object.__setattr__(self, "_overflow", True)
+        super().__setattr__(name, value)
+
+    def _attribute(self, name):
+        """Return the attribute name set on the instance, or MISSING."""
+        if name in self._fields:
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                return MISSING
+        return self.__dict__.get(name, MISSING) if self._overflow else MISSING
+
+    def _attributes(self):
+        """Return the attributes set on the instance, like __dict__ would."""
+        attributes = {}
+        for name, slot in self._slots:
+            try:
+                attributes[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if self._overflow:
+            attributes.update(self.__dict__)
+        return attributes
+
+
+def compact_class(cls):
+    """
+    Return the compact variant of the model class cls.
+
+    The variant is a subclass of cls with the same name, module and
+    qualified name, so it is used (and serialized) like cls itself.
+    """
+    compact = _classes.get(cls)
+    if compact is not None:
+        return compact
+
+    fields = ["id", "created_at", "updated_at"]
+    defaults = {}
+    for klass in reversed(cls.__mro__[:-1]):
+        for name, value in vars(klass).items():
+            if name.startswith("_") or callable(value) or name in fields:
+                continue
+            fields.append(name)
+            defaults[name] = value
+
+    namespace = {"__slots__": tuple(fields) + ("_overflow",),
+                 "__module__": cls.__module__,
+                 "__qualname__": cls.__qualname__,
+                 "__doc__": cls.__doc__,
+                 "_fields": frozenset(fields),
+                 "_defaults": defaults}
+    compact = type(cls.__name__, (CompactModel, cls), namespace)
+    compact._slots = tuple((name, vars(compact)[name]) for name in fields)
+    _classes[cls] = compact
+    return compact
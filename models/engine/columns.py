@@ -0,0 +1,336 @@
+#!/usr/bin/python3
+"""
+The `columns` module.
+
+Columnar copy of some attributes of the objects of one class, kept by
+FileStorage so that filters, sorts and aggregates on these attributes run
+over contiguous buffers instead of the objects themselves. NumPy is used
+to vectorize them when it is installed.
+"""
+from array import array
+from math import isnan, nan
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnStore:
+    """
+    Stores attributes of the objects of a class in arrays, one row per key.
+
+    Numeric attributes are kept as float64 (an int or a float default on
+    the model class), any value that is not a number being stored as NaN.
+    Other attributes (e.g. city_id) are kept as integer codes, with the
+    table of the distinct values, so they can be matched and grouped on.
+    A table is compacted (the values no row holds any more dropped, the
+    codes renumbered) when it holds twice as many values as there are
+    rows, so that it does not grow with every value ever stored.
+
+    Public instance methods:
+        numeric(self, name): returns True if name is a numeric attribute.
+        add(self, key, obj): adds (or replaces) the row of obj.
+        remove(self, key): removes the row of key.
+        update(self, key, name, value): changes one value of a row.
+        select(self, **conditions): returns the keys matching conditions.
+        sort(self, name, keys=None, reverse=False): returns keys sorted.
+        aggregate(self, name, by=None, keys=None): returns statistics.
+    """
+
+    def __init__(self, cls, names):
+        """
+        Create the columns names of the model class cls.
+
+        Args:
+            cls (type): model class, giving the default of each attribute.
+            names (iterable): names of the attributes to store.
+        """
+        self.__keys = []
+        self.__rows = {}
+        self.__numbers = {}
+        self.__codes = {}
+        self.__values = {}
+
+        for name in names:
+            default = getattr(cls, name, None)
+            if isinstance(default, (int, float)):
+                self.__numbers[name] = array("d")
+            else:
+                self.__codes[name] = array("q")
+                self.__values[name] = {}
+
+    def __contains__(self, name):
+        """Returns True if name is one of the stored attributes."""
+        return name in self.__numbers or name in self.__codes
+
+    def __len__(self):
+        """Returns the number of rows."""
+        return len(self.__keys)
+
+    def numeric(self, name):
+        """Returns True if name is stored as a numeric attribute."""
+        return name in self.__numbers
+
+    def add(self, key, obj):
+        """
+        Adds the row of obj, or replaces it if key is already stored.
+
+        Args:
+            key (str): key of obj in the storage.
+            obj (object): object to read the attributes from.
+        """
+        if key in self.__rows:
+            for name in self.__numbers:
+                self.update(key, name, getattr(obj, name, None))
+            for name in self.__codes:
+                self.update(key, name, getattr(obj, name, None))
+            return
+
+        self.__rows[key] = len(self.__keys)
+        self.__keys.append(key)
+        for name, column in self.__numbers.items():
+            column.append(self.__number(getattr(obj, name, None)))
+        for name, column in self.__codes.items():
+            column.append(self.__code(name, getattr(obj, name, None)))
+
+    def remove(self, key):
+        """
+        Removes the row of key (the last row takes its place).
+
+        Args:
+            key (str): key of the removed object.
+        """
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+
+        last = self.__keys.pop()
+        for column in (*self.__numbers.values(), *self.__codes.values()):
+            value = column.pop()
+            if row < len(column):
+                column[row] = value
+        if last != key:
+            self.__keys[row] = last
+            self.__rows[last] = row
+
+    def update(self, key, name, value):
+        """
+        Changes the value of the attribute name in the row of key.
+
+        Args:
+            key (str): key of the modified object.
+            name (str): name of the modified attribute.
+            value (object): its new value.
+        """
+        row = self.__rows.get(key)
+        if row is None:
+            return
+        if name in self.__numbers:
+            self.__numbers[name][row] = self.__number(value)
+        elif name in self.__codes:
+            self.__codes[name][row] = self.__code(name, value)
+
+    def select(self, **conditions):
+        """
+        Returns the keys of the rows matching every condition.
+
+        Args:
+            conditions: for a numeric attribute, a (low, high) tuple of
+            inclusive bounds, None meaning unbounded; for any other
+            attribute, the value it must be equal to.
+        """
+        if not self.__keys:
+            return []
+
+        if numpy is not None:
+            mask = numpy.ones(len(self.__keys), dtype=bool)
+            for name, condition in conditions.items():
+                mask &= self.__mask(name, condition)
+            return [self.__keys[row] for row in numpy.flatnonzero(mask)]
+
+        rows = range(len(self.__keys))
+        for name, condition in conditions.items():
+            if name in self.__numbers:
+                column = self.__numbers[name]
+                low, high = condition
+                low = -float("inf") if low is None else low
+                high = float("inf") if high is None else high
+                rows = [row for row in rows if low <= column[row] <= high]
+            else:
+                column = self.__codes[name]
+                code = self.__values[name].get(condition)
+                rows = [row for row in rows if column[row] == code]
+        return [self.__keys[row] for row in rows]
+
+    def sort(self, name, keys=None, reverse=False):
+        """
+        Returns keys (default: all the keys) sorted on a numeric attribute.
+
+        Rows whose value is not a number come last.
+
+        Args:
+            name (str): name of a numeric attribute.
+            keys (list): keys to sort.
+            reverse (bool): sort in descending order.
+        """
+        column = self.__numbers[name]
+        if keys is None:
+            rows = range(len(self.__keys))
+        else:
+            rows = [self.__rows[key] for key in keys]
+
+        if numpy is not None and len(rows):
+            rows = numpy.asarray(rows, dtype=numpy.intp)
+            values = numpy.frombuffer(column, dtype=numpy.float64)[rows]
+            order = numpy.argsort(-values if reverse else values,
+                                  kind="stable")
+            return [self.__keys[row] for row in rows[order]]
+
+        sign = -1 if reverse else 1
+        rows = sorted(rows, key=lambda row: (isnan(column[row]),
+                                             sign * column[row]))
+        return [self.__keys[row] for row in rows]
+
+    def aggregate(self, name, by=None, keys=None):
+        """
+        Returns count, min, max and avg of a numeric attribute.
+
+        Values that are not numbers are left out.
+
+        Args:
+            name (str): name of a numeric attribute.
+            by (str): attribute to group the rows on (not numeric).
+            keys (list): keys of the rows to aggregate (default: all).
+
+        Returns:
+            dict: the statistics, or, with by, the statistics of each group
+            by value of the attribute by.
+        """
+        column = self.__numbers[name]
+        if keys is None:
+            rows = range(len(self.__keys))
+        else:
+            rows = [self.__rows[key] for key in keys]
+
+        if numpy is not None and len(rows):
+            numbers = numpy.frombuffer(column, dtype=numpy.float64)
+            codes = None if by is None else \
+                numpy.frombuffer(self.__codes[by], dtype=numpy.int64)
+            if keys is not None:
+                rows = numpy.asarray(rows, dtype=numpy.intp)
+                numbers = numbers[rows]
+                codes = None if codes is None else codes[rows]
+            if by is None:
+                numbers = numbers[~numpy.isnan(numbers)]
+                if not len(numbers):
+                    return self.__summary(0)
+                return self.__summary(len(numbers), numbers.min(),
+                                      numbers.max(), numbers.sum())
+            return self.__groups(by, numbers, codes)
+
+        if by is None:
+            return self.__statistics(column[row] for row in rows)
+
+        codes = self.__codes[by]
+        groups = {}
+        for row in rows:
+            groups.setdefault(codes[row], []).append(column[row])
+        values = {code: value for value, code in self.__values[by].items()}
+        return {values[code]: self.__statistics(group)
+                for code, group in groups.items() if code in values}
+
+    def __groups(self, by, numbers, codes):
+        """
+        Returns the statistics of numbers grouped by codes of the column
+        by, with numpy: the codes index the groups, which are counted and
+        summed by bincount and reduced to their min and max by fmin.at and
+        fmax.at, without sorting the rows.
+        """
+        held = codes >= 0
+        if not held.all():
+            numbers, codes = numbers[held], codes[held]
+        size = len(self.__values[by])
+        valid = ~numpy.isnan(numbers)
+        rows = numpy.bincount(codes, minlength=size)
+        counts = numpy.bincount(codes, weights=valid, minlength=size)
+        sums = numpy.bincount(codes, weights=numpy.where(valid, numbers, 0),
+                              minlength=size)
+        lows = numpy.full(size, numpy.nan)
+        numpy.fmin.at(lows, codes, numbers)
+        highs = numpy.full(size, numpy.nan)
+        numpy.fmax.at(highs, codes, numbers)
+
+        values = {code: value for value, code in self.__values[by].items()}
+        return {values[code]: self.__summary(int(counts[code]), lows[code],
+                                             highs[code], sums[code])
+                for code in numpy.flatnonzero(rows).tolist()}
+
+    def __mask(self, name, condition):
+        """Returns the numpy boolean mask of the rows matching condition."""
+        if name in self.__numbers:
+            column = numpy.frombuffer(self.__numbers[name],
+                                      dtype=numpy.float64)
+            low, high = condition
+            mask = ~numpy.isnan(column)
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+            return mask
+
+        column = numpy.frombuffer(self.__codes[name], dtype=numpy.int64)
+        return column == self.__values[name].get(condition, -1)
+
+    def __code(self, name, value):
+        """Returns the code of value in the column name."""
+        values = self.__values[name]
+        try:
+            code = values.get(value)
+        except TypeError:
+            return -1
+        if code is None:
+            # a few values over the rows are not worth compacting
+            if len(values) >= 2 * len(self.__keys) + 64:
+                self.__compact(name)
+            code = values[value] = len(values)
+        return code
+
+    def __compact(self, name):
+        """Drops the values no row holds from the table of the column."""
+        column = self.__codes[name]
+        values = self.__values[name]
+        held = set(column)
+        codes = {-1: -1}
+        kept = {}
+        for value, code in values.items():
+            if code in held:
+                codes[code] = kept[value] = len(kept)
+        values.clear()
+        values.update(kept)
+        for row, code in enumerate(column):
+            column[row] = codes[code]
+
+    @staticmethod
+    def __number(value):
+        """Returns value as a float, NaN if it is not a number."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        return nan
+
+    @staticmethod
+    def __statistics(values):
+        """Returns count, min, max and avg of values (NaN left out)."""
+        values = [value for value in values if not isnan(value)]
+        if not values:
+            return ColumnStore.__summary(0)
+        return ColumnStore.__summary(len(values), min(values), max(values),
+                                     sum(values))
+
+    @staticmethod
+    def __summary(count, low=None, high=None, total=None):
+        """Returns the statistics of count values (all None if none)."""
+        if not count:
+            return {"count": 0, "min": None, "max": None, "avg": None}
+        return {"count": count, "min": float(low), "max": float(high),
+                "avg": float(total) / count}
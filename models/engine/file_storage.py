@@ -1,13 +1,30 @@
 #!/usr/bin/python3
 """The `FileStorage` module."""
-import json
-from models.base_model import BaseModel
+import atexit
+import os
+import shutil
+import sys
+import threading
+import time
+from collections.abc import Hashable
+from contextlib import contextmanager
+from itertools import chain, islice
+from models.base_model import BaseModel, MISSING
 from models.user import User
 from models.amenity import Amenity
 from models.city import City
 from models.place import Place
 from models.state import State
 from models.review import Review
+from models.compact import compact_class
+from models.engine import parallel, query, serializers
+from models.engine.columns import ColumnStore
+from models.engine.json_stream import JSONStreamError
+from models.engine.serializers import FormatError
+from models.engine.spatial import GridIndex
+
+# key of the values that can't be dictionary keys in the hash indexes
+UNHASHABLE = object()
 
 
 class FileStorage:
@@ -17,23 +34,358 @@ class FileStorage:
     Private class attributes:
         __file_path (str): path to the JSON file.
         __objects (dict): empty but will store all objects by <class name>.id.
+        __dirty (set): keys of the objects changed since the last save.
+        __fragments (dict): serialized bytes of every persisted object by
+        key (None when the object has to be serialized again).
+        __encoding (str): name of the serializer of the cached fragments.
+        __file_format (str): format of the file, as last read or written.
+        __by_class (dict): objects by key, grouped by class name.
+        __by_value (dict): objects by key, grouped by value for every
+        (class name, attribute) declared in `indexes`.
+        __columns (dict): ColumnStore of every class declared in `columns`.
+        __grids (dict): GridIndex of every class declared in `spatial`.
+        __pending (dict): (offset, dictionary) of the records loaded but not
+        built yet (lazy reload), by key, grouped by class name.
+        __undo (list): operations to undo to roll back the open transaction
+        (None outside of a transaction).
+        __depth (int): number of nested transactions open.
+        __postponed (bool): True if save() was called in the transaction.
+        __writer (threading.Thread): background thread of write-behind mode.
+        __condition (threading.Condition): guards the write-behind state.
+        __queued (tuple): (path, entries, format, flush_interval) of the
+        latest save waiting for the writer (None if there is none).
+        __writing (bool): True while the writer is writing a file.
+        __hurry (bool): True when flush() waits for the writer.
+        __failure (Exception): last error of the writer, raised by flush().
+        __synced (float): time.monotonic() of the last fsync.
+        __unsynced (set): paths written without an fsync ("interval").
+        __deferred (threading.Timer): timer of the fsync of __unsynced.
+
+    Public class attributes:
+        classes (dict): model classes by name.
+        indexes (dict): attributes to index (hash index) by class name.
+        columns (dict): attributes to keep in a ColumnStore by class name.
+        spatial (dict): (latitude, longitude) attributes to keep in a
+        GridIndex by class name.
+        errors (list): (offset, message) of the records that could not be
+        loaded by the last reload.
+        lazy (bool): when True, reload() only keeps the records and each
+        object is built the first time it is accessed.
+        compact (bool): when True, loaded objects are built from the slotted
+        variant of their class (see models.compact).
+        write_behind (bool): when True, save() only takes a snapshot of the
+        objects and a background thread writes (and fsyncs) it.
+        flush_interval (float): maximum number of seconds a write-behind
+        save waits before it is written.
+        fsync (str): when the file is fsynced before it replaces the
+        previous one: "always", "interval" (at most once every
+        fsync_interval seconds, a file written in between being fsynced
+        at the end of the interval) or "never".
+        fsync_interval (float): seconds between two fsyncs ("interval").
+        workers (int): number of processes reload() decodes the file with
+        (1: in the calling process).
+        format (str): format save() writes the file in (see
+        models.engine.serializers), e.g. "jsonl+gzip"; None keeps the
+        format the file was read in ("json" for a new file).
 
     Public instance methods:
-        all(self): returns the dictionary __objects.
+        all(self, cls=None): returns the dictionary __objects, or only the
+        objects of class cls.
+        count(self, cls=None): returns the number of objects (of class cls).
+        get(self, cls, id): returns the object of class cls with this id.
+        column_store(self, cls): returns the ColumnStore of class cls.
+        within(self, cls, south, west, north, east): returns the objects of
+        class cls located in a bounding box.
+        nearby(self, cls, lat, lon, radius=None, k=None): returns the
+        objects of class cls around a point, with their distance.
+        model(self, cls_name): returns the class to build loaded objects of
+        class cls_name with.
+        find(self, cls, **attrs): returns the objects of class cls whose
+        attributes match attrs.
+        select(self, cls, *conditions, order_by=None, reverse=False,
+        limit=None, offset=0, fields=None): returns an iterator over the
+        objects of class cls matching conditions.
+        plan(self, cls, *conditions, order_by=None): returns how select()
+        fetches its candidates.
         new(self, obj): sets in __objects the obj with key <obj class name>.id.
+        bulk_new(self, objects): sets in __objects every obj of objects.
         save(self): serializes __objects to the JSON file (path: __file_path).
+        flush(self): waits until the write-behind saves are on disk.
         reload(self): deserializes the JSON file (if it exists) to __objects.
+        touch(self, obj, name=None, old=None): flags a stored object as
+        changed.
+        transaction(self): context manager coalescing the saves made in it
+        and rolling its changes back on an exception.
+        delete(self, obj=None): deletes obj from __objects.
     """
     __file_path = "file.json"
     __objects = {}
+    __dirty = set()
+    __fragments = {}
+    __encoding = "json"
+    __file_format = "json"
+    __by_class = {}
+    __by_value = {}
+    __columns = {}
+    __grids = {}
+    __pending = {}
+    __undo = None
+    __depth = 0
+    __postponed = False
+    __writer = None
+    __condition = threading.Condition()
+    __queued = None
+    __writing = False
+    __hurry = False
+    __failure = None
+    __synced = 0.0
+    __unsynced = set()
+    __deferred = None
     classes = {"BaseModel": BaseModel, "User": User,
                "City": City, "Review": Review,
                "Amenity": Amenity, "Place": Place,
                "State": State}
+    indexes = {"City": ("state_id",),
+               "Place": ("city_id", "user_id"),
+               "Review": ("place_id", "user_id")}
+    columns = {"Place": ("number_rooms", "number_bathrooms", "max_guest",
+                         "price_by_night", "latitude", "longitude",
+                         "city_id")}
+    spatial = {"Place": ("latitude", "longitude")}
+    errors = []
+    lazy = False
+    compact = False
+    write_behind = False
+    flush_interval = 0.5
+    fsync = "always"
+    fsync_interval = 1.0
+    format = None
+    workers = 1
+
+    def all(self, cls=None):
+        """
+        Returns the dictionary __objects.
+
+        Args:
+            cls (type or str): when given, only the objects of this class are
+            returned (in a new dictionary).
+        """
+        if cls is None:
+            for cls_name in list(FileStorage.__pending):
+                self._materialize(cls_name)
+            return FileStorage.__objects
+
+        cls_name = self._class_name(cls)
+        self._materialize(cls_name)
+        return dict(FileStorage.__by_class.get(cls_name, {}))
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects.
+
+        Args:
+            cls (type or str): when given, only the objects of this class are
+            counted.
+        """
+        pending = FileStorage.__pending
+        if cls is None:
+            return len(FileStorage.__objects) + sum(map(len, pending.values()))
+
+        cls_name = self._class_name(cls)
+        return len(FileStorage.__by_class.get(cls_name, ())) + \
+            len(pending.get(cls_name, ()))
+
+    def get(self, cls, id):
+        """
+        Returns the object of class cls with this id, or None.
+
+        Args:
+            cls (type or str): class of the object.
+            id (str): id of the object.
+        """
+        cls_name = self._class_name(cls)
+        key = f"{cls_name}.{id}"
+        obj = FileStorage.__objects.get(key)
+
+        if obj is None and key in FileStorage.__pending.get(cls_name, {}):
+            obj = self._materialize(cls_name, [key]).get(key)
+        return obj
+
+    def find(self, cls, **attrs):
+        """
+        Returns the list of objects of class cls matching every attribute.
+
+        An attribute declared in `indexes` is used to fetch the candidates,
+        otherwise all the objects of the class are scanned. Records not
+        built yet are matched on their dictionary and only the matching
+        ones are built.
+
+        Args:
+            cls (type or str): class of the objects to find.
+            attrs: attribute names and the values they must be equal to.
+        """
+        cls_name = self._class_name(cls)
+        pending = FileStorage.__pending.get(cls_name)
+        if pending:
+            defaults = FileStorage.classes[cls_name]
+            self._materialize(cls_name, [
+                key for key, (_, data) in pending.items()
+                if all(data.get(name, getattr(defaults, name, None)) == value
+                       for name, value in attrs.items())])
+        candidates = FileStorage.__by_class.get(cls_name, {})
+
+        for name in self.indexes.get(cls_name, ()):
+            if name in attrs:
+                index = FileStorage.__by_value.get((cls_name, name), {})
+                candidates = index.get(self._value_key(attrs[name]), {})
+                break
+
+        return [obj for obj in candidates.values()
+                if all(getattr(obj, name, None) == value
+                       for name, value in attrs.items())]
+
+    def select(self, cls, *conditions, order_by=None, reverse=False,
+               limit=None, offset=0, fields=None):
+        """
+        Returns an iterator over the objects of class cls matching every
+        condition.
+
+        The candidates are fetched as plan() tells, then every condition is
+        checked on each of them. Without order_by, the objects are yielded
+        as they are found, records not built yet (lazy reload) being built
+        one at a time.
+
+        Args:
+            cls (type or str): class of the objects.
+            conditions: Condition of models.engine.query, or (name,
+            operator, value) tuples, e.g. ("price_by_night", "<", 100).
+            order_by (str): attribute to sort the objects on; objects
+            without it come last.
+            reverse (bool): sort in descending order.
+            limit (int): maximum number of objects.
+            offset (int): number of objects skipped first.
+            fields (list): when given, dictionaries of these attributes are
+            yielded instead of the objects.
+
+        Raises:
+            ValueError: a condition has an unknown operator.
+        """
+        cls_name = self._class_name(cls)
+        conditions = [query.Condition(*condition) for condition in conditions]
+        plan = self.plan(cls_name, *conditions, order_by=order_by)
+        objects = self.__candidates(cls_name, plan, conditions)
+
+        if order_by is not None:
+            store = self._columns(cls_name)
+            if store is not None and store.numeric(order_by):
+                found = {f"{cls_name}.{obj.id}": obj for obj in objects}
+                objects = [found[key] for key in
+                           store.sort(order_by, list(found), reverse)]
+            else:
+                objects = query.order(objects, order_by, reverse)
 
-    def all(self):
-        """Returns the dictionary __objects."""
-        return FileStorage.__objects
+        stop = None if limit is None else offset + limit
+        objects = islice(objects, offset, stop)
+        if fields is not None:
+            return (query.project(obj, fields) for obj in objects)
+        return objects
+
+    def plan(self, cls, *conditions, order_by=None):
+        """
+        Returns how select() fetches the candidates for conditions.
+
+        Returns:
+            tuple: ("index", (name,)) to look up an equality condition on
+            an attribute declared in `indexes`; else ("columns", names) to
+            select the rows of the ColumnStore of the class on the
+            conditions on its columns (names), when there are some or when
+            the objects are sorted on a numeric column; else ("scan", ())
+            to go through every object of the class.
+        """
+        cls_name = self._class_name(cls)
+        conditions = [query.Condition(*condition) for condition in conditions]
+        for name in self.indexes.get(cls_name, ()):
+            if any(c.name == name and c.op == "=" and
+                   isinstance(c.value, Hashable) for c in conditions):
+                return ("index", (name,))
+
+        store = self._columns(cls_name)
+        if store is None:
+            return ("scan", ())
+        names = tuple(dict.fromkeys(c.name for c in conditions
+                                    if self.__pushable(store, c)))
+        if names or store.numeric(order_by or ""):
+            return ("columns", names)
+        return ("scan", ())
+
+    def column_store(self, cls):
+        """
+        Returns the ColumnStore kept for class cls (None if there is none).
+
+        Every object of the class is built first (lazy reload), so that the
+        store has a row for each of them.
+
+        Args:
+            cls (type or str): class declared in `columns`.
+        """
+        cls_name = self._class_name(cls)
+        self._materialize(cls_name)
+        return self._columns(cls_name)
+
+    def within(self, cls, south, west, north, east):
+        """
+        Returns the objects of class cls located in a bounding box.
+
+        Args:
+            cls (type or str): class declared in `spatial`.
+            south, west, north, east (float): bounds of the box, in degrees
+            (west > east for a box crossing the antimeridian).
+        """
+        cls_name = self._class_name(cls)
+        self._materialize(cls_name)
+        objects = FileStorage.__objects
+        keys = self._spatial(cls_name).bbox(south, west, north, east)
+        return [objects[key] for key in keys]
+
+    def nearby(self, cls, lat, lon, radius=None, k=None):
+        """
+        Returns (distance in km, object) of the objects around a point.
+
+        The list is sorted by distance and holds the objects within radius
+        km of the point, or its k nearest objects, or the k nearest within
+        radius km when both are given.
+
+        Args:
+            cls (type or str): class declared in `spatial`.
+            lat, lon (float): the point, in degrees.
+            radius (float): maximum distance, in km.
+            k (int): maximum number of objects.
+        """
+        if radius is None and k is None:
+            raise ValueError("nearby() needs a radius or k")
+
+        cls_name = self._class_name(cls)
+        self._materialize(cls_name)
+        grid = self._spatial(cls_name)
+        if k is None:
+            found = grid.radius(lat, lon, radius)
+        else:
+            found = grid.nearest(lat, lon, k)
+            if radius is not None:
+                found = [(d, key) for d, key in found if d <= radius]
+
+        objects = FileStorage.__objects
+        return [(d, objects[key]) for d, key in found]
+
+    def model(self, cls_name):
+        """
+        Returns the class used to build loaded objects of class cls_name.
+
+        Args:
+            cls_name (str): name of a class in `classes`.
+        """
+        cls = FileStorage.classes[cls_name]
+        return compact_class(cls) if self.compact else cls
 
     def new(self, obj):
         """
@@ -42,28 +394,752 @@ class FileStorage:
         Args:
             obj (object): object to store.
         """
-        key = f"{obj.__class__.__name__}.{obj.id}"
+        cls_name = obj.__class__.__name__
+        key = f"{cls_name}.{obj.id}"
+        old = FileStorage.__objects.get(key)
+        if old is not None:
+            self._unindex(key, old)
+        if FileStorage.__undo is not None:
+            FileStorage.__undo.append(("new", key, old))
+        FileStorage.__pending.get(cls_name, {}).pop(key, None)
         FileStorage.__objects[key] = obj
+        self._index(key, obj)
+        FileStorage.__dirty.add(key)
+
+    def bulk_new(self, objects):
+        """
+        Sets in __objects every obj of objects, without saving.
+
+        objects is consumed lazily, so a generator reading a large file
+        never needs to hold more than one record at a time; the caller
+        persists everything with a single save() at the end.
+
+        Args:
+            objects (iterable): objects to store.
+
+        Returns:
+            int: the number of objects stored.
+        """
+        count = 0
+        for obj in objects:
+            self.new(obj)
+            count += 1
+        return count
+
+    def delete(self, obj=None):
+        """
+        Deletes obj from __objects if it's inside, otherwise do nothing.
+
+        Args:
+            obj (object): object to delete.
+        """
+        if obj is None:
+            return
+
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if FileStorage.__objects.get(key) is obj:
+            del FileStorage.__objects[key]
+            self._unindex(key, obj)
+            FileStorage.__dirty.add(key)
+            if FileStorage.__undo is not None:
+                FileStorage.__undo.append(("delete", key, obj))
+
+    def touch(self, obj, name=None, old=None):
+        """
+        Flags obj as changed so the next save serializes it again.
+
+        Args:
+            obj (object): object that was modified.
+            name (str): name of the modified attribute.
+            old (object): value of the attribute before the modification
+            (MISSING if it was not set on obj).
+        """
+        cls_name = obj.__class__.__name__
+        key = f"{cls_name}.{getattr(obj, 'id', None)}"
+        if FileStorage.__objects.get(key) is not obj:
+            return
+
+        FileStorage.__dirty.add(key)
+        if FileStorage.__undo is not None and name is not None:
+            FileStorage.__undo.append(("set", key, obj, name, old))
+        if old is MISSING:
+            old = getattr(FileStorage.classes.get(cls_name), name, None)
+        store = self._columns(cls_name)
+        if store is not None and name in store:
+            store.update(key, name, getattr(obj, name, None))
+        if name in self.spatial.get(cls_name, ()):
+            self._locate(cls_name, key, obj)
+        index = FileStorage.__by_value.get((cls_name, name))
+        if index is not None:
+            old = self._value_key(old)
+            bucket = index.get(old)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del index[old]
+            index.setdefault(self._value_key(getattr(obj, name, None)),
+                             {})[key] = obj
 
     def save(self):
-        """Serializes __objects to the JSON file."""
-        objects = {key: obj.to_dict() for key, obj in self.__objects.items()}
+        """
+        Serializes __objects to the JSON file.
+
+        Only the objects changed since the last save are serialized again,
+        the others reuse their cached fragment. The file is written in
+        `format`, or in the format it was read in; in the default "json"
+        format the layout is the same as json.dump(objects, f, indent=4).
+
+        In write-behind mode, only the changed objects are serialized here;
+        the file is written by a background thread at most flush_interval
+        seconds later, a newer save replacing an older one not written yet.
+        """
+        if self._postpone_save():
+            return
+        self._changes()
+        fmt = self._format()
+        entries = [fragment for _, fragment in self._fragments(fmt)]
+
+        FileStorage.__file_format = fmt
+        if self.write_behind:
+            self._enqueue(self.__file_path, entries, fmt)
+        else:
+            self._write(self.__file_path, entries, fmt)
+
+    def _format(self):
+        """Returns the format to save in: `format` or the file's one."""
+        return self.format or FileStorage.__file_format
+
+    def _fragments(self, fmt, cls_name=None):
+        """
+        Returns the (key, fragment) of the objects and pending records.
+
+        The ones without a cached fragment are serialized; the cache is
+        dropped when the serializer of fmt is not the one it was made with.
 
-        with open(self.__file_path, "w", encoding="utf-8") as f:
-            json.dump(objects, f, indent=4)
+        Args:
+            fmt (str): format the fragments are written in.
+            cls_name (str): only return the ones of this class.
+        """
+        serializer, _ = serializers.parse_format(fmt)
+        fragments = FileStorage.__fragments
+        if serializer.name != FileStorage.__encoding:
+            fragments.update(dict.fromkeys(fragments))
+            FileStorage.__encoding = serializer.name
+        if cls_name is None:
+            objects = FileStorage.__objects
+            groups = FileStorage.__pending.values()
+        else:
+            objects = FileStorage.__by_class.get(cls_name, {})
+            groups = [FileStorage.__pending.get(cls_name, {})]
+        pending = [(key, data) for group in groups
+                   for key, (_, data) in group.items()]
+        entries = []
+
+        for key, record in chain(objects.items(), pending):
+            fragment = fragments[key]
+            if fragment is None:
+                if not isinstance(record, dict):
+                    record = record.to_dict()
+                fragment = fragments[key] = serializer.encode(key, record)
+            entries.append((key, fragment))
+        return entries
+
+    def flush(self):
+        """
+        Waits until every write-behind save is written to disk.
+
+        Raises the error of the last write that failed, if any.
+        """
+        condition = FileStorage.__condition
+        with condition:
+            if FileStorage.__queued is not None or FileStorage.__writing:
+                FileStorage.__hurry = True
+                condition.notify_all()
+                condition.wait_for(lambda: FileStorage.__queued is None and
+                                   not FileStorage.__writing)
+                FileStorage.__hurry = False
+            failure, FileStorage.__failure = FileStorage.__failure, None
+        if failure is not None:
+            raise failure
 
     def reload(self):
         """
         Deserializes the JSON file to __objects (only if the JSON
         file exists), otherwise do nothing.
+
+        The format of the file is detected (see models.engine.serializers)
+        and the file is streamed one record at a time. Invalid records are
+        skipped and reported (with their offset in the file) on stderr and
+        in `errors`. A file that is not valid JSON (e.g. truncated) is
+        reported the same way and, if the previous snapshot kept by save()
+        (<file>.bak) exists, it is loaded instead; otherwise the records
+        read before the error are kept.
+
+        In lazy mode the records are only kept (by class) and each object
+        is built on its first access through all(), get() or find().
+        """
+        self.flush()
+        FileStorage.errors = []
+        decoded = self._decode([self.__file_path])
+        self._recover(self.__file_path, decoded.get(self.__file_path))
+        self._changes()
+
+    def _decode(self, paths):
+        """
+        Decodes files with `workers` processes (see models.engine.parallel).
+
+        Returns:
+            dict: the decoded files by path, empty when reload is serial.
+        """
+        if self.workers <= 1 or not parallel.available():
+            return {}
+        classes = None if self.lazy or self.compact else self.classes
+        return parallel.read(paths, self.workers, classes)
+
+    def _recover(self, path, decoded=None):
+        """
+        Loads the file path, or its last good snapshot if it is corrupted.
+
+        Args:
+            path (str): path of the file.
+            decoded (tuple): path as decoded by _decode(), if it was.
+
+        Returns:
+            str: the format of path if it was read to the end, otherwise
+            (no file, or the snapshot was loaded) None.
+        """
+        backup = path + ".bak"
+        loaded = self._load(path, decoded)
+        if loaded is None:
+            return FileStorage.__file_format
+        if os.path.isfile(backup):
+            for key in loaded:
+                self._forget(key)
+            self._report(0, f"loading the last good snapshot {backup}")
+            self._load(backup)
+        return None
+
+    def _load(self, path, decoded=None):
+        """
+        Loads the records of the file path, whatever its format.
+
+        Args:
+            path (str): path of the file.
+            decoded (tuple): (format, records, failure) of path decoded by
+            worker processes; the file is streamed when None.
+
+        Returns:
+            list: None if the file was read to the end, otherwise (syntax
+            error or no file) the keys of the records loaded from it.
+        """
+        loaded = []
+        try:
+            if decoded is not None:
+                FileStorage.__file_format, records, failure = decoded
+                for offset, key, value, obj in records:
+                    self.__add(path, offset, key, value, loaded, obj)
+                if failure is not None:
+                    raise FormatError(failure[1], failure[0])
+                return None
+            with open(path, "rb") as f:
+                FileStorage.__file_format, records = serializers.load(f)
+                for offset, key, value in records:
+                    self.__add(path, offset, key, value, loaded)
+        except FileNotFoundError:
+            return loaded
+        except (JSONStreamError, FormatError) as e:
+            self._report(e.offset, e.msg, path)
+            return loaded
+        return None
+
+    def __add(self, path, offset, key, value, loaded, obj=None):
+        """
+        Stores an object read from the file path and appends its key to
+        loaded; obj is built from the record value when None (or value is
+        kept as is, in lazy mode).
+        """
+        if obj is None:
+            try:
+                cls_name = value["__class__"]
+                cls = self.model(cls_name)
+                key = f"{cls_name}.{value['id']}"
+                if self.lazy and key not in FileStorage.__objects:
+                    self._defer(offset, cls_name, key, value)
+                    loaded.append(key)
+                    return
+                obj = cls(**value)
+            except Exception as e:
+                self._report(offset, f"invalid record {key!r} ({e!r})", path)
+                return
+        self.new(obj)
+        loaded.append(key)
+
+    def _forget(self, key):
+        """Drops the object (or pending record) of key from memory."""
+        cls_name = key.split(".")[0]
+        obj = FileStorage.__objects.pop(key, None)
+        if obj is not None:
+            self._unindex(key, obj)
+        FileStorage.__pending.get(cls_name, {}).pop(key, None)
+        FileStorage.__fragments.pop(key, None)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Opens a scope in which saves are coalesced into a single one.
+
+        save() calls made in the scope are postponed to the exit of the
+        outermost scope, which saves once if any was made. If an exception
+        leaves a scope, the objects created, deleted or modified (attribute
+        assignments) in it are restored and the exception is raised again;
+        nothing was written, so the file is left as it was. Changes made to
+        the dictionary returned by all() directly are not rolled back.
+
+        Scopes can be nested, an inner one only rolling back its changes.
         """
+        if FileStorage.__undo is None:
+            FileStorage.__undo = []
+        mark = len(FileStorage.__undo)
+        FileStorage.__depth += 1
+        postponed = False
+
         try:
-            with open(FileStorage.__file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-                for value in data.values():
-                    cls_name = value["__class__"]
-                    obj = FileStorage.classes[cls_name](**value)
-                    self.new(obj)
-        except Exception:
+            yield self
+        except BaseException:
+            self._rollback(mark)
+            raise
+        finally:
+            FileStorage.__depth -= 1
+            if not FileStorage.__depth:
+                FileStorage.__undo = None
+                postponed = FileStorage.__postponed
+                FileStorage.__postponed = False
+
+        if postponed:
+            self.save()
+
+    def _postpone_save(self):
+        """Returns True (and remembers the call) if save() is postponed."""
+        if FileStorage.__depth:
+            FileStorage.__postponed = True
+            return True
+        return False
+
+    def _rollback(self, mark):
+        """Undoes the operations of the transaction logged after mark."""
+        undo = FileStorage.__undo
+        FileStorage.__undo = None
+        objects = FileStorage.__objects
+
+        try:
+            while len(undo) > mark:
+                operation, key, *args = undo.pop()
+                if operation == "new":
+                    current = objects.get(key)
+                    if current is not None:
+                        self.delete(current)
+                    if args[0] is not None:
+                        self.new(args[0])
+                elif operation == "delete":
+                    self.new(args[0])
+                else:
+                    obj, name, old = args
+                    if old is not MISSING:
+                        setattr(obj, name, old)
+                        continue
+                    self._unindex(key, obj)
+                    try:
+                        delattr(obj, name)
+                    except AttributeError:
+                        pass
+                    self._index(key, obj)
+        finally:
+            FileStorage.__undo = undo
+
+    def _write(self, path, entries, fmt="json"):
+        """
+        Writes the fragments of the objects to the file path, in format fmt.
+
+        The file is written to <path>.tmp, fsynced as the `fsync` policy
+        says, then renamed over path, so that path always holds a complete
+        snapshot. The replaced snapshot is kept as <path>.bak, a hard link
+        (or a copy where links are not supported) made before the rename,
+        so that path exists at every moment.
+
+        Args:
+            path (str): path of the file.
+            entries (list): fragments of the objects, in order, as encoded
+            by the serializer of fmt.
+            fmt (str): format of the file.
+        """
+        data = serializers.dump(fmt, entries)
+        temp = path + ".tmp"
+        sync = self._fsync_due(path)
+        with open(temp, "wb") as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        if os.path.isfile(path):
+            backup = path + ".bak"
+            if os.path.lexists(backup):
+                os.remove(backup)
+            try:
+                os.link(path, backup)
+            except OSError:
+                shutil.copyfile(path, backup)
+        os.replace(temp, path)
+        if sync:
+            self._fsync_directory(path)
+
+    def _fsync_due(self, path):
+        """
+        Returns True if the file being written to path has to be fsynced.
+
+        With the "interval" policy, a file that is not fsynced now is
+        fsynced by a timer at the end of the interval.
+        """
+        if self.fsync == "never":
+            return False
+        if self.fsync == "interval":
+            with FileStorage.__condition:
+                wait = FileStorage.__synced + self.fsync_interval - \
+                    time.monotonic()
+                if wait > 0:
+                    FileStorage.__unsynced.add(path)
+                    if FileStorage.__deferred is None:
+                        FileStorage.__deferred = threading.Timer(
+                            wait, self.__fsync_unsynced)
+                        FileStorage.__deferred.daemon = True
+                        FileStorage.__deferred.start()
+                    return False
+                FileStorage.__synced = time.monotonic()
+        return True
+
+    def __fsync_unsynced(self):
+        """Fsyncs the files written since the last fsync (timer)."""
+        with FileStorage.__condition:
+            paths = FileStorage.__unsynced
+            FileStorage.__unsynced = set()
+            FileStorage.__deferred = None
+            FileStorage.__synced = time.monotonic()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+            self._fsync_directory(path)
+
+    @staticmethod
+    def _fsync_directory(path):
+        """Fsyncs the directory of path, so that its renames are durable."""
+        try:
+            fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
             pass
+        finally:
+            os.close(fd)
+
+    def _enqueue(self, path, entries, fmt):
+        """Hands a save over to the writer thread, starting it if needed."""
+        with FileStorage.__condition:
+            FileStorage.__queued = (path, entries, fmt, self.flush_interval)
+            if FileStorage.__writer is None:
+                FileStorage.__writer = threading.Thread(
+                    target=self.__write_behind, name="FileStorage writer",
+                    daemon=True)
+                FileStorage.__writer.start()
+                atexit.register(self.flush)
+            FileStorage.__condition.notify_all()
+
+    def __write_behind(self):
+        """Writer thread: writes the queued saves, latest first."""
+        condition = FileStorage.__condition
+        with condition:
+            while True:
+                condition.wait_for(lambda: FileStorage.__queued is not None)
+                # let the saves of the next flush_interval seconds coalesce
+                condition.wait_for(lambda: FileStorage.__hurry,
+                                   timeout=FileStorage.__queued[3])
+                path, entries, fmt, _ = FileStorage.__queued
+                FileStorage.__queued = None
+                FileStorage.__writing = True
+                condition.release()
+                try:
+                    self._write(path, entries, fmt)
+                except Exception as e:
+                    FileStorage.__failure = e
+                    print(f"** {path}: write failed ({e!r}) **",
+                          file=sys.stderr)
+                finally:
+                    condition.acquire()
+                    FileStorage.__writing = False
+                    condition.notify_all()
+
+    def _changes(self):
+        """
+        Returns the keys changed and removed since the last call.
+
+        The changed objects lose their cached fragment. Objects added to or
+        removed from __objects directly (bypassing new() and delete()) are
+        detected by comparing the number of stored and persisted keys, and
+        the class index is brought back in sync with them.
+
+        Returns:
+            tuple: (list of changed keys, list of removed keys)
+        """
+        objects = FileStorage.__objects
+        fragments = FileStorage.__fragments
+        changed, removed = [], []
+
+        for key in FileStorage.__dirty:
+            if key in objects:
+                fragments[key] = None
+                changed.append(key)
+                continue
+            # removed, possibly from __objects directly: leave the indexes
+            obj = FileStorage.__by_class.get(key.split(".")[0], {}).get(key)
+            if obj is not None:
+                self._unindex(key, obj)
+            if key in fragments:
+                del fragments[key]
+                removed.append(key)
+        FileStorage.__dirty.clear()
+
+        pending = FileStorage.__pending
+        if len(fragments) != len(objects) + sum(map(len, pending.values())):
+            for key in [key for key in fragments if key not in objects and
+                        key not in pending.get(key.split(".")[0], ())]:
+                del fragments[key]
+                cls_name = key.split(".")[0]
+                obj = FileStorage.__by_class.get(cls_name, {}).get(key)
+                if obj is not None:
+                    self._unindex(key, obj)
+                removed.append(key)
+            for key, obj in objects.items():
+                if key not in fragments:
+                    fragments[key] = None
+                    self._index(key, obj)
+                    changed.append(key)
+
+        return changed, removed
+
+    def _unsaved(self, changed, removed):
+        """
+        Marks the keys returned by _changes() as changed again, when
+        writing them failed, so that the next save retries them.
+        """
+        fragments = FileStorage.__fragments
+        for key in removed:
+            fragments.setdefault(key, None)
+        FileStorage.__dirty.update(changed)
+        FileStorage.__dirty.update(removed)
+
+    def _defer(self, offset, cls_name, key, data):
+        """Keeps a record to be built on its first access (lazy reload)."""
+        stale = FileStorage.__by_class.get(cls_name, {}).get(key)
+        if stale is not None:
+            self._unindex(key, stale)
+        FileStorage.__pending.setdefault(cls_name, {})[key] = (offset, data)
+        FileStorage.__fragments[key] = None
+
+    def _materialize(self, cls_name, keys=None):
+        """
+        Builds the pending records of class cls_name.
+
+        Args:
+            cls_name (str): class name of the records.
+            keys (list): keys of the records to build (default: all).
+
+        Returns:
+            dict: the objects built, by key.
+        """
+        pending = FileStorage.__pending.get(cls_name)
+        built = {}
+        if not pending:
+            return built
+
+        cls = self.model(cls_name)
+        for key in list(pending) if keys is None else keys:
+            offset, data = pending.pop(key)
+            try:
+                obj = cls(**data)
+            except Exception as e:
+                del FileStorage.__fragments[key]
+                self._report(offset, f"invalid record {key!r} ({e!r})")
+                continue
+            FileStorage.__objects[key] = obj
+            self._index(key, obj)
+            built[key] = obj
+
+        if not pending:
+            del FileStorage.__pending[cls_name]
+        return built
+
+    def _columns(self, cls_name):
+        """Returns the ColumnStore of cls_name (None if there is none)."""
+        store = FileStorage.__columns.get(cls_name)
+        if store is None and cls_name in self.columns:
+            store = FileStorage.__columns[cls_name] = ColumnStore(
+                FileStorage.classes[cls_name], self.columns[cls_name])
+        return store
+
+    def _grid(self, cls_name):
+        """Returns the GridIndex of cls_name (None if there is none)."""
+        grid = FileStorage.__grids.get(cls_name)
+        if grid is None and cls_name in self.spatial:
+            grid = FileStorage.__grids[cls_name] = GridIndex()
+        return grid
+
+    def _spatial(self, cls_name):
+        """Returns the GridIndex of cls_name, raises ValueError if none."""
+        grid = self._grid(cls_name)
+        if grid is None:
+            raise ValueError(f"{cls_name} has no spatial index")
+        return grid
+
+    def _locate(self, cls_name, key, obj):
+        """Adds obj to the GridIndex of its class, if it has coordinates."""
+        grid = self._grid(cls_name)
+        lat, lon = (getattr(obj, name, None)
+                    for name in self.spatial[cls_name])
+        if all(isinstance(value, (int, float)) and
+               not isinstance(value, bool) for value in (lat, lon)) and \
+                -90 <= lat <= 90:
+            grid.add(key, lat, lon)
+        else:
+            grid.remove(key)
+
+    def _index(self, key, obj):
+        """Adds obj to the class and attribute indexes."""
+        cls_name = obj.__class__.__name__
+        FileStorage.__by_class.setdefault(cls_name, {})[key] = obj
+        store = self._columns(cls_name)
+        if store is not None:
+            store.add(key, obj)
+        if cls_name in self.spatial:
+            self._locate(cls_name, key, obj)
+
+        for name in self.indexes.get(cls_name, ()):
+            index = FileStorage.__by_value.setdefault((cls_name, name), {})
+            value = self._value_key(getattr(obj, name, None))
+            index.setdefault(value, {})[key] = obj
+
+    def _unindex(self, key, obj):
+        """Removes obj from the class and attribute indexes."""
+        cls_name = obj.__class__.__name__
+        FileStorage.__by_class.get(cls_name, {}).pop(key, None)
+        store = self._columns(cls_name)
+        if store is not None:
+            store.remove(key)
+        grid = self._grid(cls_name)
+        if grid is not None:
+            grid.remove(key)
+
+        for name in self.indexes.get(cls_name, ()):
+            index = FileStorage.__by_value.get((cls_name, name), {})
+            value = self._value_key(getattr(obj, name, None))
+            bucket = index.get(value, {})
+            bucket.pop(key, None)
+            if not bucket:
+                index.pop(value, None)
+
+    def _report(self, offset, message, path=None):
+        """Records and prints an error found while loading the file path."""
+        FileStorage.errors.append((offset, message))
+        print(f"** {path or self.__file_path}: offset {offset}: {message} **",
+              file=sys.stderr)
+
+    def __candidates(self, cls_name, plan, conditions):
+        """Yields the objects of cls_name matching conditions, as planned."""
+        kind, names = plan
+        objects = FileStorage.__objects
+        if kind == "columns":
+            self._materialize(cls_name)
+            store = self._columns(cls_name)
+            selected = {}
+            for c in conditions:
+                if c.name not in names or not self.__pushable(store, c):
+                    continue
+                if not store.numeric(c.name):
+                    selected.setdefault(c.name, c.value)
+                    continue
+                low, high = selected.get(c.name, (None, None))
+                if c.op in ("=", ">", ">=") and \
+                        (low is None or c.value > low):
+                    low = c.value
+                if c.op in ("=", "<", "<=") and \
+                        (high is None or c.value < high):
+                    high = c.value
+                selected[c.name] = (low, high)
+            candidates = [objects[key] for key in store.select(**selected)
+                          if key in objects]
+        elif kind == "index":
+            for _ in self.__build(cls_name, conditions):
+                pass
+            value = next(c.value for c in conditions
+                         if c.name == names[0] and c.op == "=" and
+                         isinstance(c.value, Hashable))
+            index = FileStorage.__by_value.get((cls_name, names[0]), {})
+            candidates = list(index.get(self._value_key(value), {}).values())
+        else:
+            candidates = chain(
+                list(FileStorage.__by_class.get(cls_name, {}).values()),
+                self.__build(cls_name, conditions))
+
+        return (obj for obj in candidates
+                if all(c.matches(obj) for c in conditions))
+
+    def __build(self, cls_name, conditions):
+        """Builds and yields the pending records matching conditions."""
+        pending = FileStorage.__pending.get(cls_name)
+        if not pending:
+            return
+        defaults = FileStorage.classes[cls_name]
+        for key, (_, data) in list(pending.items()):
+            if key in pending and all(
+                    c.accepts(data.get(c.name, getattr(defaults, c.name,
+                                                       None)))
+                    for c in conditions):
+                yield from self._materialize(cls_name, [key]).values()
+
+    @staticmethod
+    def __pushable(store, condition):
+        """Returns True if the ColumnStore store can select condition."""
+        name, op, value = condition
+        if name not in store:
+            return False
+        if store.numeric(name):
+            return op in ("=", "<", "<=", ">", ">=") and \
+                isinstance(value, (int, float)) and \
+                not isinstance(value, bool) and value == value
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return op == "="
+
+    @staticmethod
+    def _value_key(value):
+        """Returns value, or UNHASHABLE if it can't key the hash indexes."""
+        try:
+            hash(value)
+        except TypeError:
+            return UNHASHABLE
+        return value
+
+    @staticmethod
+    def _class_name(cls):
+        """Returns the name of cls, which is either a class or a name."""
+        return cls if isinstance(cls, str) else cls.__name__
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""The `JournalStorage` module."""
+import json
+import os
+from models.engine.file_storage import FileStorage
+
+
+class JournalStorage(FileStorage):
+    """
+    FileStorage variant that appends changes to a write-ahead journal.
+
+    The JSON file written by FileStorage is used as a snapshot; every save
+    only appends the records that changed (or were deleted) since the last
+    save to the journal, and the journal is folded back into the snapshot
+    once it grows larger than the store itself.
+
+    Private class attributes:
+        __journal_path (str): path to the journal file (JSON Lines).
+        __journal_records (int): number of records in the journal.
+
+    Public class attributes:
+        compact_threshold (int): minimum number of journal records before
+        a compaction is considered.
+
+    Public instance methods:
+        save(self): appends changed/deleted objects to the journal.
+        reload(self): loads the snapshot and replays the journal on top.
+        compact(self): rewrites the snapshot and truncates the journal.
+    """
+    __journal_path = "file.journal"
+    __journal_records = 0
+    compact_threshold = 1000
+
+    def save(self):
+        """Appends the objects changed since the last save to the journal."""
+        if self._postpone_save():
+            return
+        changed, removed = self._changes()
+        if not changed and not removed:
+            return
+        path = self.__journal_path
+        size = os.path.getsize(path) if os.path.isfile(path) else 0
+        try:
+            records = [{"op": "put", "key": key,
+                        "data": self.get(*key.split(".", 1)).to_dict()}
+                       for key in changed]
+            records += [{"op": "del", "key": key} for key in removed]
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n"
+                                for record in records))
+        except BaseException:
+            # cut what was appended, the next save retries the changes
+            self._unsaved(changed, removed)
+            if os.path.isfile(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+            raise
+        JournalStorage.__journal_records += len(records)
+
+        limit = max(self.compact_threshold, self.count())
+        if JournalStorage.__journal_records > limit:
+            self.compact()
+
+    def reload(self):
+        """
+        Deserializes the snapshot then replays the journal on top of it.
+
+        A torn record at the end of the journal (e.g. after a crash in the
+        middle of an append) stops the replay without losing what came
+        before it, and is cut off the journal so that the next appends
+        follow the last complete record. A complete record that is not a
+        valid change is reported and skipped.
+        """
+        super().reload()
+        path = self.__journal_path
+        count = 0
+
+        try:
+            with open(path, "r+b") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        self._report(offset, "torn record, journal truncated",
+                                     path)
+                        f.truncate(offset)
+                        break
+                    count += 1
+                    try:
+                        self.__replay(record)
+                    except (AttributeError, KeyError, TypeError,
+                            ValueError) as e:
+                        self._report(offset, f"invalid record ({e!r})", path)
+                    offset += len(line)
+                else:
+                    if offset and not line.endswith(b"\n"):
+                        f.write(b"\n")
+        except FileNotFoundError:
+            pass
+
+        # what was replayed is already persisted
+        self._changes()
+        JournalStorage.__journal_records = count
+
+    def __replay(self, record):
+        """Applies a record of the journal to the objects."""
+        cls_name, obj_id = record["key"].split(".", 1)
+        if cls_name not in self.classes:
+            raise KeyError(cls_name)
+        if record["op"] == "del":
+            obj = self.get(cls_name, obj_id)
+            if obj is not None:
+                self.delete(obj)
+        elif record["op"] == "put":
+            data = record["data"]
+            self.new(self.model(data["__class__"])(**data))
+        else:
+            raise ValueError(f"unknown op {record['op']!r}")
+
+    def compact(self):
+        """Folds the journal into the snapshot file and truncates it."""
+        if self._postpone_save():
+            return
+        super().save()
+        self.flush()
+        with open(self.__journal_path, "w", encoding="utf-8"):
+            pass
+        JournalStorage.__journal_records = 0
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""
+The `json_stream` module.
+
+Incremental reader for files holding one big JSON object, as written by
+FileStorage: the members of the object are decoded one at a time, so only a
+small window of the file is held in memory.
+"""
+import json
+import re
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# an error this far from the end of the buffer is not caused by a cut value
+LOOKAHEAD = 256
+DECODER = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    """
+    Syntax error found while streaming a JSON file.
+
+    Public instance attributes:
+        - msg (str): the unformatted error message.
+        - offset (int): position (in characters) of the error in the file.
+    """
+
+    def __init__(self, msg, offset):
+        """Create the error for msg at offset."""
+        super().__init__(f"{msg}: offset {offset}")
+        self.msg = msg
+        self.offset = offset
+
+
+class JSONObjectReader:
+    """
+    Iterates over the members of a JSON object stored in a text file.
+
+    Iterating yields (offset, key, value) tuples, offset being the position
+    (in characters) of the key in the file. A syntax error raises a
+    JSONStreamError.
+
+    Public instance attributes:
+        - chunk_size (int): number of characters read at a time.
+    """
+
+    def __init__(self, f, chunk_size=1 << 16):
+        """Create a reader over the opened text file f."""
+        self.__file = f
+        self.chunk_size = chunk_size
+        self.__buffer = ""
+        self.__pos = 0
+        self.__base = 0
+        self.__eof = False
+
+    def __iter__(self):
+        """Yields (offset, key, value) for each member of the object."""
+        self.__expect("{")
+        if self.__peek() == "}":
+            return
+
+        while True:
+            self.__peek()
+            offset = self.__base + self.__pos
+            key = self.__decode()
+            if not isinstance(key, str):
+                self.__fail("Expecting property name enclosed in double "
+                            "quotes", offset)
+            self.__expect(":")
+            value = self.__decode()
+            yield offset, key, value
+
+            if self.__peek() == "}":
+                return
+            self.__expect(",")
+
+    def __more(self):
+        """Reads the next chunk, dropping what was already consumed."""
+        chunk = self.__file.read(self.chunk_size)
+        if not chunk:
+            self.__eof = True
+            return False
+        self.__base += self.__pos
+        self.__buffer = self.__buffer[self.__pos:] + chunk
+        self.__pos = 0
+        return True
+
+    def __peek(self):
+        """Skips whitespace and returns the next character ("" at EOF)."""
+        while True:
+            self.__pos = WHITESPACE.match(self.__buffer, self.__pos).end()
+            if self.__pos < len(self.__buffer) or not self.__more():
+                return self.__buffer[self.__pos:self.__pos + 1]
+
+    def __expect(self, char):
+        """Consumes char (after whitespace) or raises a syntax error."""
+        if self.__peek() != char:
+            self.__fail(f"Expecting '{char}' delimiter",
+                        self.__base + self.__pos)
+        self.__pos += 1
+
+    def __decode(self):
+        """
+        Decodes the JSON value starting at the current position.
+
+        A value can be cut by the end of the buffer, either making the
+        decoder fail or (for numbers) stop early, so more data is read until
+        the value ends before the end of the buffer, or the file ends.
+        """
+        self.__peek()
+
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.__buffer, self.__pos)
+            except json.JSONDecodeError as e:
+                cut = e.msg.startswith("Unterminated string") or \
+                    len(self.__buffer) - e.pos <= LOOKAHEAD
+                if not cut or not self.__more():
+                    self.__fail(e.msg, self.__base + e.pos)
+                continue
+
+            if end < len(self.__buffer) or not self.__more():
+                self.__pos = end
+                return value
+
+    @staticmethod
+    def __fail(msg, offset):
+        """Raises a JSONStreamError at offset of the file."""
+        raise JSONStreamError(msg, offset)
@@ -0,0 +1,207 @@
+#!/usr/bin/python3
+"""
+The `parallel` module.
+
+Parallel decoding of storage files, used by FileStorage.reload() when it
+is given more than one worker. The files are split into chunks that are
+decoded (and their objects built) by worker processes; the results are
+merged back in file order by the storage.
+
+A file is split at record boundaries when its format allows it (indented
+JSON written by FileStorage, JSON Lines, possibly compressed); otherwise
+it is decoded as a single chunk, so several files (e.g. the shards of
+ShardedStorage) are still decoded in parallel.
+"""
+import io
+import multiprocessing
+from models.engine import serializers
+from models.engine.json_stream import JSONStreamError
+from models.engine.serializers import FormatError
+
+MIN_CHUNK = 1 << 20
+# separator of two members of the indented JSON object
+JSON_MEMBER = b',\n    "'
+
+
+def available():
+    """Returns True if worker processes can be forked on this platform."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def read(paths, workers, classes=None):
+    """
+    Decodes files in worker processes.
+
+    Args:
+        paths (list): paths of the files.
+        workers (int): number of worker processes.
+        classes (dict): classes to build the objects with, by name; None
+        to only decode the records (e.g. for a lazy reload).
+
+    Returns:
+        dict: (format, records, failure) by path, records being a list of
+        (offset, key, record, obj) in file order: obj is the object built
+        from the record (the record is then None), or None if it was not
+        built. failure is the (offset, message) of the error that stopped
+        the decoding, if any. Files that are missing or whose compressed
+        data is corrupted are left out, to be read serially.
+    """
+    files = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                compression, data = serializers.decompress(f.read())
+        except (OSError, FormatError):
+            continue
+        name = serializers.detect_serializer(data[:64])
+        files[path] = (f"{name}+{compression}" if compression else name,
+                       name, data)
+
+    total = sum(len(data) for _, _, data in files.values())
+    size = max(MIN_CHUNK, total // (workers * 4) + 1)
+    tasks = [(path, chunk, base) for path, (_, name, data) in files.items()
+             for chunk, base in split(data, name, size)]
+    results = run(tasks, workers, classes)
+
+    decoded = {path: (fmt, [], None) for path, (fmt, _, _) in files.items()}
+    for (path, _, _), (part, failure) in zip(tasks, results):
+        fmt, records, stopped = decoded[path]
+        if stopped is None:
+            records += part
+            decoded[path] = (fmt, records, failure)
+    return decoded
+
+
+def run(tasks, workers, classes=None):
+    """
+    Decodes the chunks of tasks in forked worker processes.
+
+    The processes are forked with the chunks already in their memory and
+    only send their results back, through a pipe read by the calling
+    thread: nothing is pickled in another thread of the calling process,
+    which could otherwise wait forever for an import lock held by the
+    caller (reload() runs while the models package is being imported).
+
+    Args:
+        tasks (list): (path, chunk, base) of the chunks to decode.
+        workers (int): maximum number of worker processes.
+        classes (dict): as in read().
+
+    Returns:
+        list: the results of decode() for the tasks, in order.
+    """
+    if not tasks:
+        return []
+    context = multiprocessing.get_context("fork")
+    workers = min(workers, len(tasks))
+    processes = []
+    for number in range(workers):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=work, daemon=True,
+                                  args=(sender, tasks[number::workers],
+                                        classes))
+        process.start()
+        sender.close()
+        processes.append((process, receiver))
+
+    results = [None] * len(tasks)
+    try:
+        for number, (process, receiver) in enumerate(processes):
+            try:
+                outcome = receiver.recv()
+            except EOFError:
+                process.join()
+                raise ChildProcessError(
+                    f"worker exited with code {process.exitcode}") from None
+            if isinstance(outcome, BaseException):
+                raise outcome
+            results[number::workers] = outcome
+    finally:
+        for process, receiver in processes:
+            receiver.close()
+            process.join()
+    return results
+
+
+def work(sender, tasks, classes=None):
+    """Decodes tasks in a worker process, sends the results to sender."""
+    try:
+        outcome = [decode(chunk, base, classes) for _, chunk, base in tasks]
+    except Exception as e:
+        outcome = e
+    sender.send(outcome)
+    sender.close()
+
+
+def split(data, name, size):
+    """
+    Splits the uncompressed data of a file into chunks of about size bytes.
+
+    Returns:
+        list: (chunk, base) where chunk is a valid file of the same format
+        and base is the offset of the chunk in the file (offsets in the
+        chunk + base = offsets in the file).
+    """
+    if name == "json":
+        separator, skip = JSON_MEMBER, 1
+    elif name == "jsonl":
+        separator, skip = b"\n", 1
+    else:
+        return [(data, 0)]
+
+    cuts = []
+    start = size
+    while start < len(data):
+        cut = data.find(separator, start)
+        if cut < 0:
+            break
+        cuts.append(cut)
+        start = cut + size
+    if not cuts:
+        return [(data, 0)]
+
+    chunks = []
+    starts = [0] + [cut + skip for cut in cuts]
+    ends = cuts + [len(data)]
+    if name == "jsonl":
+        return [(data[start:end + 1], start)
+                for start, end in zip(starts, ends)]
+
+    # offsets of the JSON reader are in characters
+    base = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        prefix = b"{" if i else b""
+        suffix = b"\n}" if i < len(cuts) else b""
+        chunks.append((prefix + data[start:end] + suffix, base - len(prefix)))
+        base += len(data[start:end + skip].decode("utf-8", "replace"))
+    return chunks
+
+
+def decode(chunk, base, classes=None):
+    """
+    Decodes a chunk in a worker process.
+
+    Records that cannot be built are returned as they are, for the storage
+    to report them.
+
+    Returns:
+        tuple: (list of (offset, key, record, obj), failure) as described
+        in read().
+    """
+    records, failure = [], None
+    try:
+        _, values = serializers.load(io.BytesIO(chunk))
+        for offset, key, value in values:
+            obj = None
+            if classes is not None:
+                try:
+                    cls_name = value["__class__"]
+                    built = f"{cls_name}.{value['id']}"
+                    obj = classes[cls_name](**value)
+                    key, value = built, None
+                except Exception:
+                    pass
+            records.append((base + offset, key, value, obj))
+    except (JSONStreamError, FormatError) as e:
+        failure = (base + e.offset, e.msg)
+    return records, failure
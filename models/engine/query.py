@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""
+The `query` module.
+
+Conditions on the attributes of stored objects, as FileStorage.select()
+takes them, and the helpers it sorts and projects its results with. A
+condition is written <name><operator><value> in the console, e.g.
+price_by_night<100 or name="My house".
+"""
+import operator
+import re
+from collections import namedtuple
+
+OPERATORS = {"=": operator.eq, "!=": operator.ne,
+             "<": operator.lt, "<=": operator.le,
+             ">": operator.gt, ">=": operator.ge}
+CONDITION = re.compile(r"(\w+)(!=|<=|>=|=|<|>)(.+)")
+WORD = re.compile(r"""(?:[^\s"']|"[^"]*"|'[^']*'|["'])+""")
+
+
+class Condition(namedtuple("Condition", ("name", "op", "value"))):
+    """
+    Comparison of an attribute with a value.
+
+    Public instance attributes:
+        - name (str): name of the attribute.
+        - op (str): one of the keys of OPERATORS.
+        - value (object): value the attribute is compared with.
+
+    Public instance methods:
+        accepts(self, value): returns True if value satisfies it.
+        matches(self, obj): returns True if obj satisfies it.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, op, value):
+        """Creates the condition, raises ValueError for an unknown op."""
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        return super().__new__(cls, name, op, value)
+
+    def accepts(self, value):
+        """Returns True if value satisfies the condition."""
+        try:
+            return bool(OPERATORS[self.op](value, self.value))
+        except TypeError:
+            return False
+
+    def matches(self, obj):
+        """Returns True if the attribute of obj satisfies the condition."""
+        return self.accepts(getattr(obj, self.name, None))
+
+
+def split(line):
+    """Returns the words of line, quoted strings kept whole with quotes."""
+    return WORD.findall(line)
+
+
+def parse(text):
+    """
+    Returns the Condition written in text, e.g. "max_guest>=4".
+
+    The value is a string when it is quoted, else a float if it has a
+    "." and an int, as the update command reads them; anything else is
+    kept as a string.
+
+    Raises:
+        ValueError: text is not a condition.
+    """
+    match = CONDITION.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid condition {text!r}")
+    name, op, value = match.groups()
+    return Condition(name, op, parse_value(value))
+
+
+def parse_value(text):
+    """Returns the value written in text (see parse())."""
+    if len(text) > 1 and text[0] in "\"'" and text[-1] == text[0]:
+        return text[1:-1]
+    try:
+        return float(text) if "." in text else int(text)
+    except ValueError:
+        return text
+
+
+def rank(value):
+    """Returns the sort key of value: numbers, then strings, then others."""
+    if isinstance(value, (int, float)) and value == value:
+        return (0, value, "")
+    if isinstance(value, str):
+        return (1, 0, value)
+    return (2, 0, str(value))
+
+
+def order(objects, name, reverse=False):
+    """
+    Returns objects sorted on the attribute name.
+
+    Objects without the attribute (or with None) come last, even in
+    descending order; the sort is stable.
+
+    Args:
+        objects (iterable): objects to sort.
+        name (str): attribute to sort on.
+        reverse (bool): sort in descending order.
+    """
+    present, missing = [], []
+    for obj in objects:
+        if getattr(obj, name, None) is None:
+            missing.append(obj)
+        else:
+            present.append(obj)
+    present.sort(key=lambda obj: rank(getattr(obj, name)), reverse=reverse)
+    return present + missing
+
+
+def project(obj, fields):
+    """Returns the dictionary of the attributes fields of obj."""
+    return {name: getattr(obj, name, None) for name in fields}
@@ -0,0 +1,547 @@
+#!/usr/bin/python3
+"""
+The `serializers` module.
+
+File formats of FileStorage. A format is the name of a serializer, possibly
+followed by "+" and a compression:
+    - json: the indented JSON object FileStorage always wrote (default).
+    - compact: the same JSON object, without whitespace.
+    - jsonl: JSON Lines, one record (dictionary of an object) per line.
+    - binary: MessagePack records after a "HBNB" header.
+    - snapshot: JSON records sorted by key, followed by an index of their
+      offsets, for models.engine.snapshot to map.
+    - compressions: zlib, gzip, lzma (e.g. "jsonl+gzip").
+
+Every format is detected when a file is read, so a storage file can be
+read whatever the format it was written in.
+
+Usage (converter): python3 -m models.engine.serializers SOURCE DEST FORMAT
+"""
+import codecs
+import gzip
+import io
+import json
+import lzma
+import re
+import struct
+import sys
+import zlib
+from models.engine.json_stream import JSONObjectReader
+
+CHUNK_SIZE = 1 << 16
+# errors of a compressed stream that is truncated or corrupted
+CORRUPTED = (EOFError, OSError, zlib.error, lzma.LZMAError)
+# first member of a compact file: no whitespace around the ":"
+COMPACT_START = re.compile(rb'\{"[^"\\]*":\{')
+
+
+class FormatError(ValueError):
+    """
+    Malformed record found while reading a file that is not JSON.
+
+    Public instance attributes:
+        - msg (str): the unformatted error message.
+        - offset (int): position (in bytes) of the error in the data.
+    """
+
+    def __init__(self, msg, offset):
+        """Create the error for msg at offset."""
+        super().__init__(f"{msg}: offset {offset}")
+        self.msg = msg
+        self.offset = offset
+
+
+class JSONSerializer:
+    """
+    Indented JSON object of the records by key (json.dump(indent=4)).
+
+    Public instance methods:
+        encode(self, key, record): returns the bytes of one record.
+        dump(self, fragments): returns the bytes of the file.
+        read(self, f): yields (offset, key, record) from a binary file.
+    """
+    name = "json"
+
+    def encode(self, key, record):
+        """Returns the member of the JSON object for record."""
+        data = json.dumps(record, indent=4).replace("\n", "\n    ")
+        return f"    {json.dumps(key)}: {data}".encode()
+
+    def dump(self, fragments):
+        """Returns the JSON object made of the encoded fragments."""
+        if not fragments:
+            return b"{}"
+        return b"{\n" + b",\n".join(fragments) + b"\n}"
+
+    def read(self, f):
+        """Yields (offset, key, record) of the members of the object."""
+        yield from JSONObjectReader(codecs.getreader("utf-8")(f))
+
+
+class CompactSerializer(JSONSerializer):
+    """JSON object of the records by key, without whitespace."""
+    name = "compact"
+
+    def encode(self, key, record):
+        """Returns the member of the JSON object for record."""
+        data = json.dumps(record, separators=(",", ":"))
+        return f"{json.dumps(key)}:{data}".encode()
+
+    def dump(self, fragments):
+        """Returns the JSON object made of the encoded fragments."""
+        return b"{" + b",".join(fragments) + b"}"
+
+
+class JSONLinesSerializer:
+    """
+    One JSON record per line, "__class__" first (used for detection).
+
+    An empty store is written as a single empty line, so that an empty
+    file still reads as a truncated one.
+    """
+    name = "jsonl"
+
+    def encode(self, key, record):
+        """Returns the line of record."""
+        record = {"__class__": record.get("__class__"), **record}
+        return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+    def dump(self, fragments):
+        """Returns the lines of the encoded fragments."""
+        return b"".join(fragments) if fragments else b"\n"
+
+    def read(self, f):
+        """Yields (offset, key, record) of each line."""
+        offset = 0
+        for line in f:
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise FormatError(f"invalid line ({e})", offset) from None
+                yield offset, _key(record), record
+            offset += len(line)
+
+
+class BinarySerializer:
+    """
+    MessagePack encoding of each record, after a "HBNB\\x01" header.
+
+    MessagePack is not a dependency, so the subset of it needed for the
+    records (nil, booleans, integers, floats, strings, arrays and maps) is
+    implemented here.
+    """
+    name = "binary"
+    MAGIC = b"HBNB\x01"
+
+    def encode(self, key, record):
+        """Returns the MessagePack bytes of record."""
+        out = bytearray()
+        _pack(record, out)
+        return bytes(out)
+
+    def dump(self, fragments):
+        """Returns the header followed by the encoded fragments."""
+        return self.MAGIC + b"".join(fragments)
+
+    def read(self, f):
+        """Yields (offset, key, record) of each record."""
+        buffer = f.read(len(self.MAGIC))
+        if buffer != self.MAGIC:
+            raise FormatError("invalid header", 0)
+        base, pos = len(self.MAGIC), 0
+        buffer = b""
+
+        while True:
+            try:
+                record, end = _unpack(buffer, pos)
+            except IndexError:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    if pos < len(buffer):
+                        raise FormatError("truncated record", base + pos)
+                    return
+                base += pos
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            except (ValueError, TypeError) as e:
+                raise FormatError(str(e), base + pos) from None
+            yield base + pos, _key(record), record
+            pos = end
+
+
+class SnapshotSerializer:
+    """
+    Records sorted by key with a key -> offset index (read-only snapshot).
+
+    Layout: the header (MAGIC, then the number of records and the offsets
+    of the keys, the index, the class table and the end of the file), the
+    records (one compact JSON line each), the keys, the index ((record
+    offset, key offset) of each record, plus one for the end of both
+    areas) and the class table ({class name: [first record, count]}).
+    """
+    name = "snapshot"
+    MAGIC = b"HBNB\x02"
+    HEADER = struct.Struct("<5s5Q")
+    ENTRY = struct.Struct("<2Q")
+
+    def encode(self, key, record):
+        """Returns the key and the JSON line of record."""
+        data = json.dumps(record, separators=(",", ":"))
+        return f"{key}\0{data}\n".encode()
+
+    def dump(self, fragments):
+        """Returns the snapshot of the encoded fragments."""
+        records, keys, offsets, classes = [], [], [], {}
+        position, key_position = self.HEADER.size, 0
+        for i, fragment in enumerate(sorted(fragments)):
+            key, _, record = fragment.partition(b"\0")
+            offsets.append((position, key_position))
+            records.append(record)
+            keys.append(key)
+            position += len(record)
+            key_position += len(key)
+            cls_name = key.split(b".", 1)[0].decode()
+            classes.setdefault(cls_name, [i, 0])[1] += 1
+
+        keys_offset = position
+        index_offset = keys_offset + key_position
+        index = b"".join(self.ENTRY.pack(record, keys_offset + key)
+                         for record, key in offsets)
+        index += self.ENTRY.pack(keys_offset, index_offset)
+        classes_offset = index_offset + len(index)
+        table = json.dumps(classes).encode()
+        header = self.HEADER.pack(self.MAGIC, len(records), keys_offset,
+                                  index_offset, classes_offset,
+                                  classes_offset + len(table))
+        return b"".join((header, *records, *keys, index, table))
+
+    def read(self, f):
+        """Yields (offset, key, record) of each record, in key order."""
+        header = f.read(self.HEADER.size)
+        if len(header) != self.HEADER.size or \
+                not header.startswith(self.MAGIC):
+            raise FormatError("invalid header", 0)
+        _, _, keys_offset, _, _, size = self.HEADER.unpack(header)
+
+        offset = self.HEADER.size
+        while offset < keys_offset:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                raise FormatError("truncated record", offset)
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise FormatError(f"invalid record ({e})", offset) from None
+            yield offset, _key(record), record
+            offset += len(line)
+        if offset + len(f.read()) != size:
+            raise FormatError("truncated index", offset)
+
+
+SERIALIZERS = {serializer.name: serializer for serializer in (
+    JSONSerializer(), CompactSerializer(), JSONLinesSerializer(),
+    BinarySerializer(), SnapshotSerializer())}
+COMPRESSIONS = {"zlib": lambda data: zlib.compress(data, 6),
+                "gzip": lambda data: gzip.compress(data, 6, mtime=0),
+                "lzma": lzma.compress}
+
+
+def parse_format(fmt):
+    """
+    Returns the (serializer, compression) of a format name.
+
+    Raises ValueError if the format is unknown.
+    """
+    name, _, compression = fmt.partition("+")
+    if name not in SERIALIZERS or \
+            (compression and compression not in COMPRESSIONS):
+        raise ValueError(f"unknown format {fmt!r}")
+    return SERIALIZERS[name], compression or None
+
+
+def dump(fmt, fragments):
+    """
+    Returns the bytes of a file in format fmt.
+
+    Args:
+        fmt (str): name of the format.
+        fragments (list): records encoded by the serializer of fmt.
+    """
+    serializer, compression = parse_format(fmt)
+    data = serializer.dump(fragments)
+    return COMPRESSIONS[compression](data) if compression else data
+
+
+def load(f):
+    """
+    Detects the format of an opened binary file.
+
+    Returns:
+        tuple: (name of the format, iterator of (offset, key, record)).
+        Offsets are positions in the decompressed data.
+    """
+    f = io.BufferedReader(f) if not hasattr(f, "peek") else f
+    compression = detect_compression(f.peek(8)[:8])
+    if compression == "gzip":
+        f = gzip.GzipFile(fileobj=f)
+    elif compression == "lzma":
+        f = lzma.LZMAFile(f)
+    elif compression == "zlib":
+        f = _ZlibReader(f)
+    if compression:
+        f = io.BufferedReader(f, CHUNK_SIZE)
+
+    try:
+        name = detect_serializer(f.peek(64))
+    except CORRUPTED as e:
+        raise FormatError(f"corrupted {compression} data ({e})", 0) from None
+    fmt = f"{name}+{compression}" if compression else name
+    return fmt, _records(SERIALIZERS[name].read(f), compression)
+
+
+def detect_compression(head):
+    """Returns the compression of data starting with head (or None)."""
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return "lzma"
+    if len(head) > 1 and head[0] == 0x78 and \
+            (head[0] << 8 | head[1]) % 31 == 0:
+        return "zlib"
+    return None
+
+
+def detect_serializer(head):
+    """Returns the serializer name of uncompressed data starting with head."""
+    start = head.lstrip()
+    if start.startswith(BinarySerializer.MAGIC):
+        return "binary"
+    if start.startswith(SnapshotSerializer.MAGIC):
+        return "snapshot"
+    if start.startswith(b'{"__class__"') or head and not start:
+        return "jsonl"
+    if COMPACT_START.match(start):
+        return "compact"
+    return "json"
+
+
+def decompress(data):
+    """
+    Returns the (compression, uncompressed data) of the bytes of a file.
+
+    Raises FormatError if the compressed data is corrupted.
+    """
+    compression = detect_compression(data[:8])
+    try:
+        if compression == "gzip":
+            data = gzip.decompress(data)
+        elif compression == "lzma":
+            data = lzma.decompress(data)
+        elif compression == "zlib":
+            data = zlib.decompress(data)
+    except CORRUPTED as e:
+        raise FormatError(f"corrupted {compression} data ({e})", 0) from None
+    return compression, data
+
+
+def convert(source, destination, fmt):
+    """
+    Rewrites the storage file source as destination, in format fmt.
+
+    Returns:
+        int: the number of records converted.
+    """
+    serializer, _ = parse_format(fmt)
+    with open(source, "rb") as f:
+        _, records = load(f)
+        fragments = [serializer.encode(key, record)
+                     for _, key, record in records]
+    with open(destination, "wb") as f:
+        f.write(dump(fmt, fragments))
+    return len(fragments)
+
+
+def _records(records, compression):
+    """Yields from records, reporting corrupted compressed data."""
+    offset = 0
+    try:
+        for offset, key, record in records:
+            yield offset, key, record
+    except CORRUPTED as e:
+        raise FormatError(f"corrupted {compression} data ({e})",
+                          offset) from None
+
+
+def _key(record):
+    """Returns the storage key of a record (None if it has none)."""
+    if isinstance(record, dict):
+        return f"{record.get('__class__')}.{record.get('id')}"
+    return None
+
+
+class _ZlibReader(io.RawIOBase):
+    """Readable stream of the decompressed data of a zlib stream."""
+
+    def __init__(self, f):
+        """Create the stream over the opened binary file f."""
+        self.__file = f
+        self.__decompressor = zlib.decompressobj()
+        self.__data = b""
+
+    def readable(self):
+        """Returns True."""
+        return True
+
+    def readinto(self, b):
+        """Reads decompressed data into b, returns its size (0 at EOF)."""
+        while not self.__data:
+            chunk = self.__file.read(CHUNK_SIZE)
+            if not chunk:
+                if not self.__decompressor.eof:
+                    raise EOFError("compressed data ended before the "
+                                   "end-of-stream marker was reached")
+                return 0
+            self.__data = self.__decompressor.decompress(chunk)
+        size = min(len(b), len(self.__data))
+        b[:size] = self.__data[:size]
+        self.__data = self.__data[size:]
+        return size
+
+
+def _pack(value, out):
+    """Appends the MessagePack encoding of value to the bytearray out."""
+    if value is None:
+        out.append(0xc0)
+    elif value is True or value is False:
+        out.append(0xc3 if value else 0xc2)
+    elif isinstance(value, int):
+        if -0x20 <= value < 0x80:
+            out.append(value & 0xff)
+        else:
+            for byte, code in _INTEGERS[value < 0]:
+                try:
+                    out += bytes((byte,)) + struct.pack(code, value)
+                    break
+                except struct.error:
+                    continue
+            else:
+                raise ValueError(f"integer out of range: {value}")
+    elif isinstance(value, float):
+        out += b"\xcb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode()
+        _header(out, len(data), 0xa0, 32, (0xd9, 0xda, 0xdb))
+        out += data
+    elif isinstance(value, (list, tuple)):
+        _header(out, len(value), 0x90, 16, (None, 0xdc, 0xdd))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _header(out, len(value), 0x80, 16, (None, 0xde, 0xdf))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not "
+                        f"serializable")
+
+
+def _header(out, size, fix, fix_limit, codes):
+    """
+    Appends the type byte and size of a string, array or map.
+
+    Args:
+        out (bytearray): where to append.
+        size (int): length of the value.
+        fix (int): type byte of the short form (size in the low bits).
+        fix_limit (int): first size not fitting the short form.
+        codes (tuple): type bytes of the 8, 16 and 32 bit sizes (None if
+        there is no 8 bit form).
+    """
+    if size < fix_limit:
+        out.append(fix | size)
+    elif codes[0] is not None and size < 0x100:
+        out += bytes((codes[0], size))
+    elif size < 0x10000:
+        out += bytes((codes[1],)) + struct.pack(">H", size)
+    else:
+        out += bytes((codes[2],)) + struct.pack(">I", size)
+
+
+_INTEGERS = {False: ((0xcc, ">B"), (0xcd, ">H"), (0xce, ">I"), (0xcf, ">Q")),
+             True: ((0xd0, ">b"), (0xd1, ">h"), (0xd2, ">i"), (0xd3, ">q"))}
+_FIXED = {0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+          0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+          0xca: ">f", 0xcb: ">d"}
+_SIZES = {0xd9: (">B", "str"), 0xda: (">H", "str"), 0xdb: (">I", "str"),
+          0xdc: (">H", "array"), 0xdd: (">I", "array"),
+          0xde: (">H", "map"), 0xdf: (">I", "map")}
+
+
+def _unpack(data, pos):
+    """
+    Decodes the MessagePack value at data[pos].
+
+    Returns:
+        tuple: (value, position after the value).
+
+    Raises IndexError if data ends before the value does, and ValueError
+    if the value is not valid.
+    """
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    if byte >= 0xe0:
+        return byte - 0x100, pos
+    if byte >= 0xa0 and byte < 0xc0:
+        kind, size = "str", byte & 0x1f
+    elif byte < 0x90:
+        kind, size = "map", byte & 0x0f
+    elif byte < 0xa0:
+        kind, size = "array", byte & 0x0f
+    elif byte == 0xc0:
+        return None, pos
+    elif byte == 0xc2 or byte == 0xc3:
+        return byte == 0xc3, pos
+    elif byte in _FIXED:
+        code = _FIXED[byte]
+        end = pos + struct.calcsize(code)
+        if end > len(data):
+            raise IndexError("truncated value")
+        return struct.unpack_from(code, data, pos)[0], end
+    elif byte in _SIZES:
+        code, kind = _SIZES[byte]
+        end = pos + struct.calcsize(code)
+        if end > len(data):
+            raise IndexError("truncated value")
+        size, pos = struct.unpack_from(code, data, pos)[0], end
+    else:
+        raise ValueError(f"invalid type byte 0x{byte:02x}")
+
+    if kind == "str":
+        end = pos + size
+        if end > len(data):
+            raise IndexError("truncated value")
+        return data[pos:end].decode(), end
+    if kind == "array":
+        items = []
+        for _ in range(size):
+            item, pos = _unpack(data, pos)
+            items.append(item)
+        return items, pos
+    items = {}
+    for _ in range(size):
+        key, pos = _unpack(data, pos)
+        items[key], pos = _unpack(data, pos)
+    return items, pos
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        sys.exit(f"Usage: python3 -m models.engine.serializers SOURCE "
+                 f"DEST FORMAT\nFORMAT: {', '.join(SERIALIZERS)}, "
+                 f"optionally +{', +'.join(COMPRESSIONS)}")
+    print(f"{convert(*sys.argv[1:])} records converted")
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+"""The `ShardedStorage` module."""
+import os
+import zlib
+from itertools import chain
+from models.engine.file_storage import FileStorage
+
+
+class ShardedStorage(FileStorage):
+    """
+    FileStorage variant that writes one file (shard) per class.
+
+    The objects of a class are stored in <directory>/<class name>.json, or,
+    with `partitions` > 1, hash-partitioned by id over
+    <directory>/<class name>.<n>.json. A save only rewrites the shards
+    holding an object changed or deleted since the last one; each shard is
+    written like the FileStorage file (atomically, in `format`, with a
+    <shard>.bak snapshot used by reload() if the shard is corrupted).
+
+    The shards are written as save() is called, write_behind does not
+    apply to them.
+
+    Private class attributes:
+        __directory (str): path to the directory of the shards.
+        __shards (dict): format of every shard known to be up to date on
+        disk (an empty shard has no file), by path; None when the shard has
+        to be written again.
+
+    Public class attributes:
+        partitions (int): number of shards per class.
+
+    Public instance methods:
+        shard(self, key): returns the path of the shard of key.
+        save(self): writes the shards holding changed or deleted objects.
+        reload(self): loads every shard of the directory.
+    """
+    __directory = "file.shards"
+    __shards = {}
+    partitions = 1
+
+    def shard(self, key):
+        """
+        Returns the path of the shard storing the object of key.
+
+        Args:
+            key (str): <class name>.id of the object.
+        """
+        cls_name, obj_id = key.split(".", 1)
+        if self.partitions > 1:
+            part = zlib.crc32(obj_id.encode()) % self.partitions
+            cls_name = f"{cls_name}.{part}"
+        return os.path.join(self.__directory, f"{cls_name}.json")
+
+    def save(self):
+        """
+        Writes the shards holding objects changed or deleted since the
+        last save.
+
+        Every shard is rewritten when the format changes, and the shards
+        not written yet (e.g. after a change of `partitions`, the files of
+        the previous partitioning being removed).
+        """
+        if self._postpone_save():
+            return
+        changed, removed = self._changes()
+        fmt = self._format()
+        shards = ShardedStorage.__shards
+
+        dirty = {self.shard(key) for key in chain(changed, removed)}
+        dirty.update(path for path, written in shards.items()
+                     if written != fmt or
+                     path not in self.__layout(self.__class_of(path)))
+        dirty.update(path for cls_name in self.classes
+                     for path in self.__layout(cls_name)
+                     if path not in shards)
+        if not dirty:
+            return
+
+        try:
+            self.__write_shards(dirty, fmt)
+        except BaseException:
+            # the next save rewrites the shards of these keys again
+            self._unsaved(changed, removed)
+            raise
+
+    def __write_shards(self, dirty, fmt):
+        """Writes the shards at the paths of dirty in format fmt."""
+        shards = ShardedStorage.__shards
+        groups = {path: [] for path in dirty}
+        for cls_name in {self.__class_of(path) for path in dirty}:
+            for key, fragment in self._fragments(fmt, cls_name):
+                group = groups.get(self.shard(key))
+                if group is not None:
+                    group.append(fragment)
+
+        os.makedirs(self.__directory, exist_ok=True)
+        for path, entries in sorted(groups.items()):
+            if entries:
+                self._write(path, entries, fmt)
+            else:
+                for name in (path, path + ".bak"):
+                    if os.path.isfile(name):
+                        os.remove(name)
+            if path in self.__layout(self.__class_of(path)):
+                shards[path] = fmt
+            else:
+                shards.pop(path, None)
+
+    def reload(self):
+        """
+        Deserializes every shard of the directory to __objects.
+
+        Each shard is loaded (and recovered from its snapshot) as
+        FileStorage.reload() loads its file; with `workers` > 1 the shards
+        are decoded in parallel.
+        """
+        self.flush()
+        FileStorage.errors = []
+        shards = {}
+        paths = self.__paths()
+        decoded = self._decode(paths)
+        for path in paths:
+            shards[path] = self._recover(path, decoded.get(path))
+        # the shards without a file are empty, unless the class was
+        # written with another number of partitions
+        fmt = self._format()
+        for cls_name in self.classes:
+            layout = self.__layout(cls_name)
+            if all(path in layout for path in shards
+                   if self.__class_of(path) == cls_name):
+                for path in layout:
+                    shards.setdefault(path, fmt)
+        ShardedStorage.__shards = shards
+        self._changes()
+
+    def __paths(self):
+        """Returns the paths of the shards found in the directory."""
+        try:
+            names = os.listdir(self.__directory)
+        except FileNotFoundError:
+            return []
+        paths = {os.path.join(self.__directory, name.removesuffix(".bak"))
+                 for name in names if name.endswith((".json", ".json.bak"))}
+        return sorted(path for path in paths
+                      if self.__class_of(path) in self.classes)
+
+    def __layout(self, cls_name):
+        """Returns the paths of the shards of a class."""
+        if self.partitions > 1:
+            names = [f"{cls_name}.{part}" for part in range(self.partitions)]
+        else:
+            names = [cls_name]
+        return {os.path.join(self.__directory, f"{name}.json")
+                for name in names}
+
+    @staticmethod
+    def __class_of(path):
+        """Returns the class name of the shard path."""
+        return os.path.basename(path).split(".")[0]
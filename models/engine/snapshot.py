@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""
+The `snapshot` module.
+
+Memory-mapped access to the snapshot files written in the "snapshot" format
+(see models.engine.serializers.SnapshotSerializer). Opening a snapshot only
+reads its header and class table, whatever its size: keys are found by a
+binary search over the sorted index and records are decoded one at a time,
+when they are read.
+"""
+import json
+import mmap
+from models.engine.serializers import FormatError, SnapshotSerializer
+
+HEADER = SnapshotSerializer.HEADER
+ENTRY = SnapshotSerializer.ENTRY
+
+
+class Snapshot:
+    """
+    Read-only snapshot file mapped in memory.
+
+    Records are numbered in key order; the records of a class are
+    contiguous.
+
+    Public instance attributes:
+        - path (str): path of the file.
+        - classes (dict): (first record, number of records) by class name.
+
+    Public instance methods:
+        count(self, cls_name=None): returns the number of records.
+        find(self, key): returns the number of the record of key, or -1.
+        key(self, i): returns the key of record i.
+        record(self, i): returns the dictionary of record i.
+        offset(self, i): returns the offset of record i in the file.
+        fragment(self, i): returns record i encoded for SnapshotSerializer.
+        close(self): unmaps the file.
+    """
+
+    def __init__(self, path):
+        """
+        Maps the snapshot file path.
+
+        Raises FormatError if the file is not a complete snapshot.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise FormatError("empty file", 0) from None
+
+        data = self.__map
+        if len(data) < HEADER.size or \
+                not data[:HEADER.size].startswith(SnapshotSerializer.MAGIC):
+            self.close()
+            raise FormatError("not a snapshot", 0)
+        _, self.__count, _, self.__index, classes, size = \
+            HEADER.unpack_from(data)
+        if size != len(data):
+            length = len(data)
+            self.close()
+            raise FormatError("truncated snapshot", min(size, length))
+        self.classes = {name: tuple(span) for name, span in
+                        json.loads(data[classes:size]).items()}
+
+    def __len__(self):
+        """Returns the number of records."""
+        return self.__count
+
+    def count(self, cls_name=None):
+        """Returns the number of records (of class cls_name)."""
+        if cls_name is None:
+            return self.__count
+        return self.classes.get(cls_name, (0, 0))[1]
+
+    def find(self, key):
+        """
+        Returns the number of the record of key, or -1 if there is none.
+
+        Args:
+            key (str): <class name>.id of the record.
+        """
+        first, count = self.classes.get(key.split(".", 1)[0], (0, 0))
+        target = key.encode()
+        low, high = first, first + count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < first + count and self.__key(low) == target:
+            return low
+        return -1
+
+    def key(self, i):
+        """Returns the key of record i."""
+        return self.__key(i).decode()
+
+    def record(self, i):
+        """Returns the dictionary of record i."""
+        start, _ = ENTRY.unpack_from(self.__map, self.__index + ENTRY.size * i)
+        end, _ = ENTRY.unpack_from(self.__map,
+                                   self.__index + ENTRY.size * (i + 1))
+        return json.loads(self.__map[start:end])
+
+    def offset(self, i):
+        """Returns the offset of record i in the file."""
+        return ENTRY.unpack_from(self.__map, self.__index + ENTRY.size * i)[0]
+
+    def fragment(self, i):
+        """Returns record i as SnapshotSerializer.encode() returns it."""
+        position = self.__index + ENTRY.size * i
+        start, key_start = ENTRY.unpack_from(self.__map, position)
+        end, key_end = ENTRY.unpack_from(self.__map, position + ENTRY.size)
+        return self.__map[key_start:key_end] + b"\0" + self.__map[start:end]
+
+    def close(self):
+        """Unmaps the file."""
+        self.__map.close()
+
+    def __key(self, i):
+        """Returns the key of record i, as bytes."""
+        position = self.__index + ENTRY.size * i
+        _, start = ENTRY.unpack_from(self.__map, position)
+        _, end = ENTRY.unpack_from(self.__map, position + ENTRY.size)
+        return self.__map[start:end]
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+"""The `SnapshotStorage` module."""
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import FormatError
+from models.engine.snapshot import Snapshot
+
+
+class SnapshotStorage(FileStorage):
+    """
+    FileStorage variant serving the objects from a memory-mapped snapshot.
+
+    reload() only maps the snapshot file (see models.engine.snapshot), so
+    it takes the same time whatever the size of the store: count() is read
+    from the index, get() finds its record by a binary search, and a
+    record is only decoded and built when its object is accessed (all() of
+    its class, get()). find() and select() have to decode every record of
+    the class on their first call for it (O(class size)); the dictionaries
+    decoded are kept as the pending records of the lazy reload, so later
+    calls only match them, and only the matching ones are built. The
+    objects built are kept in memory like FileStorage's and take
+    precedence over the snapshot from then on.
+
+    save() writes a new snapshot: the records never accessed are copied
+    from the mapped file as they are, without being decoded. A file in
+    another format is loaded as FileStorage loads it.
+
+    Private class attributes:
+        __snapshot_path (str): path to the snapshot file.
+        __snapshot (Snapshot): the mapped snapshot (None if there is none).
+        __consumed (dict): keys of the snapshot records loaded in memory,
+        replaced or deleted, grouped by class name.
+
+    Public instance methods:
+        all(self, cls=None): returns the objects, building the records
+        of the snapshot (of class cls) first.
+        count(self, cls=None): returns the number of objects and records.
+        get(self, cls, id): returns an object, building only its record.
+        save(self): writes a new snapshot.
+        reload(self): maps the snapshot file.
+        close(self): unmaps the snapshot file.
+    """
+    __snapshot_path = "file.snapshot"
+    __snapshot = None
+    __consumed = {}
+
+    def all(self, cls=None):
+        """Returns __objects (or the objects of cls), as FileStorage does."""
+        if cls is None and SnapshotStorage.__snapshot is not None:
+            for cls_name in SnapshotStorage.__snapshot.classes:
+                self.__defer(cls_name)
+        return super().all(cls)
+
+    def count(self, cls=None):
+        """Returns the number of objects, counting the snapshot records."""
+        count = super().count(cls)
+        snapshot = SnapshotStorage.__snapshot
+        if snapshot is None:
+            return count
+        if cls is None:
+            consumed = sum(map(len, SnapshotStorage.__consumed.values()))
+            return count + len(snapshot) - consumed
+
+        cls_name = self._class_name(cls)
+        return count + snapshot.count(cls_name) - \
+            len(SnapshotStorage.__consumed.get(cls_name, ()))
+
+    def get(self, cls, id):
+        """Returns the object of class cls with this id, or None."""
+        cls_name = self._class_name(cls)
+        self.__defer(cls_name, f"{cls_name}.{id}")
+        return super().get(cls_name, id)
+
+    def find(self, cls, **attrs):
+        """
+        Returns the objects of class cls matching every attribute.
+
+        The first call for a class decodes all its records (see the class
+        docstring); only the matching ones are built.
+        """
+        self.__defer(self._class_name(cls))
+        return super().find(cls, **attrs)
+
+    def select(self, cls, *conditions, **options):
+        """
+        Selects the objects of class cls, snapshot records included.
+
+        The first call for a class decodes all its records (see the class
+        docstring); a scan builds only the matching ones.
+        """
+        self.__defer(self._class_name(cls))
+        return super().select(cls, *conditions, **options)
+
+    def new(self, obj):
+        """Sets obj in __objects, replacing its record of the snapshot."""
+        super().new(obj)
+        self.__consume(f"{obj.__class__.__name__}.{obj.id}")
+
+    def save(self):
+        """Writes the objects and the records not accessed to a snapshot."""
+        if self._postpone_save():
+            return
+        self._changes()
+        entries = [fragment for _, fragment in self._fragments("snapshot")]
+
+        snapshot = SnapshotStorage.__snapshot
+        if snapshot is not None:
+            for cls_name, (first, count) in snapshot.classes.items():
+                consumed = SnapshotStorage.__consumed.get(cls_name)
+                entries.extend(snapshot.fragment(i)
+                               for i in range(first, first + count)
+                               if not consumed or
+                               snapshot.key(i) not in consumed)
+
+        if self.write_behind:
+            self._enqueue(self.__snapshot_path, entries, "snapshot")
+        else:
+            self._write(self.__snapshot_path, entries, "snapshot")
+
+    def reload(self):
+        """
+        Maps the snapshot file; the objects already in memory take
+        precedence over its records.
+
+        A file that is not a snapshot (another format, compressed, or
+        corrupted) is loaded, or recovered from its last good snapshot,
+        as FileStorage.reload() does.
+        """
+        self.flush()
+        FileStorage.errors = []
+        self.close()
+        try:
+            snapshot = Snapshot(self.__snapshot_path)
+        except FileNotFoundError:
+            snapshot = None
+        except FormatError:
+            self._recover(self.__snapshot_path)
+            snapshot = None
+
+        if snapshot is not None:
+            SnapshotStorage.__snapshot = snapshot
+            SnapshotStorage.__consumed = {}
+            for key in super().all():
+                self.__consume(key)
+        self._changes()
+
+    def close(self):
+        """Unmaps the snapshot file (its records are no longer served)."""
+        if SnapshotStorage.__snapshot is not None:
+            SnapshotStorage.__snapshot.close()
+            SnapshotStorage.__snapshot = None
+            SnapshotStorage.__consumed = {}
+
+    def _materialize(self, cls_name, keys=None):
+        """Builds the pending records of cls_name, snapshot included."""
+        if keys is None:
+            self.__defer(cls_name)
+        return super()._materialize(cls_name, keys)
+
+    def _report(self, offset, message, path=None):
+        """Records and prints an error found while loading the snapshot."""
+        super()._report(offset, message, path or self.__snapshot_path)
+
+    def __consume(self, key):
+        """Flags the record of key, if any, as replaced by memory."""
+        snapshot = SnapshotStorage.__snapshot
+        if snapshot is not None:
+            cls_name = key.split(".", 1)[0]
+            consumed = SnapshotStorage.__consumed.setdefault(cls_name, set())
+            if key not in consumed and snapshot.find(key) >= 0:
+                consumed.add(key)
+
+    def __defer(self, cls_name, key=None):
+        """
+        Hands the records of the snapshot not consumed yet (all those of
+        cls_name, or the one of key) over to the lazy loading of
+        FileStorage, which builds them when they are accessed.
+        """
+        snapshot = SnapshotStorage.__snapshot
+        if snapshot is None:
+            return
+        consumed = SnapshotStorage.__consumed.setdefault(cls_name, set())
+        if key is not None:
+            found = snapshot.find(key) if key not in consumed else -1
+            numbers = [found] if found >= 0 else []
+        else:
+            first, count = snapshot.classes.get(cls_name, (0, 0))
+            if len(consumed) == count:
+                return
+            numbers = range(first, first + count)
+
+        for i in numbers:
+            key = snapshot.key(i)
+            if key not in consumed:
+                consumed.add(key)
+                self._defer(snapshot.offset(i), cls_name, key,
+                            snapshot.record(i))
@@ -0,0 +1,247 @@
+#!/usr/bin/python3
+"""
+The `spatial` module.
+
+Grid index over latitude/longitude points, kept by FileStorage to answer
+bounding box, radius and nearest neighbour queries by visiting only the
+grid cells around the query instead of every object.
+"""
+import heapq
+from math import asin, ceil, cos, floor, radians, sin, sqrt
+
+EARTH_RADIUS = 6371.0088  # mean radius, in km
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Returns the great-circle distance between two points in km."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    h = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(h)))
+
+
+def _wrap(lon):
+    """Returns lon brought back into [-180, 180]."""
+    if -180 <= lon <= 180:
+        return lon
+    return (lon + 180) % 360 - 180
+
+
+class GridIndex:
+    """
+    Buckets points by cells of cell_size x cell_size degrees.
+
+    Public instance attributes:
+        - cell_size (float): size of a cell, in degrees.
+
+    Public instance methods:
+        add(self, key, lat, lon): adds (or moves) the point of key.
+        remove(self, key): removes the point of key.
+        bbox(self, south, west, north, east): returns the keys in a box.
+        radius(self, lat, lon, km): returns (distance, key) within km.
+        nearest(self, lat, lon, k): returns the k nearest (distance, key).
+    """
+
+    def __init__(self, cell_size=0.1):
+        """Create an empty index of cell_size degrees cells."""
+        self.cell_size = cell_size
+        self.__rows = ceil(180 / cell_size)
+        self.__columns = ceil(360 / cell_size)
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns the number of points."""
+        return len(self.__points)
+
+    def __contains__(self, key):
+        """Returns True if key has a point in the index."""
+        return key in self.__points
+
+    def add(self, key, lat, lon):
+        """
+        Adds the point of key, or moves it if key is already indexed.
+
+        Args:
+            key (str): key of the object.
+            lat (float): latitude, in [-90, 90].
+            lon (float): longitude, in [-180, 180].
+        """
+        self.remove(key)
+        lon = _wrap(lon)
+        cell = self.__cell(lat, lon)
+        self.__cells.setdefault(cell, {})[key] = (lat, lon)
+        self.__points[key] = (lat, lon, cell)
+
+    def remove(self, key):
+        """
+        Removes the point of key, if it is indexed.
+
+        Args:
+            key (str): key of the object.
+        """
+        point = self.__points.pop(key, None)
+        if point is not None:
+            cell = self.__cells[point[2]]
+            del cell[key]
+            if not cell:
+                del self.__cells[point[2]]
+
+    def bbox(self, south, west, north, east):
+        """
+        Returns the keys of the points inside a bounding box.
+
+        A box with west > east crosses the antimeridian.
+
+        Args:
+            south, west, north, east (float): bounds of the box, in degrees.
+        """
+        west, east = _wrap(west), _wrap(east)
+        keys = []
+        for cell in self.__box_cells(south, west, north, east):
+            for key, (lat, lon) in self.__cells.get(cell, {}).items():
+                inside = west <= lon <= east if west <= east else \
+                    lon >= west or lon <= east
+                if south <= lat <= north and inside:
+                    keys.append(key)
+        return keys
+
+    def radius(self, lat, lon, km):
+        """
+        Returns the (distance, key) of the points within km of a point.
+
+        The list is sorted by distance.
+
+        Args:
+            lat, lon (float): center, in degrees.
+            km (float): radius, in km.
+        """
+        dlat = km / (EARTH_RADIUS * radians(1))
+        south, north = max(-90, lat - dlat), min(90, lat + dlat)
+        cos_lat = min(cos(radians(south)), cos(radians(north)))
+        if north >= 90 or south <= -90 or cos_lat * 180 <= dlat:
+            west, east = -180, 180
+        else:
+            dlon = dlat / cos_lat
+            west, east = lon - dlon, lon + dlon
+
+        found = []
+        for cell in self.__box_cells(south, west, north, east):
+            for key, (plat, plon) in self.__cells.get(cell, {}).items():
+                d = distance(lat, lon, plat, plon)
+                if d <= km:
+                    found.append((d, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k):
+        """
+        Returns the (distance, key) of the k points nearest to a point.
+
+        The cells are visited ring by ring around the cell of the point,
+        until no point of the next ring can be nearer than the k-th found
+        (see __rings() for sparse grids).
+
+        Args:
+            lat, lon (float): point, in degrees.
+            k (int): number of points to return.
+        """
+        if k <= 0 or not self.__points:
+            return []
+
+        lon = _wrap(lon)
+        row, column = self.__cell(lat, lon)
+        best = []
+        seen = 0
+        for ring, cells in self.__rings(row, column):
+            for cell in cells:
+                for key, (plat, plon) in self.__cells.get(cell, {}).items():
+                    seen += 1
+                    item = (-distance(lat, lon, plat, plon), key)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            if seen == len(self.__points):
+                break
+            if len(best) == k and -best[0][0] <= self.__bound(lat, ring):
+                break
+        return sorted((-d, key) for d, key in best)
+
+    def __bound(self, lat, ring):
+        """Returns a lower bound of the distance to the cells past ring."""
+        gap = radians(ring * self.cell_size)
+        farthest = radians(min(90.0, abs(lat) + (ring + 1) * self.cell_size))
+        along_lat = EARTH_RADIUS * gap
+        half_gap = sin(min(gap, radians(180)) / 2)
+        along_lon = 2 * EARTH_RADIUS * asin(min(1.0, cos(farthest) * half_gap))
+        return min(along_lat, along_lon)
+
+    def __cell(self, lat, lon):
+        """Returns the (row, column) of the cell of a point."""
+        row = min(self.__rows - 1, floor((lat + 90) / self.cell_size))
+        column = floor((lon + 180) / self.cell_size) % self.__columns
+        return row, column
+
+    def __box_cells(self, south, west, north, east):
+        """
+        Returns the cells overlapping a bounding box, or only the occupied
+        ones when the box covers more cells than are occupied.
+        """
+        first, _ = self.__cell(max(-90, south), 0)
+        last, _ = self.__cell(min(90, north), 0)
+        start = floor((west + 180) / self.cell_size)
+        end = floor((east + 180) / self.cell_size)
+        if west > east:
+            # across the antimeridian: start to the last column, then 0 to
+            # end, even when both edges fall in the same column
+            end += self.__columns
+        end = min(end, start + self.__columns - 1)
+        if (last - first + 1) * (end - start + 1) > len(self.__cells):
+            return [(row, column) for row, column in self.__cells
+                    if first <= row <= last and
+                    (column - start) % self.__columns <= end - start]
+        return [(row, column % self.__columns)
+                for row in range(first, last + 1)
+                for column in range(start, end + 1)]
+
+    def __rings(self, row, column):
+        """
+        Yields (ring, cells) for the rings of cells around a cell, nearest
+        first.
+
+        Rings are listed cell by cell while they hold fewer cells than are
+        occupied; past that, the occupied cells left are grouped by ring,
+        so that a sparse grid is not scanned cell by cell.
+        """
+        visited = set()
+        for ring in range(max(self.__rows, self.__columns)):
+            cells = self.__ring(row, column, ring) - visited
+            if len(visited) + len(cells) > len(self.__cells):
+                break
+            visited |= cells
+            yield ring, cells
+        else:
+            return
+
+        rings = {}
+        for cell in self.__cells:
+            if cell not in visited:
+                gap = abs(cell[1] - column)
+                ring = max(abs(cell[0] - row), min(gap, self.__columns - gap))
+                rings.setdefault(ring, []).append(cell)
+        for ring in sorted(rings):
+            yield ring, rings[ring]
+
+    def __ring(self, row, column, ring):
+        """Returns the cells at Chebyshev distance ring of a cell."""
+        cells = set()
+        for r in range(row - ring, row + ring + 1):
+            if not 0 <= r < self.__rows:
+                continue
+            if abs(r - row) == ring:
+                columns = range(column - ring, column + ring + 1)
+            else:
+                columns = (column - ring, column + ring)
+            cells.update((r, c % self.__columns) for c in columns)
+        return cells
@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+"""The `SQLiteStorage` module."""
+import json
+import sqlite3
+import sys
+from models.engine.file_storage import FileStorage
+
+
+class SQLiteStorage(FileStorage):
+    """
+    FileStorage variant that persists the objects to a SQLite database.
+
+    Every class of `classes` has its own table, with the id as primary key,
+    one indexed column for each attribute declared in `indexes` (the
+    foreign keys, e.g. Place.city_id) and the dictionary of the object as
+    JSON. Each save upserts the changed rows and deletes the removed ones
+    in a single transaction; the database runs in WAL mode.
+
+    Private class attributes:
+        __db_path (str): path to the SQLite database.
+        __connection (sqlite3.Connection): open connection to the database.
+        __connected_path (str): path of the database __connection is open on.
+
+    Public class attributes:
+        batch_size (int): number of rows sent per executemany() call.
+
+    Public instance methods:
+        save(self): upserts changed objects and deletes removed ones.
+        reload(self): loads every row of the database.
+        query(self, cls, **attrs): returns the objects of class cls whose
+        indexed columns match attrs, as selected by the database.
+        close(self): closes the connection to the database.
+    """
+    __db_path = "file.db"
+    __connection = None
+    __connected_path = None
+    batch_size = 500
+
+    def save(self):
+        """Writes the objects changed since the last save to the database."""
+        if self._postpone_save():
+            return
+        changed, removed = self._changes()
+        if not changed and not removed:
+            return
+        try:
+            self.__upsert(changed, removed)
+        except BaseException:
+            # nothing was committed: the next save retries the changes
+            self._unsaved(changed, removed)
+            raise
+
+    def __upsert(self, changed, removed):
+        """Upserts the changed keys and deletes the removed ones at once."""
+        rows, keys = {}, {}
+        for key in changed:
+            cls_name, obj_id = key.split(".", 1)
+            obj = self.get(cls_name, obj_id)
+            names = self.indexes.get(cls_name, ())
+            rows.setdefault(cls_name, []).append(
+                (obj_id, *(self.__column(getattr(obj, name, None))
+                           for name in names),
+                 json.dumps(obj.to_dict())))
+        for key in removed:
+            cls_name, obj_id = key.split(".", 1)
+            keys.setdefault(cls_name, []).append((obj_id,))
+
+        connection = self._connect()
+        with connection:
+            for cls_name, values in rows.items():
+                names = ("id", *self.indexes.get(cls_name, ()), "data")
+                sql = f'INSERT INTO "{cls_name}" ({", ".join(names)}) ' \
+                    f'VALUES ({", ".join("?" * len(names))}) ' \
+                    f'ON CONFLICT(id) DO UPDATE SET ' + \
+                    ", ".join(f"{name} = excluded.{name}"
+                              for name in names[1:])
+                self.__execute(connection, sql, values)
+            for cls_name, values in keys.items():
+                sql = f'DELETE FROM "{cls_name}" WHERE id = ?'
+                self.__execute(connection, sql, values)
+
+    def reload(self):
+        """
+        Loads every row of the database to __objects.
+
+        Invalid rows are skipped and reported (with their rowid) on stderr
+        and in `errors`. In lazy mode the rows are only kept, as with
+        FileStorage.
+        """
+        FileStorage.errors = []
+        connection = self._connect()
+
+        for cls_name in self.classes:
+            rows = connection.execute(f'SELECT rowid, id, data '
+                                      f'FROM "{cls_name}"')
+            for rowid, obj_id, data in rows:
+                key = f"{cls_name}.{obj_id}"
+                try:
+                    value = json.loads(data)
+                    if self.lazy and self.get(cls_name, obj_id) is None:
+                        self._defer(rowid, cls_name, key, value)
+                        continue
+                    obj = self.model(cls_name)(**value)
+                except Exception as e:
+                    self._report(rowid, f"invalid row {key!r} ({e!r})")
+                    continue
+                self.new(obj)
+        self._changes()
+
+    def query(self, cls, **attrs):
+        """
+        Returns the objects of class cls matching every attribute.
+
+        The rows are selected by the database on the indexed columns of
+        the class (`indexes`), the other attributes being matched on the
+        objects. Unsaved changes are saved first, so that the database
+        agrees with __objects.
+
+        Args:
+            cls (type or str): class of the objects to find.
+            attrs: attribute names and the values they must be equal to.
+        """
+        cls_name = self._class_name(cls)
+        self.save()
+        names = [name for name in attrs
+                 if name in self.indexes.get(cls_name, ())]
+        sql = f'SELECT id FROM "{cls_name}"'
+        if names:
+            sql += " WHERE " + " AND ".join(f"{name} IS ?" for name in names)
+        values = [self.__column(attrs[name]) for name in names]
+        rows = self._connect().execute(sql, values)
+
+        found = []
+        for obj_id, in rows:
+            obj = self.get(cls_name, obj_id)
+            if obj is not None and all(getattr(obj, name, None) == value
+                                       for name, value in attrs.items()):
+                found.append(obj)
+        return found
+
+    def close(self):
+        """Closes the connection to the database (reopened when needed)."""
+        if SQLiteStorage.__connection is not None:
+            SQLiteStorage.__connection.close()
+            SQLiteStorage.__connection = None
+
+    def _connect(self):
+        """Returns the connection to the database, creating the tables."""
+        connection = SQLiteStorage.__connection
+        if connection is not None and \
+                SQLiteStorage.__connected_path == self.__db_path:
+            return connection
+
+        self.close()
+        connection = sqlite3.connect(self.__db_path)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        with connection:
+            for cls_name in self.classes:
+                names = self.indexes.get(cls_name, ())
+                columns = "".join(f", {name}" for name in names)
+                connection.execute(f'CREATE TABLE IF NOT EXISTS "{cls_name}" '
+                                   f'(id TEXT PRIMARY KEY{columns}, '
+                                   f'data TEXT NOT NULL)')
+                for name in names:
+                    connection.execute(f'CREATE INDEX IF NOT EXISTS '
+                                       f'"{cls_name}_{name}" '
+                                       f'ON "{cls_name}" ({name})')
+        SQLiteStorage.__connection = connection
+        SQLiteStorage.__connected_path = self.__db_path
+        return connection
+
+    def _report(self, offset, message, path=None):
+        """Records and prints an error found while loading the database."""
+        FileStorage.errors.append((offset, message))
+        print(f"** {path or self.__db_path}: row {offset}: {message} **",
+              file=sys.stderr)
+
+    def __execute(self, connection, sql, values):
+        """Runs sql once per row of values, batch_size rows at a time."""
+        for start in range(0, len(values), self.batch_size):
+            connection.executemany(sql,
+                                   values[start:start + self.batch_size])
+
+    @staticmethod
+    def __column(value):
+        """Returns value as stored in an indexed column."""
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return json.dumps(value, default=str)
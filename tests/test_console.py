@@ -4,10 +4,13 @@ The `test_console` Module tests the functionality of each unit
 (unit test) in the console module.
 """
 
-from console import HBNBCommand
+from cmd import Cmd
+from console import HBNBCommand, parse_command
 from io import StringIO
 from models import storage
 from unittest.mock import patch
+import json
+import os
 import sys
 import unittest
 
@@ -22,16 +25,27 @@ class TestHBNBCommand(unittest.TestCase):
         - test_help_cm(self)
 
         - test_do_all(self, arg)
+        - test_do_all_paging(self, arg)
         - test_do_count(self, arg)
         - test_do_create(self, arg)
         - test_do_destroy(self, arg)
+        - test_do_destroy_update_lookup(self)
         - test_do_EOF(self, arg)
+        - test_do_import(self, arg)
+        - test_do_near(self, arg)
+        - test_do_query(self, arg)
         - test_do_quit(self, arg)
         - test_do_show(self, arg)
         - test_do_update(self, arg)
 
         - test_emptyline(self)
+        - test_run_batch(self)
         - test_precmd(self, arg)
+        - test_parse_command(self)
+        - test_update_dictionary(self)
+        - test_cmdloop_invalid_value(self)
+        - test_precmd_override(self)
+        - test_parseline(self)
 
         - is_valid(self, arg, operation)
 
@@ -127,6 +141,28 @@ class TestHBNBCommand(unittest.TestCase):
 
             self.assertEqual(expect, result)
 
+    def test_do_all_paging(self):
+        """
+        Tests the limit, offset, cursor and format options of all command.
+        """
+        objects = [str(obj) for obj in storage.all("User").values()]
+        keys = [f"User.{obj.id}" for obj in storage.all("User").values()]
+
+        result = self.exec_cm("all User limit=2 offset=1")
+        self.assertEqual(result, f"{objects[1:3]}\n** cursor={keys[2]} **\n")
+        result = self.exec_cm(f"all User cursor={keys[2]} limit=100")
+        self.assertEqual(result, f"{objects[3:]}\n")
+        result = self.exec_cm(f"all User cursor={keys[-1]}")
+        self.assertEqual(result, "[]\n")
+        result = self.exec_cm("all User format=lines")
+        self.assertEqual(result, "".join(obj + "\n" for obj in objects))
+
+        result = self.exec_cm("all limit=1 format=lines")
+        self.assertEqual(result.split("\n")[0],
+                         str(next(iter(storage.all().values()))))
+        result = self.exec_cm(HBNBCommand().precmd("User.all(limit=1)"))
+        self.assertEqual(result, f"{objects[:1]}\n** cursor={keys[0]} **\n")
+
     def test_do_count(self):
         """
         Tests that count command give the user the right number of instances
@@ -158,6 +194,19 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertNotIn(key, storage.all())
         self.test_data()
 
+    def test_do_destroy_update_lookup(self):
+        """
+        Tests that destroy and update reach the object by its id only.
+        """
+        obj = next(iter(storage.all().values()))
+        cls_name = type(obj).__name__
+        with patch.object(storage, "all", side_effect=AssertionError):
+            self.exec_cm(f"update {cls_name} {obj.id} name 'Lookup'")
+            self.exec_cm(f"destroy {cls_name} {obj.id} extra")
+        self.assertEqual(obj.name, "Lookup")
+        self.assertIsNone(storage.get(cls_name, obj.id))
+        self.test_data()
+
     def test_do_EOF(self):
         """
         Tests that the HBNBCommand handles the EOF condition.
@@ -165,6 +214,63 @@ class TestHBNBCommand(unittest.TestCase):
         result = self.exec_cm("EOF")
         self.assertEqual(result, "")
 
+    def test_do_import(self):
+        """
+        Tests that import command creates the objects of a JSON Lines file.
+        """
+        obj = next(iter(storage.all().values()))
+        cls_name = type(obj).__name__
+        with open("test.jsonl", "w") as f:
+            f.write(json.dumps(obj.to_dict()) + "\n\n")
+            f.write('{"name": "imported"}\n')
+            f.write('{"name": \n')
+        try:
+            result = self.exec_cm(f"import {cls_name} test.jsonl")
+        finally:
+            os.remove("test.jsonl")
+
+        lines = result.split("\n")
+        self.assertTrue(lines[0].startswith("** line 4: invalid record"))
+        self.assertTrue(lines[1].startswith("2 imported in "))
+        self.assertEqual(storage.get(cls_name, obj.id).to_dict(),
+                         obj.to_dict())
+        self.assertEqual(len(storage.find(cls_name, name="imported")), 1)
+
+    def test_do_near(self):
+        """
+        Tests that near command displays the objects closest to a point.
+        """
+        place = list(storage.all("Place").values())[0]
+        place.latitude, place.longitude = 81.5, -12.5
+
+        result = self.exec_cm("near Place 81.5 -12.5 1")
+        self.assertEqual(result, f"{[str(place)]}\n")
+        result = self.exec_cm("near Place 81.6 -12.5 20 1")
+        self.assertEqual(result, f"{[str(place)]}\n")
+
+        place.latitude = 0.0
+
+    def test_do_query(self):
+        """
+        Tests that query command displays the objects matching conditions.
+        """
+        places = list(storage.all("Place").values())[:3]
+        for i, place in enumerate(places):
+            place.name, place.price_by_night = f"query {i}", 9000 + i
+
+        result = self.exec_cm("query Place price_by_night>=9001 "
+                              "price_by_night<9500 order_by=-price_by_night")
+        self.assertEqual(result, f"{[str(places[2]), str(places[1])]}\n")
+        result = self.exec_cm("query Place name='query 1' fields=name,id")
+        self.assertEqual(result,
+                         f"{[{'name': 'query 1', 'id': places[1].id}]}\n")
+        result = self.exec_cm("query Place price_by_night>=9000 "
+                              "order_by=name limit=1 offset=2 fields=name")
+        self.assertEqual(result, "[{'name': 'query 2'}]\n")
+
+        for place in places:
+            place.name, place.price_by_night = "", 0
+
     def test_do_quit(self):
         """
         Tests that HBNBCommand exits the CLI when quit command is requested.
@@ -200,6 +306,50 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(obj.Age, 21)
             self.assertEqual(obj.Salary, 2000.20)
 
+    def test_run_batch(self):
+        """
+        Tests that a batch runs its commands with the saves coalesced.
+        """
+        obj = next(iter(storage.all("User").values()))
+        users = storage.count("User")
+        script = ["# a comment", "create User", "", "create State",
+                  f"update User {obj.id} first_name 'Batch'",
+                  f"update User {obj.id} age eighty", "fail eighty",
+                  "count User", "quit", "create User"]
+
+        class Console(HBNBCommand):
+            """A console with a command that fails after a change."""
+
+            def do_fail(self, arg):
+                """Sets age on obj, then raises a ValueError."""
+                obj.age = arg
+                raise ValueError(arg)
+
+        for every, saves in ((None, 1), (2, 2)):
+            writes = []
+            save = storage.save
+
+            def counted_save():
+                writes.append(storage._FileStorage__depth)
+                save()
+            with patch.object(storage, "save", new=counted_save), \
+                    patch("sys.stderr", new=StringIO()) as err, \
+                    patch("sys.stdout", new=StringIO()) as out:
+                errors = Console().run_batch(iter(script), every)
+
+            lines = out.getvalue().split("\n")
+            self.assertEqual(errors, 1)
+            self.assertEqual(writes.count(0), saves)
+            self.assertEqual(lines[2], "updated")
+            self.assertEqual(lines[3], "** invalid value **")
+            self.assertEqual(lines[4], "** line 7: ValueError('eighty') **")
+            self.assertEqual(lines[5], str(users + 1))
+            self.assertEqual(obj.first_name, "Batch")
+            self.assertFalse(hasattr(obj, "age"))
+            self.assertTrue(err.getvalue().startswith("7 commands in "))
+            self.assertIn("\nupdate           2 ", err.getvalue())
+            users += 1
+
     def test_emptyline(self):
         """
         Tests that HBNBComannd emptylines.
@@ -249,6 +399,20 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(obj.age, 21)
             self.assertEqual(obj.salary, 2000.20)
 
+            # test <class_name>.update(<id>, <dictionary>)
+            query = f"{cls}.update('{obj_id}', " \
+                "{'first': 'Betty', 'age': 89})"
+            self.exec_cm(HBNBCommand().precmd(query))
+            self.assertEqual(obj.first, "Betty")
+            self.assertEqual(obj.age, 89)
+
+            # a value that can't be parsed leaves the object unchanged
+            query = f"{cls}.update('{obj_id}', " \
+                "{'first': 'Holberton', 'age': eighty})"
+            result = self.exec_cm(HBNBCommand().precmd(query))
+            self.assertEqual(result, "** invalid value **\n")
+            self.assertEqual(obj.first, "Betty")
+
             # test <class_name>.count()
             result = self.exec_cm(HBNBCommand().precmd(f"{cls}.count()"))
             expect = self.exec_cm(f"count {cls}")
@@ -261,6 +425,126 @@ class TestHBNBCommand(unittest.TestCase):
 
             self.assertTrue(is_deleted)
 
+    def test_parse_command(self):
+        """
+        Tests that precmd and parse_command turn dotted commands into
+        command lines, with dots, commas and parentheses inside quoted
+        arguments.
+        """
+        console = HBNBCommand()
+        for line, expect in (
+                ("User.all(limit=2, format=lines)",
+                 "all User limit=2 format=lines"),
+                ("User.all()", "all User"),
+                ('Place.show("1.2")', "show Place 1.2"),
+                ("Place.show( '1' )", "show Place 1"),
+                ('User.update("1", "age", 89)', "update User 1 age 89"),
+                ('User.update("1", "email", "a.b@c.com, (x)")',
+                 'update User 1 email "a.b@c.com, (x)"'),
+                ("User.update('1', {'a': 1})", "update User 1 {'a': 1}")):
+            self.assertEqual(console.precmd(line), expect)
+            self.assertEqual(parse_command(line), expect)
+        for line in ("all User", "foo(bar)", "a.b.c()", 'User.show("a" b)',
+                     "User.show({})", "User.update({}, '1')",
+                     "User.create()"):
+            self.assertEqual(console.precmd(line), line)
+        for line in ("foo(bar)", "a.b.c()", 'User.show("a" b)',
+                     "User.show({})", "User.update({}, '1')"):
+            self.assertIsNone(parse_command(line))
+
+        obj_id = self.exec_cm("create User").strip()
+        for query, expect in (
+                (f'User.update("{obj_id}", "email", "a.b@c.com, (x)")',
+                 {"email": "a.b@c.com, (x)"}),
+                (r"""User.update('ID', {"a": 1, b: 'x}y', "c": 2.5, """
+                 r""""d": "say \"hi\""})""",
+                 {"a": 1, "b": "x}y", "c": 2.5, "d": 'say "hi"'}),
+                (f"update User {obj_id} name 'Betty Holberton'",
+                 {"name": "Betty Holberton"}),
+                (r'User.update("ID", "quote", "say \"hi\"")',
+                 {"quote": 'say "hi"'})):
+            query = query.replace("ID", obj_id)
+            result = self.exec_cm(console.precmd(query))
+            self.assertEqual(result, "updated\n")
+            obj = storage.get("User", obj_id)
+            for name, value in expect.items():
+                self.assertEqual(getattr(obj, name), value)
+
+    def test_update_dictionary(self):
+        """
+        Tests that the attributes of a dictionary are set with one save.
+        """
+        obj_id = self.exec_cm("create User").strip()
+        query = f"User.update('{obj_id}', {{'first': 'Betty', 'age': 89}})"
+        writes = []
+        save = storage.save
+
+        def counted_save():
+            writes.append(storage._FileStorage__depth)
+            save()
+        with patch.object(storage, "save", new=counted_save):
+            result = self.exec_cm(HBNBCommand().precmd(query))
+        self.assertEqual(result, "updated\n")
+        self.assertEqual(writes.count(0), 1)
+        obj = storage.get("User", obj_id)
+        self.assertEqual((obj.first, obj.age), ("Betty", 89))
+
+        for query, expect in (
+                ("User.update('nothing', {'a': 1})",
+                 "** no instance found **"),
+                ("Mine.update('1', {'a': 1})", "** class doesn't exist **"),
+                (f"User.update('{obj_id}', {{}})",
+                 "** attribute name missing **"),
+                ("User.show({})", "*** Unknown syntax: User.show({})")):
+            result = self.exec_cm(HBNBCommand().precmd(query))
+            self.assertEqual(result, expect + "\n")
+
+    def test_cmdloop_invalid_value(self):
+        """
+        Tests that an update with an invalid value doesn't stop the console.
+        """
+        obj_id = self.exec_cm("create User").strip()
+        script = StringIO(f"User.update('nope', {{'a': bad}})\n"
+                          f"User.update('{obj_id}', {{'a': 1, 'b': bad}})\n"
+                          f"User.update('{obj_id}', 'a', 2)\n"
+                          "quit\n")
+        console = HBNBCommand(stdin=script)
+        console.use_rawinput = False
+        console.prompt = ""
+        with patch("sys.stdout", new=StringIO()) as out:
+            console.cmdloop()
+        self.assertEqual(out.getvalue(), "** no instance found **\n"
+                         "** invalid value **\nupdated\n")
+        obj = storage.get("User", obj_id)
+        self.assertEqual((obj.a, hasattr(obj, "b")), (2, False))
+
+    def test_precmd_override(self):
+        """
+        Tests that dotted commands run the do_ methods of a subclass.
+        """
+        class Console(HBNBCommand):
+            """A console with its own show command."""
+
+            def do_show(self, arg):
+                """Prints the arguments of show."""
+                print(f"show: {arg}")
+
+        console = Console()
+        with patch("sys.stdout", new=StringIO()) as out:
+            console.onecmd(console.precmd("User.show('1')"))
+        self.assertEqual(out.getvalue(), "show: User 1\n")
+
+    def test_parseline(self):
+        """
+        Tests that parseline splits lines as Cmd.parseline does.
+        """
+        console = HBNBCommand()
+        for line in ("show User 1", " all  User limit=2 ", "help", "", "?",
+                     "? show", "!ls", "show\tUser 1", "9a b", "\u00e9 x",
+                     "update User 1 name 'a b'"):
+            self.assertEqual(console.parseline(line),
+                             Cmd.parseline(console, line))
+
     # -------------- Test output of invalid Commands ------------- #
 
     def test_do_all_errors(self):
@@ -272,6 +556,17 @@ class TestHBNBCommand(unittest.TestCase):
 
         self.assertEqual(result, expect)
 
+    def test_do_all_options_errors(self):
+        """
+        Tests `all` command option errors.
+        """
+        for line, expect in (("all User name", "** invalid option: name **"),
+                             ("all User size=1",
+                              "** invalid option: size=1 **"),
+                             ("all User format=xml", "** invalid format **"),
+                             ("all User limit=a", "** invalid number **")):
+            self.assertEqual(self.exec_cm(line), expect + "\n")
+
     def test_do_count_errors(self):
         """
         Tests `count` command errors.
@@ -314,6 +609,43 @@ class TestHBNBCommand(unittest.TestCase):
 
         self.assertEqual(result, expect)
 
+    def test_do_import_errors(self):
+        """
+        Tests `import` command errors.
+        """
+        for line, expect in (("import", "** class name missing **"),
+                             ("import sadf32k", "** class doesn't exist **"),
+                             ("import User", "** file name missing **"),
+                             ("import User nothing.jsonl",
+                              "** file doesn't exist **")):
+            self.assertEqual(self.exec_cm(line), expect + "\n")
+
+    def test_do_query_errors(self):
+        """
+        Tests `query` command errors.
+        """
+        for line, expect in (("query", "** class name missing **"),
+                             ("query sadf32k", "** class doesn't exist **"),
+                             ("query User name", "** invalid condition: "
+                                                 "name **"),
+                             ("query User limit=a", "** invalid number **"),
+                             ("query User offset=", "** invalid number **")):
+            self.assertEqual(self.exec_cm(line), expect + "\n")
+
+    def test_do_near_errors(self):
+        """
+        Tests `near` command errors.
+        """
+        for line, expect in (("near", "** class name missing **"),
+                             ("near sadf32k", "** class doesn't exist **"),
+                             ("near User 1 2 3",
+                              "** class has no location **"),
+                             ("near Place 1", "** coordinates missing **"),
+                             ("near Place 1 2", "** radius missing **"),
+                             ("near Place 1 2 x", "** invalid number **"),
+                             ("near Place 1 2 3 1.5", "** invalid number **")):
+            self.assertEqual(self.exec_cm(line), expect + "\n")
+
     def test_do_show_errors(self):
         """
         Tests `show` command errors.
@@ -373,6 +705,14 @@ class TestHBNBCommand(unittest.TestCase):
 
         self.assertEqual(result, expect)
 
+        obj_id = self.exec_cm("create User").strip()
+        for value in ("abc", "1.2.3", '"unterminated'):
+            result = self.exec_cm(f"update User {obj_id} age {value}")
+            expect = "** invalid value **\n"
+
+            self.assertEqual(result, expect)
+        self.assertFalse(hasattr(storage.get("User", obj_id), "age"))
+
     def test_invalid_syntax(self):
         """
         Tests invalid syntax error.
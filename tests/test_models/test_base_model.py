@@ -7,6 +7,7 @@ from datetime import datetime
 from time import sleep
 from uuid import uuid4
 from models.base_model import BaseModel
+from models.base_model import DATE_FORMAT, format_datetime, parse_datetime
 from models.engine.file_storage import FileStorage
 from models import storage
 
@@ -70,6 +71,30 @@ class TestBaseModel(unittest.TestCase):
         string = f"[BaseModel] ({obj.id}) {obj.__dict__}"
         self.assertEqual(obj.__str__(), string)
 
+    def test_cached_representations(self):
+        """Test that str() and to_dict() are cached until a change"""
+        obj = BaseModel()
+        text, dictionary = str(obj), obj.to_dict()
+        self.assertIs(str(obj), text)
+        self.assertEqual(obj.to_dict(), dictionary)
+        self.assertNotIn("_BaseModel__cache", obj.__dict__)
+
+        # the caller gets a copy of the cached dictionary
+        obj.to_dict()["id"] = "changed"
+        self.assertEqual(obj.to_dict(), dictionary)
+
+        obj.name = "Betty"
+        self.assertEqual(str(obj), f"[BaseModel] ({obj.id}) {obj.__dict__}")
+        self.assertEqual(obj.to_dict()["name"], "Betty")
+        del obj.name
+        self.assertEqual(str(obj), text)
+        self.assertNotIn("name", obj.to_dict())
+
+        obj.save()
+        self.assertEqual(obj.to_dict()["updated_at"],
+                         format_datetime(obj.updated_at))
+        self.assertNotEqual(str(obj), text)
+
     def test_save(self):
         """Test the save method"""
         obj = BaseModel()
@@ -105,6 +130,32 @@ class TestBaseModel(unittest.TestCase):
         self.assertIn("updated_at", dictionary)
         self.assertIsInstance(dictionary["updated_at"], str)
 
+    def test_datetime_codec(self):
+        """Test parse_datetime and format_datetime"""
+        for text in ("2023-05-15T08:30:00.000000",
+                     "2023-10-22T18:45:30.500000",
+                     "1999-12-31T23:59:59.999999"):
+            value = parse_datetime(text)
+            self.assertEqual(value, datetime.strptime(text, DATE_FORMAT))
+            self.assertEqual(format_datetime(value), text)
+
+        now = datetime.now()
+        self.assertEqual(format_datetime(now), now.strftime(DATE_FORMAT))
+        self.assertEqual(format_datetime(now.replace(microsecond=0)),
+                         now.replace(microsecond=0).strftime(DATE_FORMAT))
+        self.assertEqual(parse_datetime("2023-5-1T08:30:00.5"),
+                         datetime(2023, 5, 1, 8, 30, 0, 500000))
+        with self.assertRaises(ValueError):
+            parse_datetime("yesterday")
+
+    def test_to_dict_dates(self):
+        """Test the format of the dates in to_dict"""
+        obj = BaseModel()
+        dictionary = obj.to_dict()
+        self.assertEqual(dictionary["created_at"],
+                         obj.created_at.strftime(DATE_FORMAT))
+        self.assertEqual(BaseModel(**dictionary).updated_at, obj.updated_at)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""Module containing unit test for the compact model classes"""
+import unittest
+import gc
+import os
+import tracemalloc
+from models.compact import CompactModel, compact_class
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestCompactModel(unittest.TestCase):
+    """unit test for compact_class and CompactModel"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = FileStorage()
+        self.storage._FileStorage__file_path = "test.json"
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        for path in ("test.json", "test.json.bak"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def test_class(self):
+        """Test that the compact class passes for the model class"""
+        cls = compact_class(Place)
+        self.assertIs(compact_class(Place), cls)
+        self.assertTrue(issubclass(cls, Place))
+        self.assertTrue(issubclass(cls, CompactModel))
+        self.assertEqual(cls.__name__, "Place")
+        self.assertEqual(str(cls), str(Place))
+        self.assertIn("number_rooms", cls.__slots__)
+        self.assertIn("latitude", cls.__slots__)
+
+    def test_same_dict(self):
+        """Test that to_dict and __str__ match the regular model"""
+        obj = Place()
+        obj.number_rooms = 3
+        obj.latitude = 12.5
+        compact = compact_class(Place)(**obj.to_dict())
+
+        self.assertEqual(compact.to_dict(), obj.to_dict())
+        self.assertEqual(str(compact), str(obj))
+        self.assertEqual(compact.number_rooms, 3)
+        self.assertEqual(compact.max_guest, 0)
+        self.assertEqual(compact.amenity_ids, [])
+        with self.assertRaises(AttributeError):
+            compact.nothing
+
+    def test_overflow(self):
+        """Test that undeclared attributes go to the overflow __dict__"""
+        compact = compact_class(User)(**User().to_dict())
+        compact.age = 21
+        compact.first_name = "Betty"
+
+        self.assertEqual(compact.__dict__, {"age": 21})
+        self.assertEqual(compact.to_dict()["age"], 21)
+        self.assertEqual(compact.to_dict()["first_name"], "Betty")
+
+    def test_new_instance(self):
+        """Test creating a compact instance without kwargs"""
+        obj = compact_class(User)()
+        self.assertIsInstance(obj, User)
+        self.assertIs(self.storage.get(User, obj.id), obj)
+        self.assertEqual(obj.__dict__, {})
+        self.assertEqual(set(obj.to_dict()),
+                         {"__class__", "id", "created_at", "updated_at"})
+
+    def test_memory(self):
+        """Test that compact instances are smaller than regular ones"""
+        data = Place().to_dict()
+        data.update(number_rooms=3, max_guest=4, latitude=1.5, city_id="c")
+
+        sizes = []
+        for cls in (Place, compact_class(Place)):
+            tracemalloc.start()
+            objects = [cls(**data) for _ in range(1000)]
+            sizes.append(tracemalloc.get_traced_memory()[0])
+            tracemalloc.stop()
+            del objects
+        self.assertLess(sizes[1], sizes[0])
+
+    def test_no_dict(self):
+        """Test that no __dict__ is allocated until one is needed"""
+        def allocated(obj):
+            return any(type(referent) is dict
+                       for referent in gc.get_referents(obj))
+
+        compact = compact_class(Place)(**Place().to_dict())
+        compact.number_rooms = 2
+        self.assertFalse(allocated(compact))
+        self.assertFalse(allocated(compact_class(User)()))
+        compact.age = 21
+        self.assertTrue(allocated(compact))
+
+    def test_storage(self):
+        """Test that a compact storage reloads compact instances"""
+        obj = Place()
+        obj.price_by_night = 100
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.compact = True
+        self.storage.reload()
+
+        compact = self.storage.get(Place, obj.id)
+        self.assertIsInstance(compact, CompactModel)
+        self.assertEqual(compact.to_dict(), obj.to_dict())
+
+        compact.price_by_night = 80
+        self.assertIn(f"Place.{obj.id}", self.storage._FileStorage__dirty)
+        self.assertEqual(self.storage.find(Place, price_by_night=80),
+                         [compact])
+
+    def test_rollback(self):
+        """Test that a rolled back transaction unsets the slots it set"""
+        compact = compact_class(Place)(**Place().to_dict())
+        self.storage.new(compact)
+        expect = compact.to_dict()
+
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                compact.city_id = "city"
+                compact.age = 21
+                self.assertIn("age", str(compact))
+                raise ValueError("failed")
+
+        self.assertEqual(compact.to_dict(), expect)
+        self.assertNotIn("age", str(compact))
+        self.assertEqual(compact.city_id, "")
+        self.assertIn(compact, self.storage.find(Place, city_id=""))
+
+
+if __name__ == "__main__":
+    unittest.main()
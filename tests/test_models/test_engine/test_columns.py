@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""Module containing unit test for ColumnStore Class"""
+import unittest
+import random
+from unittest.mock import patch
+from models.engine import columns
+from models.engine.columns import ColumnStore
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class Row:
+    """Object with a few Place attributes"""
+
+    def __init__(self, **attributes):
+        """Sets the attributes"""
+        self.__dict__.update(attributes)
+
+
+class TestColumnStore(unittest.TestCase):
+    """Unit test for ColumnStore Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.store = ColumnStore(Place, ("price_by_night", "latitude",
+                                         "city_id"))
+        self.store.add("a", Row(price_by_night=100, latitude=1.5,
+                                city_id="paris"))
+        self.store.add("b", Row(price_by_night=50, latitude=-3.0,
+                                city_id="cairo"))
+        self.store.add("c", Row(price_by_night=80, city_id="paris"))
+        self.store.add("d", Row(price_by_night="free", latitude=2.0))
+
+    def test_columns(self):
+        """Test the stored attributes"""
+        self.assertEqual(len(self.store), 4)
+        self.assertIn("price_by_night", self.store)
+        self.assertIn("city_id", self.store)
+        self.assertNotIn("name", self.store)
+
+    def test_select(self):
+        """Test select on ranges and values"""
+        self.assertEqual(self.store.select(price_by_night=(None, 80)),
+                         ["b", "c"])
+        self.assertEqual(self.store.select(price_by_night=(60, None),
+                                           city_id="paris"), ["a", "c"])
+        self.assertEqual(self.store.select(latitude=(0, 2)), ["a", "d"])
+        self.assertEqual(self.store.select(city_id="rome"), [])
+        self.assertEqual(self.store.select(), ["a", "b", "c", "d"])
+
+    def test_sort(self):
+        """Test sort, values that are not numbers coming last"""
+        self.assertEqual(self.store.sort("price_by_night"),
+                         ["b", "c", "a", "d"])
+        self.assertEqual(self.store.sort("price_by_night", reverse=True),
+                         ["a", "c", "b", "d"])
+        self.assertEqual(self.store.sort("price_by_night", ["a", "b"]),
+                         ["b", "a"])
+
+    def test_aggregate(self):
+        """Test aggregate, grouped or not"""
+        self.assertEqual(self.store.aggregate("price_by_night"),
+                         {"count": 3, "min": 50, "max": 100,
+                          "avg": 230 / 3})
+        groups = self.store.aggregate("price_by_night", by="city_id")
+        self.assertEqual(groups["paris"]["avg"], 90)
+        self.assertEqual(groups["cairo"]["count"], 1)
+        self.assertEqual(groups[None]["count"], 0)
+
+    @unittest.skipIf(columns.numpy is None, "numpy is not installed")
+    def test_aggregate_numpy(self):
+        """Test that numpy aggregates like the pure Python loop"""
+        generator = random.Random(7)
+        for i in range(500):
+            price = generator.choice([generator.randint(0, 300), "free"])
+            city = generator.choice(["paris", "cairo", "lima", None])
+            self.store.add(str(i), Row(price_by_night=price, city_id=city))
+        self.store.add("x", Row(price_by_night="free", city_id="oslo"))
+        self.store.add("y", Row(price_by_night=5, city_id=["unhashable"]))
+        keys = [str(i) for i in range(0, 500, 3)]
+
+        for args in ({}, {"by": "city_id"}, {"keys": keys},
+                     {"by": "city_id", "keys": keys}):
+            expect = self.store.aggregate("price_by_night", **args)
+            with patch.object(columns, "numpy", None):
+                loop = self.store.aggregate("price_by_night", **args)
+            self.assertEqual(expect.keys(), loop.keys())
+            if "by" not in args:
+                expect, loop = {None: expect}, {None: loop}
+            for value, statistics in loop.items():
+                self.assertEqual(expect[value]["count"], statistics["count"])
+                self.assertEqual(expect[value]["min"], statistics["min"])
+                self.assertEqual(expect[value]["max"], statistics["max"])
+                if statistics["avg"] is None:
+                    self.assertIsNone(expect[value]["avg"])
+                else:
+                    self.assertAlmostEqual(expect[value]["avg"],
+                                           statistics["avg"])
+
+    def test_values_compacted(self):
+        """Test that the values no row holds are dropped from the table"""
+        for i in range(1000):
+            self.store.add(f"k{i}", Row(city_id=f"city{i}"))
+            self.store.remove(f"k{i}")
+            self.store.update("b", "city_id", f"other{i}")
+        table = self.store._ColumnStore__values["city_id"]
+        self.assertLessEqual(len(table), 2 * len(self.store) + 64)
+        self.assertEqual(self.store.select(city_id="paris"), ["a", "c"])
+        self.assertEqual(self.store.select(city_id="other999"), ["b"])
+        self.assertEqual(self.store.select(city_id="city5"), [])
+        groups = self.store.aggregate("price_by_night", by="city_id")
+        self.assertEqual(set(groups), {"paris", "other999", None})
+
+    def test_remove_update(self):
+        """Test that remove and update keep the rows consistent"""
+        self.store.remove("a")
+        self.store.remove("a")
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.select(city_id="paris"), ["c"])
+
+        self.store.update("d", "price_by_night", 10)
+        self.store.update("d", "city_id", "paris")
+        self.assertEqual(self.store.select(price_by_night=(None, 60)),
+                         ["d", "b"])
+        self.assertEqual(self.store.select(city_id="paris"), ["d", "c"])
+
+    def test_storage(self):
+        """Test that FileStorage keeps the Place columns in sync"""
+        storage = FileStorage()
+        store = storage.column_store(Place)
+        place = Place()
+        place.price_by_night = 12345
+        place.city_id = "test-city"
+        key = f"Place.{place.id}"
+
+        self.assertEqual(store.select(price_by_night=(12345, 12345)), [key])
+        self.assertEqual(store.aggregate("price_by_night", by="city_id")
+                         ["test-city"]["max"], 12345)
+
+        storage.delete(place)
+        self.assertEqual(store.select(city_id="test-city"), [])
+        self.assertEqual(len(store), storage.count(Place))
+        self.assertIsNone(storage.column_store("User"))
+
+
+if __name__ == "__main__":
+    unittest.main()
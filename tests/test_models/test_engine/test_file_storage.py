@@ -2,6 +2,15 @@
 """Module containing unit test for FileStorage Class"""
 import unittest
 import json
+import os
+import time
+from io import StringIO
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.user import User
+from models.place import Place
+from models.review import Review
+from models.engine import serializers
 from models.engine.file_storage import FileStorage
 
 
@@ -58,6 +67,592 @@ class TestBaseModel(unittest.TestCase):
             self.assertIn(f"{obj.__class__.__name__}.{obj.id}",
                           self.storage._FileStorage__objects.keys())
 
+    def test_reload_reports_errors(self):
+        """Test that invalid records are reported and skipped"""
+        obj = User()
+        self.storage.save()
+        with open("test.json", "r") as f:
+            data = json.load(f)
+        data["User.bad"] = {"__class__": "Nothing", "id": "bad"}
+        data["User.bad2"] = {"__class__": "User", "id": "bad2",
+                             "created_at": "yesterday"}
+        with open("test.json", "w") as f:
+            json.dump(data, f)
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()) as stderr:
+            self.storage.reload()
+        self.assertIn(f"User.{obj.id}", self.storage.all())
+        self.assertNotIn("User.bad", self.storage.all())
+        self.assertNotIn("User.bad2", self.storage.all())
+        self.assertEqual(len(self.storage.errors), 2)
+        self.assertIn("User.bad", stderr.getvalue())
+
+    def test_reload_syntax_error(self):
+        """Test that a syntax error keeps the records read before it"""
+        first, second = User(), User()
+        self.storage.save()
+        os.remove("test.json.bak")
+        with open("test.json", "r") as f:
+            text = f.read()
+        cut = text.index(f'"User.{second.id}"')
+        with open("test.json", "w") as f:
+            f.write(text[:cut + 20])
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()):
+            self.storage.reload()
+        self.assertIn(f"User.{first.id}", self.storage.all())
+        self.assertNotIn(f"User.{second.id}", self.storage.all())
+        self.assertEqual(len(self.storage.errors), 1)
+        self.assertGreaterEqual(self.storage.errors[0][0], cut)
+
+    def test_save_atomic(self):
+        """Test that save replaces the file and keeps the previous one"""
+        first = User()
+        self.storage.save()
+        second = User()
+        self.storage.save()
+
+        self.assertFalse(os.path.exists("test.json.tmp"))
+        with open("test.json.bak", "r") as f:
+            previous = json.load(f)
+        self.assertIn(f"User.{first.id}", previous)
+        self.assertNotIn(f"User.{second.id}", previous)
+
+        # the file is never missing: it is replaced by a single rename
+        replace = os.replace
+        exists = []
+
+        def checked_replace(source, target):
+            exists.append(os.path.isfile("test.json"))
+            replace(source, target)
+        User()
+        with patch("os.replace", new=checked_replace):
+            self.storage.save()
+        self.assertEqual(exists, [True])
+        with open("test.json.bak", "r") as f:
+            self.assertIn(f"User.{second.id}", json.load(f))
+
+        # without hard links, the previous file is copied
+        third = User()
+        with patch("os.link", side_effect=OSError):
+            self.storage.save()
+        with open("test.json.bak", "r") as f:
+            self.assertNotIn(f"User.{third.id}", json.load(f))
+        with open("test.json", "r") as f:
+            self.assertIn(f"User.{third.id}", json.load(f))
+
+    def test_save_fsync_policy(self):
+        """Test that the fsync policy decides when the file is fsynced"""
+        with patch("os.fsync") as fsync:
+            self.storage.fsync = "never"
+            self.storage.save()
+            fsync.assert_not_called()
+
+            self.storage.fsync = "always"
+            self.storage.save()
+            self.assertEqual(fsync.call_count, 2)  # file and directory
+
+            fsync.reset_mock()
+            self.storage.fsync = "interval"
+            self.storage.fsync_interval = 0.2
+            for _ in range(3):
+                self.storage.save()
+            self.assertLessEqual(fsync.call_count, 2)
+
+            # the last save of the burst is fsynced at the end of the
+            # interval
+            fsync.reset_mock()
+            time.sleep(0.5)
+            self.assertEqual(fsync.call_count, 2)
+
+    def test_reload_recovers_backup(self):
+        """Test that a corrupted file is replaced by the last snapshot"""
+        first = User()
+        self.storage.save()
+        second = User()
+        self.storage.save()
+        with open("test.json", "r") as f:
+            text = f.read()
+        with open("test.json", "w") as f:
+            f.write(text[:len(text) // 2])
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()) as stderr:
+            self.storage.reload()
+        self.assertIn(f"User.{first.id}", self.storage.all())
+        self.assertNotIn(f"User.{second.id}", self.storage.all())
+        self.assertIn("test.json.bak", stderr.getvalue())
+        self.assertEqual(len(self.storage.errors), 2)
+
+        # a file missing after a crash between the two renames
+        os.remove("test.json")
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()):
+            self.storage.reload()
+        self.assertIn(f"User.{first.id}", self.storage.all())
+
+    def lazy_reload(self):
+        """Reloads the saved objects lazily, returns the pending records"""
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.lazy = True
+        try:
+            self.storage.reload()
+        finally:
+            del self.storage.lazy
+        return self.storage._FileStorage__pending
+
+    def test_lazy_reload(self):
+        """Test that a lazy reload builds objects on first access only"""
+        user, place = User(), Place()
+        total, users = self.storage.count(), self.storage.count(User)
+        pending = self.lazy_reload()
+
+        self.assertNotIn(f"User.{user.id}", self.storage._FileStorage__objects)
+        self.assertEqual(self.storage.count(), total)
+        self.assertEqual(self.storage.count(User), users)
+
+        obj = self.storage.get(User, user.id)
+        self.assertIsInstance(obj, User)
+        self.assertEqual(obj.to_dict(), user.to_dict())
+        self.assertIs(self.storage.get("User", user.id), obj)
+        self.assertNotIn(f"User.{user.id}", pending.get("User", {}))
+        self.assertIn(f"Place.{place.id}", pending["Place"])
+
+        self.assertIn(f"Place.{place.id}", self.storage.all(Place))
+        self.assertNotIn("Place", pending)
+        self.assertIn(f"BaseModel.{BaseModel().id}", self.storage.all())
+        self.assertEqual(pending, {})
+
+    def test_lazy_find(self):
+        """Test that find only builds the matching records"""
+        place = Place()
+        review, other = Review(), Review()
+        review.place_id = place.id
+        pending = self.lazy_reload()
+
+        found = self.storage.find(Review, place_id=place.id)
+        self.assertEqual([obj.id for obj in found], [review.id])
+        self.assertIn(f"Review.{other.id}", pending["Review"])
+
+    def test_lazy_save(self):
+        """Test that records not built yet are saved back"""
+        user = User()
+        self.lazy_reload()
+        self.storage.get(User, user.id).first_name = "Betty"
+        other = User()
+        self.storage.save()
+
+        with open("test.json", "r") as f:
+            data = json.load(f)
+        self.assertEqual(len(data), self.storage.count())
+        self.assertEqual(data[f"User.{user.id}"]["first_name"], "Betty")
+        self.assertIn(f"User.{other.id}", data)
+
+    def test_get(self):
+        """Test get method"""
+        obj = User()
+        self.assertIs(self.storage.get(User, obj.id), obj)
+        self.assertIs(self.storage.get("User", obj.id), obj)
+        self.assertIsNone(self.storage.get(Place, obj.id))
+        self.assertIsNone(self.storage.get(User, "nothing"))
+
+    def test_all_cls(self):
+        """Test all method filtered by class"""
+        obj = User()
+        users = self.storage.all(User)
+        self.assertEqual(users, self.storage.all("User"))
+        self.assertIn(f"User.{obj.id}", users)
+        self.assertTrue(all(key.startswith("User.") for key in users))
+        self.assertEqual(self.storage.all("Nothing"), {})
+
+    def test_count(self):
+        """Test count method"""
+        count = self.storage.count(User)
+        total = self.storage.count()
+        User()
+        self.assertEqual(self.storage.count("User"), count + 1)
+        self.assertEqual(self.storage.count(), total + 1)
+        self.assertEqual(self.storage.count("Nothing"), 0)
+
+    def test_delete(self):
+        """Test delete method"""
+        obj = User()
+        count = self.storage.count(User)
+        self.storage.delete(obj)
+        self.assertNotIn(f"User.{obj.id}", self.storage.all())
+        self.assertNotIn(f"User.{obj.id}", self.storage.all(User))
+        self.assertEqual(self.storage.count(User), count - 1)
+
+        # deleting twice or deleting None does nothing
+        self.storage.delete(obj)
+        self.storage.delete(None)
+        self.assertEqual(self.storage.count(User), count - 1)
+
+        self.storage.save()
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertNotIn(f"User.{obj.id}", json.load(f))
+
+    def test_bulk_new(self):
+        """Test bulk_new method"""
+        data = User().to_dict()
+        objects = (User(**dict(data, id=str(i))) for i in range(100))
+        count = self.storage.count(User)
+
+        self.assertEqual(self.storage.bulk_new(objects), 100)
+        self.assertEqual(self.storage.count(User), count + 100)
+        self.assertIsNotNone(self.storage.get(User, "99"))
+        self.assertEqual(self.storage.bulk_new([]), 0)
+
+        self.storage.save()
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertIn("User.42", json.load(f))
+
+    def test_transaction(self):
+        """Test that saves made in a transaction are coalesced"""
+        obj = User()
+        self.storage.save()
+        with patch.object(FileStorage, "_changes",
+                          wraps=self.storage._changes) as changes:
+            with self.storage.transaction():
+                obj.first_name = "Betty"
+                obj.save()
+                with self.storage.transaction():
+                    User().save()
+                obj.last_name = "Holberton"
+                obj.save()
+                changes.assert_not_called()
+            changes.assert_called_once()
+
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertEqual(json.load(f)[f"User.{obj.id}"]["last_name"],
+                             "Holberton")
+
+    def test_transaction_rollback(self):
+        """Test that a transaction is rolled back on an exception"""
+        place, removed = Place(), User()
+        place.city_id = "before"
+        self.storage.save()
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            saved = f.read()
+        count = self.storage.count()
+
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                place.city_id = "after"
+                place.name = "Home"
+                place.save()
+                self.storage.delete(removed)
+                created = User()
+                raise ValueError("failed")
+
+        self.assertEqual(place.city_id, "before")
+        self.assertNotIn("name", place.to_dict())
+        self.assertIs(self.storage.get(User, removed.id), removed)
+        self.assertIsNone(self.storage.get(User, created.id))
+        self.assertEqual(self.storage.count(), count)
+        self.assertEqual(self.storage.find(Place, city_id="before"), [place])
+        self.assertEqual(self.storage.find(Place, city_id="after"), [])
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertEqual(f.read(), saved)
+
+    def test_transaction_nested_rollback(self):
+        """Test that an inner transaction only rolls back its changes"""
+        obj = User()
+        with self.storage.transaction():
+            obj.first_name = "Betty"
+            try:
+                with self.storage.transaction():
+                    obj.first_name = "Holberton"
+                    raise KeyError("failed")
+            except KeyError:
+                pass
+            self.assertEqual(obj.first_name, "Betty")
+            obj.save()
+
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertEqual(json.load(f)[f"User.{obj.id}"]["first_name"],
+                             "Betty")
+
+    def test_write_behind(self):
+        """Test that write-behind saves are written by flush()"""
+        self.storage.save()
+        self.storage.write_behind = True
+        self.storage.flush_interval = 60
+        obj = User()
+        self.storage.save()
+
+        with open("test.json", "r") as f:
+            self.assertNotIn(f"User.{obj.id}", json.load(f))
+        self.storage.flush()
+        with open("test.json", "r") as f:
+            self.assertIn(f"User.{obj.id}", json.load(f))
+
+        # nothing waiting: flush returns at once
+        self.storage.flush()
+
+    def test_write_behind_latency(self):
+        """Test that a write-behind save is written after flush_interval"""
+        self.storage.write_behind = True
+        self.storage.flush_interval = 0.05
+        obj = User()
+        self.storage.save()
+
+        for _ in range(100):
+            time.sleep(0.05)
+            with open("test.json", "r") as f:
+                if f"User.{obj.id}" in f.read():
+                    break
+        else:
+            self.fail("write-behind save not written")
+
+    def test_write_behind_error(self):
+        """Test that flush raises the error of a failed write"""
+        self.storage._FileStorage__file_path = os.path.join("missing",
+                                                            "test.json")
+        self.storage.write_behind = True
+        self.storage.save()
+        with patch("sys.stderr", new=StringIO()):
+            with self.assertRaises(FileNotFoundError):
+                self.storage.flush()
+        self.storage.flush()
+
+    def test_find(self):
+        """Test find method on indexed and plain attributes"""
+        place, other = Place(), Place()
+        first, second = Review(), Review()
+        first.place_id = place.id
+        second.place_id = place.id
+        second.text = "Great"
+
+        self.assertEqual(self.storage.find(Review, place_id=place.id),
+                         [first, second])
+        self.assertEqual(self.storage.find("Review", place_id=place.id,
+                                           text="Great"), [second])
+        self.assertEqual(self.storage.find(Review, place_id=other.id), [])
+        self.assertIn(place, self.storage.find(Place, name=""))
+
+    def test_find_follows_updates(self):
+        """Test that attribute indexes follow updates and deletions"""
+        place, other = Place(), Place()
+        review = Review()
+        review.place_id = place.id
+        review.place_id = other.id
+
+        self.assertEqual(self.storage.find(Review, place_id=place.id), [])
+        self.assertEqual(self.storage.find(Review, place_id=other.id),
+                         [review])
+
+        self.storage.delete(review)
+        self.assertEqual(self.storage.find(Review, place_id=other.id), [])
+
+    def test_find_unhashable(self):
+        """Test that unhashable values are indexed, saved and reloaded"""
+        place = Place()
+        place.city_id = ["a"]
+        place.city_id = ["b"]
+        self.assertEqual(self.storage.find(Place, city_id=["b"]), [place])
+        self.assertEqual(self.storage.find(Place, city_id=["a"]), [])
+        key = f"Place.{place.id}"
+        self.storage.save()
+
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.all()[key].city_id, ["b"])
+        found = self.storage.find(Place, city_id=["b"])
+        self.assertEqual([obj.id for obj in found], [place.id])
+        self.storage.delete(found[0])
+        self.assertEqual(self.storage.find(Place, city_id=["b"]), [])
+
+    def test_select(self):
+        """Test select with conditions, order, paging and projection"""
+        places = [Place() for _ in range(6)]
+        for i, place in enumerate(places):
+            place.price_by_night, place.max_guest = 300 + i * 10, i % 3
+            place.city_id, place.name = "select-city", f"select {i}"
+        places[5].price_by_night = "free"
+
+        found = self.storage.select(Place, ("price_by_night", "<", 340),
+                                    ("max_guest", ">=", 1))
+        self.assertEqual(sorted(found, key=places.index),
+                         [places[1], places[2]])
+        found = self.storage.select("Place", ("city_id", "=", "select-city"),
+                                    order_by="price_by_night", reverse=True,
+                                    limit=2, offset=1)
+        self.assertEqual(list(found), [places[3], places[2]])
+        found = self.storage.select(Place, ("city_id", "=", "select-city"),
+                                    order_by="name", reverse=True,
+                                    fields=["name", "max_guest"])
+        self.assertEqual(next(found), {"name": "select 5", "max_guest": 2})
+        found = self.storage.select(Place, ("name", "=", "select 4"),
+                                    ("price_by_night", "!=", 0))
+        self.assertEqual(list(found), [places[4]])
+        with self.assertRaises(ValueError):
+            self.storage.select(Place, ("name", "~", "select"))
+
+    def test_select_follows_updates(self):
+        """Test that select sees updates through every plan"""
+        place = Place()
+        place.city_id, place.price_by_night = "old-city", 777
+        place.city_id, place.price_by_night = "new-city", 778
+        for condition in (("city_id", "=", "old-city"),
+                          ("price_by_night", "=", 777)):
+            self.assertEqual(list(self.storage.select(Place, condition)),
+                             [])
+        for condition in (("city_id", "=", "new-city"),
+                          ("price_by_night", "=", 778),
+                          ("id", "=", place.id)):
+            self.assertEqual(list(self.storage.select(Place, condition)),
+                             [place])
+
+    def test_plan(self):
+        """Test that plan picks an index, the columns or a scan"""
+        self.assertEqual(self.storage.plan(Review, ("place_id", "=", "1"),
+                                           ("text", "=", "")),
+                         ("index", ("place_id",)))
+        self.assertEqual(self.storage.plan(Place, ("max_guest", ">", 1),
+                                           ("city_id", "=", "1")),
+                         ("index", ("city_id",)))
+        self.assertEqual(self.storage.plan(Place, ("max_guest", ">", 1),
+                                           ("latitude", "<", 2),
+                                           ("max_guest", "<", 9)),
+                         ("columns", ("max_guest", "latitude")))
+        self.assertEqual(self.storage.plan(Place, order_by="max_guest"),
+                         ("columns", ()))
+        for conditions in ([("max_guest", "!=", 1)], [("name", "=", "")],
+                           [("max_guest", "<", "a")]):
+            self.assertEqual(self.storage.plan(Place, *conditions),
+                             ("scan", ()))
+        self.assertEqual(self.storage.plan(User, ("email", "=", "")),
+                         ("scan", ()))
+
+    def test_lazy_select(self):
+        """Test that select only builds the records it yields"""
+        reviews = [Review() for _ in range(3)]
+        for review in reviews:
+            review.text = "lazy select"
+        pending = self.lazy_reload()
+
+        found = self.storage.select(Review, ("text", "=", "lazy select"),
+                                    limit=2)
+        self.assertEqual(len(pending["Review"]), self.storage.count(Review))
+        self.assertEqual(len(list(found)), 2)
+        self.assertIn(f"Review.{reviews[2].id}", pending["Review"])
+
+    def test_save_format(self):
+        """Test that save writes the same layout as json.dump indent=4"""
+        BaseModel()
+        self.storage.save()
+        expect = {key: obj.to_dict()
+                  for key, obj in self.storage.all().items()}
+
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertEqual(f.read(), json.dumps(expect, indent=4))
+
+    def test_save_formats(self):
+        """Test that the format is detected on reload and kept by save"""
+        user = User()
+        try:
+            for fmt in ("jsonl+gzip", "binary", "compact+lzma"):
+                self.storage.format = fmt
+                self.storage.save()
+                with open("test.json", "rb") as f:
+                    self.assertEqual(serializers.load(f)[0], fmt)
+
+                del self.storage.format
+                self.storage.all().clear()
+                self.storage.reload()
+                loaded = self.storage.get(User, user.id)
+                self.assertEqual(loaded.to_dict(), user.to_dict())
+                user = loaded
+                user.name = fmt
+                self.storage.save()
+                with open("test.json", "rb") as f:
+                    self.assertEqual(serializers.load(f)[0], fmt)
+        finally:
+            self.storage.format = "json"
+            self.storage.save()
+            del self.storage.format
+
+    def test_save_only_dirty(self):
+        """Test that save only serializes the objects that changed"""
+        obj, other = BaseModel(), BaseModel()
+        self.storage.save()
+
+        obj.name = "Betty"
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            self.storage.save()
+        self.assertEqual([call.args[0] for call in to_dict.call_args_list],
+                         [obj])
+
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            data = json.load(f)
+        self.assertEqual(data[f"BaseModel.{obj.id}"]["name"], "Betty")
+        self.assertIn(f"BaseModel.{other.id}", data)
+
+    def test_save_deleted_attribute(self):
+        """Test that a deleted attribute leaves the file and the indexes"""
+        obj = BaseModel()
+        obj.name = "Betty"
+        review = Review()
+        review.place_id = "deleted-place"
+        self.storage.save()
+
+        del obj.name
+        del review.place_id
+        self.assertEqual(self.storage.find(Review,
+                                           place_id="deleted-place"), [])
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertNotIn("name", self.storage.all()[f"BaseModel.{obj.id}"]
+                         .to_dict())
+        self.assertEqual(self.storage.find(Review,
+                                           place_id="deleted-place"), [])
+
+    def test_save_removed(self):
+        """Test that objects removed from __objects leave the file"""
+        obj = BaseModel()
+        self.storage.save()
+        del self.storage.all()[f"BaseModel.{obj.id}"]
+        self.storage.save()
+
+        with open(self.storage._FileStorage__file_path, "r") as f:
+            self.assertNotIn(f"BaseModel.{obj.id}", json.load(f))
+
+    def test_save_removed_unsaved(self):
+        """Test that objects removed before any save leave the indexes"""
+        place = Place()
+        place.price_by_night = 10
+        count = self.storage.count(Place)
+        del self.storage.all()[f"Place.{place.id}"]
+        self.storage.save()
+
+        self.assertEqual(self.storage.count(Place), count - 1)
+        self.assertNotIn(place, self.storage.all(Place).values())
+        self.assertEqual(self.storage.find(Place, id=place.id), [])
+        found = self.storage.select(Place, ("price_by_night", "<=", 10))
+        self.assertNotIn(place, list(found))
+
+    def test_touch(self):
+        """Test that attribute writes flag stored objects as dirty"""
+        obj = BaseModel()
+        self.storage.save()
+        dirty = self.storage._FileStorage__dirty
+        self.assertNotIn(f"BaseModel.{obj.id}", dirty)
+
+        obj.name = "Betty"
+        self.assertIn(f"BaseModel.{obj.id}", dirty)
+
+        # objects that are not stored are not tracked
+        copy = BaseModel(**obj.to_dict())
+        self.storage.save()
+        copy.name = "Holberton"
+        self.assertNotIn(f"BaseModel.{obj.id}", dirty)
+
 
 if __name__ == "__main__":
     unittest.main()
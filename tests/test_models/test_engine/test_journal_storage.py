@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""Module containing unit test for JournalStorage Class"""
+import unittest
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.engine.journal_storage import JournalStorage
+from models.place import Place
+from models.user import User
+
+
+class TestJournalStorage(unittest.TestCase):
+    """Unit test for JournalStorage Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = JournalStorage()
+        self.storage._FileStorage__file_path = "test.json"
+        self.storage._JournalStorage__journal_path = "test.journal"
+        self.storage.save()
+        self.storage.compact()
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        for path in ("test.json", "test.json.bak", "test.journal"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def read_journal(self):
+        """Returns the records currently in the journal"""
+        with open("test.journal", "r") as f:
+            return [json.loads(line) for line in f]
+
+    def test_is_file_storage(self):
+        """Test that JournalStorage shares FileStorage's objects"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertIs(self.storage.all(), FileStorage().all())
+
+    def test_save_appends_changes_only(self):
+        """Test that save only journals the changed objects"""
+        obj = User()
+        self.storage.save()
+        records = self.read_journal()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["op"], "put")
+        self.assertEqual(records[0]["key"], f"User.{obj.id}")
+
+        # nothing changed, nothing appended
+        self.storage.save()
+        self.assertEqual(len(self.read_journal()), 1)
+
+        obj.first_name = "Betty"
+        self.storage.save()
+        records = self.read_journal()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]["data"]["first_name"], "Betty")
+
+    def test_save_journals_deletes(self):
+        """Test that removed objects are journaled as deletions"""
+        obj = Place()
+        self.storage.save()
+        key = f"Place.{obj.id}"
+        del self.storage.all()[key]
+        self.storage.save()
+        self.assertEqual(self.read_journal()[-1], {"op": "del", "key": key})
+
+    def test_reload_replays_journal(self):
+        """Test that reload applies the journal on top of the snapshot"""
+        kept, removed = User(), User()
+        self.storage.save()
+        kept.first_name = "Betty"
+        del self.storage.all()[f"User.{removed.id}"]
+        self.storage.save()
+
+        self.storage.all().clear()
+        self.storage.reload()
+        obj = self.storage.all()[f"User.{kept.id}"]
+        self.assertEqual(obj.first_name, "Betty")
+        self.assertNotIn(f"User.{removed.id}", self.storage.all())
+
+    def test_reload_ignores_torn_record(self):
+        """Test that a partially written last record is skipped"""
+        obj = User()
+        self.storage.save()
+        with open("test.journal", "a") as f:
+            f.write('{"op": "put", "key": "User.')
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()):
+            self.storage.reload()
+        self.assertIn(f"User.{obj.id}", self.storage.all())
+
+    def test_save_after_torn_record(self):
+        """Test that the changes saved after a torn record are kept"""
+        first = User()
+        self.storage.save()
+        with open("test.journal", "a") as f:
+            f.write('{"op": "put", "key": "User.')
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()):
+            self.storage.reload()
+        second = User()
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertIn(f"User.{first.id}", self.storage.all())
+        self.assertIn(f"User.{second.id}", self.storage.all())
+        self.assertEqual(len(self.read_journal()), 2)
+
+    def test_save_failure(self):
+        """Test that a failed append is cut and retried by the next save"""
+        kept, removed = User(), User()
+        self.storage.save()
+        size = os.path.getsize("test.journal")
+        kept.first_name = "Betty"
+        self.storage.delete(removed)
+        added = Place()
+
+        def full_disk(path, mode, **kwargs):
+            """Appends part of a record, then fails"""
+            with open(path, mode, **kwargs) as f:
+                f.write('{"op": "put", ')
+            raise OSError(28, "No space left on device")
+        with patch("models.engine.journal_storage.open", new=full_disk,
+                   create=True):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        self.assertEqual(os.path.getsize("test.journal"), size)
+
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(FileStorage.errors, [])
+        self.assertEqual(self.storage.get(User, kept.id).first_name, "Betty")
+        self.assertIsNone(self.storage.get(User, removed.id))
+        self.assertIsNotNone(self.storage.get(Place, added.id))
+
+    def test_reload_skips_invalid_records(self):
+        """Test that complete records that are not changes are skipped"""
+        obj = User()
+        self.storage.save()
+        with open("test.journal", "a") as f:
+            f.write('{"op": "put"}\n{"op": "move", "key": "User.1"}\n'
+                    '[1]\n{"op": "del", "key": "Nothing.1"}\n')
+        last = User()
+        self.storage.save()
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()):
+            self.storage.reload()
+        self.assertEqual(len(FileStorage.errors), 4)
+        self.assertIn(f"User.{obj.id}", self.storage.all())
+        self.assertIn(f"User.{last.id}", self.storage.all())
+
+    def test_compact(self):
+        """Test that compact folds the journal into the snapshot"""
+        obj = User()
+        self.storage.save()
+        self.storage.compact()
+
+        self.assertEqual(self.read_journal(), [])
+        with open("test.json", "r") as f:
+            self.assertIn(f"User.{obj.id}", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
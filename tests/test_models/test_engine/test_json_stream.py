@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Module containing unit test for JSONObjectReader Class"""
+import unittest
+import json
+from io import StringIO
+from models.engine.json_stream import JSONObjectReader, JSONStreamError
+
+
+class TestJSONObjectReader(unittest.TestCase):
+    """Unit test for JSONObjectReader Class"""
+
+    data = {"User.1": {"id": "1", "name": "Betty \"B\" {x}", "age": 123456},
+            "Place.2": {"latitude": -12.5e3, "amenity_ids": ["a", "b"],
+                        "flags": [True, False, None]},
+            "Empty.3": {}}
+
+    def read(self, text, chunk_size):
+        """Returns the list of members read from text"""
+        return list(JSONObjectReader(StringIO(text), chunk_size))
+
+    def test_members(self):
+        """Test that every member is yielded whatever the chunk size"""
+        for text in (json.dumps(self.data), json.dumps(self.data, indent=4)):
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+                items = self.read(text, chunk_size)
+                self.assertEqual({key: value for _, key, value in items},
+                                 self.data)
+
+    def test_offsets(self):
+        """Test that offsets point to the keys in the file"""
+        text = json.dumps(self.data, indent=4)
+        for offset, key, _ in self.read(text, 5):
+            self.assertTrue(text.startswith(json.dumps(key), offset))
+
+    def test_empty(self):
+        """Test an empty object"""
+        self.assertEqual(self.read("  { \n }", 1), [])
+
+    def test_syntax_error(self):
+        """Test that syntax errors are raised with their offset"""
+        text = '{"a": {"x": 1}, "b": {"x": 2,, }, "c": {}}'
+        reader = iter(JSONObjectReader(StringIO(text), 4))
+        self.assertEqual(next(reader)[1], "a")
+        with self.assertRaises(JSONStreamError) as error:
+            next(reader)
+        self.assertEqual(error.exception.offset, text.index(",,") + 1)
+
+    def test_truncated(self):
+        """Test that a truncated file raises an error"""
+        text = json.dumps(self.data)[:-10]
+        with self.assertRaises(JSONStreamError):
+            self.read(text, 8)
+        with self.assertRaises(JSONStreamError):
+            self.read("", 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
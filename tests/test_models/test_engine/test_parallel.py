@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+"""Module containing unit test for the parallel module"""
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from models.engine import parallel
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+@unittest.skipUnless(parallel.available(), "fork is not available")
+class TestParallel(unittest.TestCase):
+    """Unit test for the parallel module"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = FileStorage()
+        self.storage._FileStorage__file_path = "test.json"
+        for i in range(300):
+            obj = (User, Place, Review)[i % 3]()
+            obj.name = f"Object é{i}"
+        self.storage.save()
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        self.storage.format = "json"
+        self.storage.save()
+        del self.storage.format
+        for path in ("test.json", "test.json.bak"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def reload(self, workers, lazy=False):
+        """Reloads from scratch, returns the objects and the errors"""
+        self.storage.all().clear()
+        self.storage.workers, self.storage.lazy = workers, lazy
+        try:
+            with patch("sys.stderr", new=StringIO()), \
+                    patch.object(parallel, "MIN_CHUNK", 1000):
+                self.storage.reload()
+        finally:
+            del self.storage.workers, self.storage.lazy
+        return ({key: obj.to_dict()
+                 for key, obj in self.storage.all().items()},
+                self.storage.errors)
+
+    def test_split(self):
+        """Test that the chunks are valid files of the same format"""
+        with open("test.json", "rb") as f:
+            data = f.read()
+        chunks = parallel.split(data, "json", 5000)
+        self.assertGreater(len(chunks), 5)
+        merged = {}
+        for chunk, _ in chunks:
+            merged.update(json.loads(chunk))
+        self.assertEqual(merged, json.loads(data))
+
+        text = data.decode()
+        for chunk, base in chunks:
+            for key in json.loads(chunk):
+                offset = chunk.decode().index(json.dumps(key))
+                self.assertTrue(text.startswith(json.dumps(key),
+                                                base + offset))
+        self.assertEqual(parallel.split(data, "binary", 10), [(data, 0)])
+
+    def test_same_as_serial(self):
+        """Test that every format reloads as the serial reload does"""
+        for fmt in ("json", "jsonl+gzip", "compact", "binary"):
+            self.storage.format = fmt
+            self.storage.save()
+            serial = self.reload(1)
+            self.assertEqual(self.reload(4), serial)
+            self.assertEqual(self.reload(4, lazy=True), serial)
+            self.assertEqual(len(serial[0]), self.storage.count())
+
+    def test_errors_as_serial(self):
+        """Test that invalid records and syntax errors match serial ones"""
+        with open("test.json", "r") as f:
+            data = json.load(f)
+        data["User.bad"] = {"__class__": "Nothing", "id": "bad"}
+        data["User.bad2"] = {"__class__": "User", "id": "bad2",
+                             "created_at": "yesterday"}
+        text = json.dumps(data, indent=4)
+        if os.path.isfile("test.json.bak"):
+            os.remove("test.json.bak")
+
+        for content in (text, text[:len(text) * 2 // 3]):
+            with open("test.json", "w") as f:
+                f.write(content)
+            serial = self.reload(1)
+            self.assertEqual(self.reload(3), serial)
+            self.assertEqual(len(serial[1]), 2 if content == text else 1)
+
+    def test_worker_error(self):
+        """Test that an error raised in a worker is raised by read"""
+        with patch.object(parallel, "decode", side_effect=ValueError("x")):
+            with self.assertRaises(ValueError):
+                parallel.read(["test.json"], 2)
+        self.assertEqual(parallel.read([], 2), {})
+
+    def test_reload_on_import(self):
+        """Test the parallel reload run by the import of models"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        with tempfile.TemporaryDirectory() as tmp:
+            with open("test.json", "rb") as f, \
+                    open(os.path.join(tmp, "file.json"), "wb") as copy:
+                data = f.read()
+                copy.write(data)
+            env = dict(os.environ, HBNB_RELOAD_WORKERS="2",
+                       PYTHONPATH=root)
+            env.pop("HBNB_TYPE_STORAGE", None)
+            for _ in range(3):
+                result = subprocess.run(
+                    [sys.executable, "-c",
+                     "import models; print(models.storage.count())"],
+                    cwd=tmp, env=env, capture_output=True, text=True,
+                    timeout=60)
+                self.assertEqual(result.stdout, f"{len(json.loads(data))}\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Module containing unit test for the query module"""
+import unittest
+from models.engine.query import Condition, order, parse, project, split
+
+
+class Row:
+    """Object with a few Place attributes"""
+
+    def __init__(self, **attributes):
+        """Sets the attributes"""
+        self.__dict__.update(attributes)
+
+
+class TestQuery(unittest.TestCase):
+    """Unit test for the query module"""
+
+    def test_parse(self):
+        """Test that conditions and their values are parsed"""
+        self.assertEqual(parse("max_guest>=4"), ("max_guest", ">=", 4))
+        self.assertEqual(parse("price!=9.5"), ("price", "!=", 9.5))
+        self.assertEqual(parse("name='My house'"),
+                         ("name", "=", "My house"))
+        self.assertEqual(parse('city_id="5"'), ("city_id", "=", "5"))
+        self.assertEqual(parse("city_id=abc"), ("city_id", "=", "abc"))
+        for text in ("price", "<100", "price<", "a b=1", "a.b=1"):
+            with self.assertRaises(ValueError):
+                parse(text)
+        with self.assertRaises(ValueError):
+            Condition("price", "~", 1)
+
+    def test_split(self):
+        """Test that quoted strings are kept whole"""
+        self.assertEqual(split(""" Place name='My "big" house'  a="b c"d """),
+                         ["Place", """name='My "big" house'""", 'a="b c"d'])
+        self.assertEqual(split("x<1 name='a b"), ["x<1", "name='a", "b"])
+
+    def test_matches(self):
+        """Test conditions on attributes of any type"""
+        row = Row(price=80, name="Nice")
+        self.assertTrue(Condition("price", "<", 100).matches(row))
+        self.assertFalse(Condition("price", ">", 80).matches(row))
+        self.assertTrue(Condition("name", "!=", "Bad").matches(row))
+        self.assertFalse(Condition("name", "<", 100).matches(row))
+        self.assertFalse(Condition("other", ">=", 0).matches(row))
+        self.assertTrue(Condition("other", "=", None).matches(row))
+
+    def test_order(self):
+        """Test that objects without the attribute come last"""
+        rows = [Row(n=3), Row(), Row(n="b"), Row(n=1.5), Row(n="a"),
+                Row(n=None), Row(n=3)]
+        self.assertEqual([getattr(row, "n", None) for row in
+                          order(rows, "n")],
+                         [1.5, 3, 3, "a", "b", None, None])
+        ordered = order(rows, "n", reverse=True)
+        self.assertEqual([getattr(row, "n", None) for row in ordered],
+                         ["b", "a", 3, 3, 1.5, None, None])
+        self.assertIs(ordered[2], rows[0])
+
+    def test_project(self):
+        """Test projection on fields"""
+        self.assertEqual(project(Row(a=1, b=2), ["b", "c"]),
+                         {"b": 2, "c": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""Module containing unit test for the serializers module"""
+import unittest
+import json
+import os
+from io import BytesIO
+from models.engine import serializers
+from models.engine.json_stream import JSONStreamError
+from models.engine.serializers import FormatError
+
+
+class TestSerializers(unittest.TestCase):
+    """Unit test for the serializers module"""
+
+    records = {"User.1": {"__class__": "User", "id": "1",
+                          "name": "Betty \"B\" é中", "age": 123456},
+               "Place.2": {"id": "2", "__class__": "Place",
+                           "latitude": -12.5e3, "amenity_ids": ["a", "b"],
+                           "flags": [True, False, None],
+                           "big": -(1 << 40), "nested": {"x": {}}}}
+    formats = [name + compression
+               for name in serializers.SERIALIZERS
+               for compression in ("", "+zlib", "+gzip", "+lzma")]
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        for path in ("test.json", "test.out"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def dump(self, fmt, records):
+        """Returns the bytes of records written in format fmt"""
+        serializer, _ = serializers.parse_format(fmt)
+        return serializers.dump(fmt, [serializer.encode(key, record)
+                                      for key, record in records.items()])
+
+    def load(self, data):
+        """Returns the detected format and the records of data"""
+        fmt, records = serializers.load(BytesIO(data))
+        return fmt, {key: record for _, key, record in records}
+
+    def test_round_trip(self):
+        """Test that every format is read back and detected"""
+        for fmt in self.formats:
+            self.assertEqual(self.load(self.dump(fmt, self.records)),
+                             (fmt, self.records))
+            # an empty compact file is also an empty json one
+            self.assertEqual(self.load(self.dump(fmt, {}))[1], {})
+
+    def test_json_layout(self):
+        """Test that the json format is the json.dump indent=4 layout"""
+        self.assertEqual(self.dump("json", self.records).decode(),
+                         json.dumps(self.records, indent=4))
+        self.assertEqual(json.loads(self.dump("compact", self.records)),
+                         self.records)
+
+    def test_detect_json(self):
+        """Test that JSON written by other tools is detected as json"""
+        for text in (json.dumps(self.records), "{ }", "{}"):
+            fmt, records = self.load(text.encode())
+            self.assertEqual((fmt, records), ("json", json.loads(text)))
+
+    def test_binary_values(self):
+        """Test the MessagePack encoding of every kind of value"""
+        values = [None, True, False, 0, 127, 128, -1, -32, -33, 255, 65536,
+                  1 << 40, -(1 << 63), (1 << 64) - 1, 0.5, "", "x" * 40,
+                  "y" * 300, "z" * 70000, list(range(20)),
+                  {str(i): i for i in range(20)}]
+        serializer = serializers.SERIALIZERS["binary"]
+        for value in values:
+            data = serializer.encode(None, value)
+            self.assertEqual(serializers._unpack(data, 0), (value, len(data)))
+        self.assertEqual(serializer.encode(None, 1), b"\x01")
+        self.assertEqual(serializer.encode(None, {"a": None}),
+                         b"\x81\xa1a\xc0")
+
+    def test_truncated(self):
+        """Test that truncated files raise an error"""
+        for fmt in self.formats:
+            data = self.dump(fmt, self.records)
+            for cut in (len(data) // 2, len(data) - 3):
+                with self.assertRaises((FormatError, JSONStreamError),
+                                       msg=fmt):
+                    self.load(data[:cut])
+
+    def test_invalid(self):
+        """Test that invalid records are reported with their offset"""
+        data = b'{"__class__": "User", "id": "1"}\n{"__class__": \n'
+        with self.assertRaises(FormatError) as error:
+            self.load(data)
+        self.assertEqual(error.exception.offset, data.index(b"\n") + 1)
+        with self.assertRaises(FormatError):
+            self.load(serializers.BinarySerializer.MAGIC + b"\xc1")
+        with self.assertRaises(ValueError):
+            serializers.parse_format("xml+gzip")
+
+    def test_convert(self):
+        """Test that convert rewrites a file in another format"""
+        with open("test.json", "wb") as f:
+            f.write(self.dump("json", self.records))
+        self.assertEqual(serializers.convert("test.json", "test.out",
+                                             "binary+lzma"), 2)
+        with open("test.out", "rb") as f:
+            self.assertEqual(self.load(f.read()),
+                             ("binary+lzma", self.records))
+
+
+if __name__ == "__main__":
+    unittest.main()
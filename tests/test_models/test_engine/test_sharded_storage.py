@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""Module containing unit test for ShardedStorage Class"""
+import unittest
+import json
+import os
+import shutil
+from io import StringIO
+from unittest.mock import patch
+from models.amenity import Amenity
+from models.engine.file_storage import FileStorage
+from models.engine.sharded_storage import ShardedStorage
+from models.review import Review
+from models.user import User
+
+
+class TestShardedStorage(unittest.TestCase):
+    """Unit test for ShardedStorage Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = ShardedStorage()
+        self.storage._ShardedStorage__directory = "test.shards"
+        self.storage.save()
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        shutil.rmtree("test.shards", ignore_errors=True)
+        ShardedStorage._ShardedStorage__shards = {}
+
+    def shard(self, name):
+        """Returns the records of a shard, by key"""
+        with open(os.path.join("test.shards", name), "r") as f:
+            return json.load(f)
+
+    def test_is_file_storage(self):
+        """Test that ShardedStorage shares FileStorage's objects"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertIs(self.storage.all(), FileStorage().all())
+
+    def test_one_shard_per_class(self):
+        """Test that every class is saved to its own file"""
+        user, amenity = User(), Amenity()
+        self.storage.save()
+
+        self.assertIn(f"User.{user.id}", self.shard("User.json"))
+        self.assertEqual(set(self.shard("Amenity.json")),
+                         {key for key in self.storage.all(Amenity)})
+        self.assertEqual(self.storage.shard(f"User.{user.id}"),
+                         os.path.join("test.shards", "User.json"))
+
+    def test_save_dirty_shards(self):
+        """Test that only the shards of changed objects are written"""
+        amenity, review = Amenity(), Review()
+        self.storage.save()
+
+        amenity.name = "Wifi"
+        with patch.object(self.storage, "_write",
+                          wraps=self.storage._write) as write:
+            self.storage.save()
+            self.storage.save()
+        self.assertEqual([call.args[0] for call in write.call_args_list],
+                         [os.path.join("test.shards", "Amenity.json")])
+
+        self.storage.delete(review)
+        self.storage.save()
+        path = os.path.join("test.shards", "Review.json")
+        reviews = self.shard("Review.json") if os.path.isfile(path) else {}
+        self.assertNotIn(f"Review.{review.id}", reviews)
+        self.assertEqual(len(reviews), self.storage.count(Review))
+
+    def test_save_failure(self):
+        """Test that the shards a failed save missed are written later"""
+        amenity = Amenity()
+        self.storage.save()
+        amenity.name = "Wifi"
+        with patch.object(self.storage, "_write", side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        self.assertNotIn("name", self.shard("Amenity.json")
+                         [f"Amenity.{amenity.id}"])
+
+        self.storage.save()
+        self.assertEqual(self.shard("Amenity.json")
+                         [f"Amenity.{amenity.id}"]["name"], "Wifi")
+
+    def test_partitions(self):
+        """Test that objects are hash-partitioned by id"""
+        self.storage.partitions = 4
+        try:
+            users = [User() for _ in range(40)]
+            self.storage.save()
+            names = sorted(name for name in os.listdir("test.shards")
+                           if name.startswith("User."))
+            self.assertEqual(names, [f"User.{n}.json" for n in range(4)])
+            stored = {}
+            for name in names:
+                stored.update(self.shard(name))
+            for user in users:
+                self.assertIn(f"User.{user.id}", stored)
+
+            # back to one shard per class: the partitions are removed
+            del self.storage.partitions
+            self.storage.all().clear()
+            self.storage.reload()
+            self.storage.save()
+            names = [name for name in os.listdir("test.shards")
+                     if name.startswith("User.")]
+            self.assertEqual(names, ["User.json"])
+            self.assertEqual(len(self.shard("User.json")),
+                             self.storage.count(User))
+        finally:
+            self.storage.__dict__.pop("partitions", None)
+
+    def test_reload(self):
+        """Test that reload loads every shard, recovering corrupted ones"""
+        user, amenity = User(), Amenity()
+        user.first_name = "Betty"
+        self.storage.save()
+        path = os.path.join("test.shards", "Amenity.json")
+        with open(path, "w") as f:
+            f.write('{"Amenity.x": {')
+
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()) as stderr:
+            self.storage.reload()
+        self.assertEqual(self.storage.get(User, user.id).to_dict(),
+                         user.to_dict())
+        # the snapshot of the shard predates the amenity
+        self.assertIsNone(self.storage.get(Amenity, amenity.id))
+        self.assertIn(f"{path}.bak", stderr.getvalue())
+        self.assertEqual(len(self.storage.errors), 2)
+
+        # the corrupted shard is written again by the next save
+        self.storage.save()
+        self.assertEqual(set(self.shard("Amenity.json")),
+                         set(self.storage.all(Amenity)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""Module containing unit test for SnapshotStorage and Snapshot Classes"""
+import unittest
+import os
+from unittest.mock import patch
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import FormatError
+from models.engine.snapshot import Snapshot
+from models.engine.snapshot_storage import SnapshotStorage
+from models.place import Place
+from models.user import User
+
+
+class TestSnapshot(unittest.TestCase):
+    """Unit test for Snapshot Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        serializer = serializers.SERIALIZERS["snapshot"]
+        self.records = {f"{cls_name}.{i:03}": {"__class__": cls_name,
+                                               "id": f"{i:03}", "n": i}
+                        for cls_name in ("User", "Place", "PlaceX")
+                        for i in range(0, 200, 3)}
+        with open("test.snapshot", "wb") as f:
+            f.write(serializer.dump([serializer.encode(key, record)
+                                     for key, record in self.records.items()]))
+        self.snapshot = Snapshot("test.snapshot")
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        self.snapshot.close()
+        os.remove("test.snapshot")
+
+    def test_index(self):
+        """Test counts, binary search and records"""
+        self.assertEqual(len(self.snapshot), len(self.records))
+        self.assertEqual(self.snapshot.count("Place"), 67)
+        self.assertEqual(self.snapshot.count("State"), 0)
+        for key, record in self.records.items():
+            i = self.snapshot.find(key)
+            self.assertEqual(self.snapshot.key(i), key)
+            self.assertEqual(self.snapshot.record(i), record)
+        for key in ("User.001", "User.999", "Place.", "State.000", "X"):
+            self.assertEqual(self.snapshot.find(key), -1)
+
+    def test_invalid(self):
+        """Test that files that are not complete snapshots are refused"""
+        with open("test.snapshot", "rb") as f:
+            data = f.read()
+        for content in (data[:-1], b"", b'{"User.1": {}}'):
+            with open("test.snapshot", "wb") as f:
+                f.write(content)
+            with self.assertRaises(FormatError):
+                Snapshot("test.snapshot").close()
+
+
+class TestSnapshotStorage(unittest.TestCase):
+    """Unit test for SnapshotStorage Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = SnapshotStorage()
+        self.storage._SnapshotStorage__snapshot_path = "test.snapshot"
+        self.storage.all().clear()
+        self.users = [User() for _ in range(50)]
+        self.place = Place()
+        self.place.latitude, self.place.longitude = 10.0, 20.0
+        self.storage.save()
+        self.total = self.storage.count()
+        self.storage.all().clear()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        self.storage.close()
+        self.storage.all().clear()
+        FileStorage._FileStorage__file_format = "json"
+        for path in ("test.snapshot", "test.snapshot.bak"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def objects(self):
+        """Returns the objects built in memory"""
+        return FileStorage._FileStorage__objects
+
+    def test_reload_maps(self):
+        """Test that reload builds nothing and counts from the index"""
+        self.assertEqual(self.objects(), {})
+        self.assertEqual(self.storage.count(), self.total)
+        self.assertEqual(self.storage.count(User), 50)
+
+    def test_get(self):
+        """Test that get builds the requested object only"""
+        user = self.users[7]
+        loaded = self.storage.get(User, user.id)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertIs(self.storage.get("User", user.id), loaded)
+        self.assertEqual(list(self.objects()), [f"User.{user.id}"])
+        self.assertIsNone(self.storage.get(User, "nothing"))
+        self.assertEqual(self.storage.count(User), 50)
+
+    def test_all(self):
+        """Test that all builds the records of the class asked for"""
+        users = self.storage.all(User)
+        self.assertEqual(len(users), 50)
+        self.assertEqual(len(self.objects()), 50)
+        self.assertEqual(len(self.storage.all()), self.total)
+        found = self.storage.nearby(Place, 10, 20, radius=1)
+        self.assertEqual([obj.id for _, obj in found], [self.place.id])
+
+    def test_find_decodes_once(self):
+        """Test that find and select decode the records of a class once"""
+        record = Snapshot.record
+        decoded = []
+
+        def counted_record(snapshot, i):
+            decoded.append(i)
+            return record(snapshot, i)
+        user = self.users[3]
+        with patch.object(Snapshot, "record", new=counted_record):
+            found = self.storage.find(User, id=user.id)
+            again = list(self.storage.select(User, ("id", "=", user.id)))
+            self.storage.find(User, id=self.users[4].id)
+        self.assertEqual(len(decoded), 50)
+        self.assertEqual([obj.id for obj in found], [user.id])
+        self.assertEqual(again, found)
+        self.assertEqual(len(self.objects()), 2)
+
+    def test_save(self):
+        """Test that changes are saved along with the records not built"""
+        first = self.storage.get(User, self.users[0].id)
+        first.first_name = "Betty"
+        self.storage.delete(self.storage.get(User, self.users[1].id))
+        new = User()
+        self.storage.save()
+
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(User), 50)
+        self.assertEqual(self.storage.get(User, first.id).first_name, "Betty")
+        self.assertIsNone(self.storage.get(User, self.users[1].id))
+        self.assertIsNotNone(self.storage.get(User, new.id))
+        self.assertEqual(self.storage.get(User, self.users[2].id).to_dict(),
+                         self.users[2].to_dict())
+
+    def test_other_format(self):
+        """Test that a file in another format is loaded in memory"""
+        serializers.convert("test.snapshot", "test.snapshot.bak", "jsonl")
+        os.replace("test.snapshot.bak", "test.snapshot")
+        self.storage.reload()
+        self.assertEqual(len(self.objects()), self.total)
+        self.assertEqual(self.storage.count(), self.total)
+
+
+if __name__ == "__main__":
+    unittest.main()
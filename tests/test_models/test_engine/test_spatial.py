@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Module containing unit test for GridIndex Class"""
+import unittest
+import random
+import time
+from models.engine.file_storage import FileStorage
+from models.engine.spatial import GridIndex, distance
+from models.place import Place
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unit test for GridIndex Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        generator = random.Random(42)
+        self.points = {}
+        self.index = GridIndex(cell_size=0.5)
+        for i in range(2000):
+            if i % 2:
+                lat = generator.uniform(47, 50)
+                lon = generator.uniform(1, 4)
+            else:
+                lat = generator.uniform(-90, 90)
+                lon = generator.uniform(-180, 180)
+            self.points[str(i)] = (lat, lon)
+            self.index.add(str(i), lat, lon)
+
+    def brute_force(self, lat, lon):
+        """Returns every (distance, key) sorted by distance"""
+        return sorted((distance(lat, lon, *point), key)
+                      for key, point in self.points.items())
+
+    def test_distance(self):
+        """Test the great-circle distance"""
+        self.assertAlmostEqual(distance(48.8566, 2.3522, 51.5074, -0.1278),
+                               343.5, delta=1)
+        self.assertEqual(distance(10, 20, 10, 20), 0)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5),
+                               distance(0, 0, 0, 1))
+
+    def test_bbox(self):
+        """Test bounding box queries, across the antimeridian too"""
+        coarse = GridIndex(cell_size=5)
+        for key, point in self.points.items():
+            coarse.add(key, *point)
+        for south, west, north, east in ((48, 2, 49, 3), (-10, 170, 10, -170),
+                                         (-90, -180, 90, 180),
+                                         (-1.6, 13.1, 79.65, 12.57)):
+            expect = {key for key, (lat, lon) in self.points.items()
+                      if south <= lat <= north and
+                      (west <= lon <= east if west <= east
+                       else lon >= west or lon <= east)}
+            for index in (self.index, coarse):
+                self.assertEqual(set(index.bbox(south, west, north, east)),
+                                 expect)
+
+    def test_radius(self):
+        """Test radius queries against a full scan"""
+        for lat, lon, km in ((48.85, 2.35, 20), (89.9, 0, 500),
+                             (0, 179.9, 1500), (-33.9, 151.2, 3000)):
+            expect = [(d, key) for d, key in self.brute_force(lat, lon)
+                      if d <= km]
+            self.assertEqual(self.index.radius(lat, lon, km), expect)
+
+    def test_nearest(self):
+        """Test k nearest queries against a full scan"""
+        for lat, lon, k in ((48.85, 2.35, 10), (-60, -120, 5),
+                            (0, -179.99, 3), (48, 3, 5000)):
+            expect = self.brute_force(lat, lon)[:k]
+            self.assertEqual(self.index.nearest(lat, lon, k), expect)
+        self.assertEqual(self.index.nearest(0, 0, 0), [])
+
+    def test_sparse(self):
+        """Test that queries on a sparse grid visit the occupied cells"""
+        index = GridIndex()
+        index.add("a", 10, 20)
+        index.add("b", -47.9, -170.1)
+        start = time.perf_counter()
+        self.assertEqual([key for _, key in index.nearest(-48, -170, 2)],
+                         ["b", "a"])
+        self.assertEqual([key for _, key in index.nearest(60, 100, 1)],
+                         ["a"])
+        self.assertEqual(sorted(index.bbox(-90, -180, 90, 180)), ["a", "b"])
+        self.assertEqual(index.bbox(-50, 170, -40, -171), [])
+        self.assertEqual([key for _, key in index.radius(0, 0, 20000)],
+                         ["a", "b"])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_remove(self):
+        """Test that removed and moved points are updated"""
+        self.index.add("0", 10, 10)
+        self.index.remove("1")
+        self.index.remove("1")
+        self.assertEqual(len(self.index), 1999)
+        self.assertNotIn("1", self.index)
+        self.assertEqual(self.index.nearest(10, 10, 1), [(0, "0")])
+
+    def test_storage(self):
+        """Test the spatial queries of FileStorage"""
+        storage = FileStorage()
+        near, far = Place(), Place()
+        near.latitude, near.longitude = -45.0001, 100.0001
+        far.latitude = -46.0
+        far.longitude = 100.0
+
+        found = storage.nearby(Place, -45, 100, radius=1)
+        self.assertEqual([obj for _, obj in found], [near])
+        found = storage.nearby("Place", -45, 100, k=2)
+        self.assertEqual([obj for _, obj in found], [near, far])
+        self.assertEqual(storage.within(Place, -46.5, 99, -45.5, 101), [far])
+
+        storage.delete(near)
+        self.assertEqual(storage.nearby(Place, -45, 100, radius=1), [])
+        with self.assertRaises(ValueError):
+            storage.nearby("User", 0, 0, k=1)
+        with self.assertRaises(ValueError):
+            storage.nearby(Place, 0, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""Module containing unit test for SQLiteStorage Class"""
+import unittest
+import json
+import os
+import sqlite3
+from io import StringIO
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.engine.sqlite_storage import SQLiteStorage
+from models.place import Place
+from models.user import User
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Unit test for SQLiteStorage Class"""
+
+    def setUp(self):
+        """First code to run before any test"""
+        self.storage = SQLiteStorage()
+        self.storage._SQLiteStorage__db_path = "test.db"
+        self.storage.save()
+
+    def tearDown(self):
+        """Code To Run after every test"""
+        self.storage.close()
+        for path in ("test.db", "test.db-wal", "test.db-shm"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def rows(self, table):
+        """Returns the rows of a table, by id"""
+        with sqlite3.connect("test.db") as connection:
+            rows = connection.execute(f"SELECT id, data FROM {table}")
+            return {obj_id: json.loads(data) for obj_id, data in rows}
+
+    def test_is_file_storage(self):
+        """Test that SQLiteStorage shares FileStorage's objects"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertIs(self.storage.all(), FileStorage().all())
+
+    def test_schema(self):
+        """Test the tables, WAL mode and indexed foreign keys"""
+        connection = self.storage._connect()
+        mode, = connection.execute("PRAGMA journal_mode").fetchone()
+        self.assertEqual(mode, "wal")
+
+        indexes = {name for name, in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'Place' AND sql IS NOT NULL")}
+        self.assertEqual(indexes, {"Place_city_id", "Place_user_id"})
+        plan = connection.execute("EXPLAIN QUERY PLAN SELECT id FROM Place "
+                                  "WHERE city_id IS ?", ("x",)).fetchall()
+        self.assertIn("Place_city_id", str(plan))
+
+    def test_save_upserts(self):
+        """Test that save writes new and changed objects only"""
+        obj = Place()
+        obj.city_id = "city"
+        self.storage.save()
+        self.assertEqual(self.rows("Place")[obj.id], obj.to_dict())
+
+        obj.name = "Home"
+        self.storage.save()
+        self.assertEqual(self.rows("Place")[obj.id]["name"], "Home")
+        self.assertEqual(len(self.rows("Place")), self.storage.count(Place))
+
+    def test_save_deletes(self):
+        """Test that removed objects are deleted from the database"""
+        kept, removed = User(), User()
+        self.storage.save()
+        self.storage.delete(removed)
+        del self.storage.all()[f"User.{kept.id}"]
+        self.storage.save()
+
+        self.assertNotIn(removed.id, self.rows("User"))
+        self.assertNotIn(kept.id, self.rows("User"))
+
+    def test_save_failure(self):
+        """Test that changes not committed are saved by the next save"""
+        kept, removed = Place(), Place()
+        self.storage.save()
+        kept.name = "Loft"
+        self.storage.delete(removed)
+        added = User()
+
+        locked = sqlite3.OperationalError("database is locked")
+        with patch.object(SQLiteStorage, "_SQLiteStorage__execute",
+                          side_effect=locked):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.storage.save()
+        self.assertNotIn("name", self.rows("Place")[kept.id])
+
+        self.storage.save()
+        self.assertEqual(self.rows("Place")[kept.id]["name"], "Loft")
+        self.assertNotIn(removed.id, self.rows("Place"))
+        self.assertIn(added.id, self.rows("User"))
+        self.storage.delete(kept)
+        self.storage.delete(added)
+        self.storage.save()
+
+    def test_reload(self):
+        """Test that reload loads back every saved object"""
+        obj = User()
+        obj.first_name = "Betty"
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+
+        loaded = self.storage.get(User, obj.id)
+        self.assertEqual(loaded.to_dict(), obj.to_dict())
+        self.assertEqual(self.storage.count(), len(self.rows("User")) +
+                         sum(len(self.rows(name)) for name in
+                             FileStorage.classes if name != "User"))
+
+        # nothing changed since the reload
+        self.assertEqual(self.storage._changes(), ([], []))
+
+    def test_reload_errors(self):
+        """Test that invalid rows are skipped and reported"""
+        obj = User()
+        self.storage.save()
+        with sqlite3.connect("test.db") as connection:
+            connection.execute("INSERT INTO User (id, data) VALUES (?, ?)",
+                               ("broken", "{not json"))
+        self.storage.all().clear()
+        with patch("sys.stderr", new=StringIO()) as err:
+            self.storage.reload()
+
+        self.assertIn("test.db: row", err.getvalue())
+        self.assertIsNotNone(self.storage.get(User, obj.id))
+        self.assertEqual(len(self.storage.errors), 1)
+        self.assertIn("User.broken", self.storage.errors[0][1])
+
+    def test_query(self):
+        """Test that query selects on the indexed columns"""
+        first, second = Place(), Place()
+        first.city_id = second.city_id = "query-city"
+        second.max_guest = 4
+
+        self.assertEqual(set(self.storage.query(Place, city_id="query-city")),
+                         {first, second})
+        self.assertEqual(self.storage.query("Place", city_id="query-city",
+                                            max_guest=4), [second])
+        self.assertEqual(self.storage.query(Place, city_id="nothing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()